@@ -1,37 +1,145 @@
 import os
+import io
+import sys
 from dotenv import load_dotenv
 import re
 import json
 import random
 import time
-from groq import Groq
-import instructor
-from pydantic import create_model, Field, ValidationError
+import asyncio
+import inspect
+import threading
+import contextvars
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from typing import List
 from config import CONFIG
 from config import PROMPT
+from agendador import AgendadorEtapas
+from cache_ia import obter_cache
+from telemetria import obter_telemetria
+from modelos_ia import obter_registro, Field
+from armazenamento import obter_armazenamento, chave_artefato
+from duplicatas import DetectorDuplicatas, texto_dialogo
+from regeneracao import planejar_regeneracao, etapa_do_artefato, hash_etapa, etapas_ativas
+from empacotamento import empacotar, orcamento_pacote
+from roteamento import rota_etapa, modelo_etapa
+from nomes import normalizar_nome
+from hedge import obter_controle_hedge
+from passos_ia import EtapaIA, PedidoIA, Paralelo, conduzir, conduzir_async
+from catalogo_templates import obter_catalogo
+from exportador import formatar_ansi, escrever_texto, pedacos_definicao, tamanho_pedacos
+from orcamento_dialogos import OrcamentoDialogos
+from reparo_json import reparar_json, texto_bruto, pendencias, desembrulhar, juntar
+from limitador import obter_limitador, classificar_erro, cabecalhos_erro, eh_limite_taxa, tempo_espera, estimar_tokens
 
 load_dotenv()
 
+# Uma pergunta no terminal por vez: as etapas independentes rodam em paralelo (agendador e Paralelo), e as perguntas de
+# duas etapas não podem se misturar na tela nem uma receber a resposta da outra.
+TRAVA_TERMINAL = threading.Lock()
+
+# Uso de tokens da resposta em streaming que está sendo lida na thread ou tarefa atual (ver medir_uso_stream)
+USO_STREAM = contextvars.ContextVar("uso_stream", default=None)
+
+
+# Guarda o uso de tokens que vem no último pedaço de uma resposta em streaming: `usage`, ou `x_groq.usage`, que a
+# Groq manda no fim de todo stream.
+def guardar_uso_stream(pedaco):
+    uso = getattr(pedaco, "usage", None) or getattr(getattr(pedaco, "x_groq", None), "usage", None)
+    registro = USO_STREAM.get()
+    if uso is not None and registro is not None:
+        registro["usage"] = uso
+
+
+def ler_stream(pedacos):
+    for pedaco in pedacos:
+        guardar_uso_stream(pedaco)
+        yield pedaco
+
+
+async def ler_stream_async(pedacos):
+    async for pedaco in pedacos:
+        guardar_uso_stream(pedaco)
+        yield pedaco
+
+
+# Envolve o `chat.completions.create` original do cliente da Groq, antes do instructor, para que os pedaços de uma
+# resposta em streaming passem por guardar_uso_stream: o instructor entrega só os objetos parciais, sem o uso.
+def medir_uso_stream(criar):
+    if inspect.iscoroutinefunction(criar):
+        async def criar_async(*args, **kwargs):
+            resposta = await criar(*args, **kwargs)
+            return ler_stream_async(resposta) if kwargs.get("stream") else resposta
+
+        return criar_async
+
+    def criar_sync(*args, **kwargs):
+        resposta = criar(*args, **kwargs)
+        return ler_stream(resposta) if kwargs.get("stream") else resposta
+
+    return criar_sync
+
 class BuildMyCharUI:
     # Classe para construir personagens, coletando informações do usuário e gerando descrições usando IA.
-    def __init__(self):
-        api_key = os.environ.get("GROQ_API_KEY")
-        if not api_key:
+    # Sem argumentos, roda o modo interativo de sempre. No modo em lote, recebe as respostas prontas, os caminhos dos
+    # arquivos do personagem, o semáforo global de requisições à IA e desativa as perguntas no terminal.
+    # `cliente` substitui o cliente da Groq (por exemplo, pelo ClienteFalso dos benchmarks). Os artefatos ficam no
+    # armazenamento de CONFIG["armazenamento"], separados por `personagem_id`.
+    # Com `assincrono`, o cliente padrão é o AsyncGroq, o objeto só é construído e o pipeline roda com
+    # `await start_async()`; o semáforo, nesse caso, é um asyncio.Semaphore.
+    # O cliente padrão só é criado na primeira chamada à IA (cliente_ia).
+    # `ao_progresso` recebe os eventos do pipeline: os das etapas (ver AgendadorEtapas) e {"tipo": "artefato", ...} a
+    # cada artefato do personagem salvo. Usado pelo modo serviço (servico.py) para transmitir o progresso.
+    # Com `exportar_telemetria=False`, a telemetria não é gravada ao fim do personagem: o lote e o serviço gravam uma
+    # vez só, ao terminar.
+    def __init__(self, respostas=None, charJsons=None, *, interativo:bool=True, semaforo_ia=None, cliente=None, iniciar:bool=True, personagem_id=None, assincrono:bool=False, ao_progresso=None, exportar_telemetria:bool=True):
+        if cliente is None and not os.environ.get("GROQ_API_KEY"):
             print("Erro: variável de ambiente GROQ_API_KEY não encontrada.")
             return
     
-        self.client = instructor.patch(Groq(api_key=api_key))
+        self.client = cliente
+        self.assincrono = assincrono
+        self.trava_cliente = threading.Lock()
         self.respostas = {}
+        self.respostas_iniciais = respostas
         self.personagem = {}
+        self.resumo = None
         self.allTemplates = []
-        self.charJsons = CONFIG["charJsons"]
+        self.charJsons = charJsons or CONFIG["charJsons"]
+        self.interativo = interativo
+        self.semaforo_ia = semaforo_ia
+        self.erros_etapas = {}
+        self.duracoes_etapas = {}
+        self.etapas_ignoradas = []
+        self.ao_progresso = ao_progresso
+        self.exportar_telemetria = exportar_telemetria
+        self.cache = obter_cache()
+        self.limitador = obter_limitador()
+        self.hedge = obter_controle_hedge()
+        self.telemetria = obter_telemetria()
+        self.registro_modelos = obter_registro()
+        self.armazenamento = obter_armazenamento()
+        self.personagem_id = personagem_id or CONFIG["armazenamento"]["personagem_padrao"]
+        self.regenerar = set()
+        self.trava_regenerar = threading.Lock()
         
-        self.start()
+        if iniciar and not assincrono:
+            self.start()
     
-    # Abre um arquivo JSON e retorna os dados como um dicionário. Se ocorrer um erro, imprime uma mensagem e retorna um dicionário vazio.
+    # Chave do artefato do personagem para o caminho, ou None se o caminho for um arquivo comum (perguntas, templates).
+    def chave_artefato(self, caminho):
+        return chave_artefato(caminho, self.charJsons)
+
+    # Abre um arquivo JSON (ou o artefato do personagem no armazenamento) e retorna os dados como um dicionário. Se ocorrer um erro, imprime uma mensagem e retorna um dicionário vazio.
     def abrir_json(self, caminho):
         try:
+            chave = self.chave_artefato(caminho)
+            if chave:
+                dados = self.armazenamento.abrir(self.personagem_id, chave)
+                return dados if dados is not None else {}
+
             with open(caminho, 'r', encoding='utf-8') as f:
                 dados = json.load(f)
 
@@ -42,9 +150,23 @@ class BuildMyCharUI:
             print(f"Erro ao abrir JSON: {e}")
             return {}
     
-    # Salva os dados em um arquivo JSON, formatando com indentação e sem caracteres ASCII.
+    # Salva os dados em um arquivo JSON (ou como artefato do personagem no armazenamento), formatando com indentação e sem caracteres ASCII.
     def salvar_json(self, caminho, dados):
         try:
+            chave = self.chave_artefato(caminho)
+            if chave:
+                # Artefatos gerados pela IA guardam o hash das entradas usadas, para a regeneração incremental
+                etapa = etapa_do_artefato(chave)
+                hash_entradas = hash_etapa(etapa, self.personagem_id, self.charJsons, self.armazenamento) if etapa else None
+                self.armazenamento.salvar(self.personagem_id, chave, dados, hash_entradas)
+
+                with self.trava_regenerar:
+                    self.regenerar = {saida for saida in self.regenerar if not (chave == saida or chave.startswith(saida + "_"))}
+
+                if self.ao_progresso is not None:
+                    self.ao_progresso({"tipo": "artefato", "chave": chave, "etapa": etapa})
+                return
+
             diretorio = os.path.dirname(caminho)
             
             if diretorio and not os.path.exists(diretorio):
@@ -54,53 +176,213 @@ class BuildMyCharUI:
                 
         except Exception as e:
             print(f"Erro ao salvar JSON: {e}")
+
+    # Verifica se o arquivo JSON (ou o artefato do personagem) já existe. Artefatos desatualizados, que ainda não foram
+    # gerados de novo nesta execução, contam como inexistentes.
+    def existe_json(self, caminho):
+        chave = self.chave_artefato(caminho)
+        if chave:
+            with self.trava_regenerar:
+                desatualizado = any(chave == saida or chave.startswith(saida + "_") for saida in self.regenerar)
+            return not desatualizado and self.armazenamento.existe(self.personagem_id, chave)
+        return os.path.exists(caminho)
+
+    # Onde o arquivo JSON (ou o artefato do personagem) está guardado, para as mensagens ao usuário.
+    def local_json(self, caminho):
+        chave = self.chave_artefato(caminho)
+        if chave:
+            return self.armazenamento.descrever(self.personagem_id, chave)
+        return caminho
     
     # Formata o texto com cores e estilos ANSI, permitindo personalização de cor, negrito, itálico e sublinhado.
     def formatar_texto(self, texto, cor=None, negrito=False, italico=False, sublinhado=False):
-        estilos = []
-
-        cores = {
-            "vermelho": "91",
-            "verde": "92",
-            "amarelo": "93",
-            "azul": "94",
-            "rosa": "95",
-            "ciano": "96",
-            "branco": "97",
-            "cinza": "90",
-            "preto": "30",
-        }
+        return formatar_ansi(texto, cor=cor, negrito=negrito, italico=italico, sublinhado=sublinhado)
 
-        if cor and cor.lower() in cores:
-            estilos.append(cores[cor.lower()])
-        else:
-            estilos.append("30")  # fallback para cinza escuro, que funciona melhor
+    # Retorna o modelo de resposta para os campos, reaproveitando a classe já criada para a mesma especificação.
+    def gerar_modelo(self, campos):
+        return self.registro_modelos.obter(campos)
+
+    # Cliente da IA. O padrão, `instructor.patch(Groq(...))` (ou AsyncGroq), é criado na primeira chamada: o groq e
+    # o instructor só são importados quando alguma etapa precisa mesmo da IA. O create da Groq passa antes por
+    # medir_uso_stream, para as respostas em streaming também informarem o uso de tokens.
+    def cliente_ia(self):
+        with self.trava_cliente:
+            if self.client is None:
+                import instructor
+                from groq import Groq, AsyncGroq
+
+                api_key = os.environ.get("GROQ_API_KEY")
+                cliente = AsyncGroq(api_key=api_key) if self.assincrono else Groq(api_key=api_key)
+                cliente.chat.completions.create = medir_uso_stream(cliente.chat.completions.create)
+                self.client = instructor.patch(cliente)
+
+        return self.client
+
+    # Faz uma requisição ao cliente. Com `ao_parcial`, pede a resposta em streaming (modelo Partial do instructor),
+    # chama `ao_parcial` com cada versão parcial e valida o objeto final contra o schema completo.
+    def chamar_cliente(self, model, messages, json_schema, temperature, top_p, *, max_tokens:int=None, ao_parcial=None):
+        # Sem limite na rota, vale o padrão do modelo
+        limite = {"max_tokens": max_tokens} if max_tokens else {}
+
+        if ao_parcial is None:
+            return self.cliente_ia().chat.completions.create(
+                model=model,
+                messages=messages,
+                response_model=json_schema,
+                temperature=temperature,
+                top_p=top_p,
+                **limite
+            )
 
-        if negrito:
-            estilos.append("1")
-        if italico:
-            estilos.append("3")
-        if sublinhado:
-            estilos.append("4")
+        # O uso de tokens chega no último pedaço, lido por medir_uso_stream dentro desta thread
+        registro = {}
+        USO_STREAM.set(registro)
+        parciais = self.cliente_ia().chat.completions.create(
+            model=model,
+            messages=messages,
+            response_model=self.registro_modelos.parcial(json_schema),
+            stream=True,
+            temperature=temperature,
+            top_p=top_p,
+            **limite
+        )
 
-        prefixo = f"\033[{';'.join(estilos)}m"
-        reset = "\033[0m"
+        ultimo = None
+        for parcial in parciais:
+            ultimo = parcial
+            ao_parcial(parcial.model_dump())
 
-        return f"{prefixo}{texto}{reset}"
+        return self.resposta_stream(json_schema, ultimo, registro)
 
-    def gerar_modelo(self, campos):
-        return create_model("Modelo", **campos)
+    # Valida o último objeto parcial contra o schema completo e anexa o uso de tokens do stream, como o instructor faz
+    # nas respostas sem streaming, para a telemetria e o limitador contarem os tokens da chamada.
+    def resposta_stream(self, json_schema, ultimo, registro):
+        resposta = json_schema.model_validate(ultimo.model_dump() if ultimo is not None else {})
+        uso = registro.get("usage") or getattr(getattr(ultimo, "_raw_response", None), "usage", None)
+        if uso is not None:
+            object.__setattr__(resposta, "_raw_response", SimpleNamespace(usage=uso))
+        return resposta
+
+    # Versão assíncrona de chamar_cliente, para o cliente `instructor.patch(AsyncGroq(...))`.
+    async def chamar_cliente_async(self, model, messages, json_schema, temperature, top_p, *, max_tokens:int=None, ao_parcial=None):
+        limite = {"max_tokens": max_tokens} if max_tokens else {}
+
+        if ao_parcial is None:
+            return await self.cliente_ia().chat.completions.create(
+                model=model,
+                messages=messages,
+                response_model=json_schema,
+                temperature=temperature,
+                top_p=top_p,
+                **limite
+            )
+
+        registro = {}
+        USO_STREAM.set(registro)
+        parciais = await self.cliente_ia().chat.completions.create(
+            model=model,
+            messages=messages,
+            response_model=self.registro_modelos.parcial(json_schema),
+            stream=True,
+            temperature=temperature,
+            top_p=top_p,
+            **limite
+        )
+
+        ultimo = None
+        async for parcial in parciais:
+            ultimo = parcial
+            ao_parcial(parcial.model_dump())
+
+        return self.resposta_stream(json_schema, ultimo, registro)
+
+    # Faz uma requisição à IA (uma tentativa de exec_ia). No modo em lote, o semáforo limita as requisições em
+    # andamento somando todos os personagens; a cópia do hedging não ocupa vaga no semáforo, mas passa pelo limitador
+    # de taxa. Retorna (resposta, origem), com a origem do hedging.
+    def requisitar(self, etapa, model, messages, json_schema, temperature, top_p, max_tokens, tokens_estimados, ao_parcial):
+        with self.semaforo_ia or nullcontext():
+            if ao_parcial is not None:
+                return self.chamar_cliente(model, messages, json_schema, temperature, top_p, max_tokens=max_tokens, ao_parcial=ao_parcial), "direto"
+
+            return self.hedge.executar(
+                etapa or "sem_etapa",
+                lambda: self.chamar_cliente(model, messages, json_schema, temperature, top_p, max_tokens=max_tokens),
+                preparar=lambda: self.limitador.aguardar(tokens_estimados),
+            )
+
+    async def requisitar_async(self, etapa, model, messages, json_schema, temperature, top_p, max_tokens, tokens_estimados, ao_parcial):
+        async with self.semaforo_ia or nullcontext():
+            if ao_parcial is not None:
+                return await self.chamar_cliente_async(model, messages, json_schema, temperature, top_p, max_tokens=max_tokens, ao_parcial=ao_parcial), "direto"
 
-    def exec_ia(self,
+            return await self.hedge.executar_async(
+                etapa or "sem_etapa",
+                lambda: self.chamar_cliente_async(model, messages, json_schema, temperature, top_p, max_tokens=max_tokens),
+                preparar=lambda: self.limitador.aguardar_async(tokens_estimados),
+            )
+
+    # Executa um passo de passos_exec_ia: a espera do limitador de taxa, a requisição ou a pausa entre tentativas.
+    def executar_passo_ia(self, passo):
+        tipo, valor = passo
+        if tipo == "limitador":
+            return self.limitador.aguardar(valor)
+        if tipo == "pausa":
+            return time.sleep(valor)
+        return self.requisitar(**valor)
+
+    async def executar_passo_ia_async(self, passo):
+        tipo, valor = passo
+        if tipo == "limitador":
+            return await self.limitador.aguardar_async(valor)
+        if tipo == "pausa":
+            return await asyncio.sleep(valor)
+        return await self.requisitar_async(**valor)
+
+    # Chamada à IA com cache, limitador de taxa, novas tentativas e escalonamento de modelo; os argumentos são os de
+    # passos_exec_ia. Retorna o dicionário da resposta, ou None sem resposta válida.
+    def exec_ia(self, *args, **kwargs):
+        return conduzir(self.passos_exec_ia(*args, **kwargs), self.executar_passo_ia)
+
+    # Versão assíncrona de exec_ia: as esperas e as requisições não ocupam a thread do loop de eventos.
+    async def exec_ia_async(self, *args, **kwargs):
+        return await conduzir_async(self.passos_exec_ia(*args, **kwargs), self.executar_passo_ia_async)
+
+    # Executa um pedido feito pelos passos de uma etapa (EtapaIA): uma chamada à IA ou um grupo de passos em paralelo,
+    # em threads.
+    def executar_pedido(self, pedido):
+        if isinstance(pedido, Paralelo):
+            with ThreadPoolExecutor(max_workers=pedido.max_workers) as executor:
+                return list(executor.map(lambda passos: conduzir(passos, self.executar_pedido), pedido.passos))
+        return self.exec_ia(*pedido.args, **pedido.kwargs)
+
+    # Versão assíncrona de executar_pedido: os passos em paralelo viram tarefas, limitadas por um asyncio.Semaphore.
+    async def executar_pedido_async(self, pedido):
+        if isinstance(pedido, Paralelo):
+            vagas = asyncio.Semaphore(pedido.max_workers)
+
+            async def executar(passos):
+                async with vagas:
+                    return await conduzir_async(passos, self.executar_pedido_async)
+
+            return list(await asyncio.gather(*(executar(passos) for passos in pedido.passos)))
+        return await self.exec_ia_async(*pedido.args, **pedido.kwargs)
+
+    # Passos de uma chamada à IA, como gerador: produz ("limitador", tokens), ("requisicao", argumentos de requisitar)
+    # e ("pausa", segundos), que exec_ia e exec_ia_async executam, cada uma do seu jeito; o erro de uma requisição
+    # volta para dentro do gerador.
+    def passos_exec_ia(self,
         prompt_system:str="",
         prompt_user:str="",
         json_schema=None,
         *,
-        model:str="llama3-70b-8192",
-        temperature:float=1.0,
-        top_p:float=1.0,
+        model:str=None,
+        temperature:float=None,
+        top_p:float=None,
         retries:int=5,
-        delay:int=1
+        delay:int=1,
+        etapa:str="",
+        usar_cache:bool=True,
+        ao_parcial=None
     ):
         messages = []
         
@@ -115,37 +397,216 @@ class BuildMyCharUI:
             raise ValueError("prompt_user é obrigatório.")
 
         if json_schema is None:
-            json_schema = {
+            json_schema = self.gerar_modelo({
                 "resultado": (str, Field(..., description="Resultado da requisição"))
-            }
+            })
+
+        # Modelo, limite de tokens e parâmetros de amostragem não informados vêm da rota da etapa em CONFIG["ia"]["rotas"]
+        rota = rota_etapa(etapa)
+        model = model or rota["modelo"]
+        temperature = temperature if temperature is not None else rota["temperature"]
+        top_p = top_p if top_p is not None else rota["top_p"]
+        max_tokens = rota["max_tokens"]
+        escalar_para = rota["escalar_para"]
         
+        inicio = time.time()
+
+        # Consulta o cache. Etapas em CONFIG["cache"]["etapas_sem_cache"] nunca usam o cache; com usar_cache=False a
+        # chamada pede uma resposta nova, que substitui a salva (usado nas novas tentativas dos laços de validação).
+        chave_cache = None
+        situacao_cache = "ignorado"
+        if self.cache is not None:
+            if etapa not in CONFIG["cache"]["etapas_sem_cache"]:
+                chave_cache = self.cache.gerar_chave(model, messages, json_schema, temperature, top_p, max_tokens)
+
+            if chave_cache is not None and usar_cache:
+                em_cache = self.cache.obter(chave_cache)
+                if em_cache is not None:
+                    self.telemetria.registrar_chamada(etapa=etapa, modelo=model, inicio=inicio, fim=time.time(), cache="acerto")
+                    return em_cache
+                situacao_cache = "falta"
+            else:
+                self.cache.registrar_ignorada()
+
+        # Reserva no limitador compartilhado a requisição e os tokens estimados (prompt e resposta)
+        tokens_estimados = estimar_tokens(messages) + min(CONFIG["limitador"]["tokens_resposta_estimados"], max_tokens or CONFIG["limitador"]["tokens_resposta_estimados"])
+        motivos = []
+        falhas_validacao = 0
+
         for retry in range(1, retries + 1):
-            try:
-                resposta = self.client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    response_model=json_schema,
-                    temperature=temperature,
-                    top_p=top_p
-                )
+            yield "limitador", tokens_estimados
 
-                return resposta.model_dump()
+            try:
+                resposta, origem = yield "requisicao", {
+                    "etapa": etapa, "model": model, "messages": messages, "json_schema": json_schema,
+                    "temperature": temperature, "top_p": top_p, "max_tokens": max_tokens,
+                    "tokens_estimados": tokens_estimados, "ao_parcial": ao_parcial,
+                }
+                if origem != "direto":
+                    self.telemetria.registrar_evento(etapa, "hedges")
+                if origem == "copia":
+                    self.telemetria.registrar_evento(etapa, "hedges_vencidos_pela_copia")
+
+                resultado = resposta.model_dump()
+                if chave_cache is not None:
+                    self.cache.salvar(chave_cache, resultado)
+
+                self.contabilizar_resposta(resposta, etapa, model, inicio, tokens_estimados, motivos, situacao_cache)
+                return resultado
             
-            except ValidationError as e:
-                print(f"❌ Erro de validação na tentativa {retry}: {e}")
-                
             except Exception as e:
-                print(f"⚠️ Erro inesperado na tentativa {retry}: {e}")
+                tipo_erro = classificar_erro(e)
+
+                # Resposta que não validou por vir estragada ou cortada: conserta localmente e pede só o que faltou,
+                # em vez de gerar tudo de novo
+                if tipo_erro == "repetir" and CONFIG["reparo_json"]["ativo"] and ao_parcial is None:
+                    aproveitado = yield from self.passos_aproveitar_resposta(
+                        e, etapa=etapa, model=model, messages=messages, json_schema=json_schema,
+                        temperature=temperature, top_p=top_p, max_tokens=max_tokens
+                    )
+                    if aproveitado is not None:
+                        resultado, complemento, tokens_complemento = aproveitado
+                        if chave_cache is not None:
+                            self.cache.salvar(chave_cache, resultado)
+
+                        self.contabilizar_resposta(complemento, etapa, model, inicio, tokens_complemento, motivos + (["complemento"] if complemento is not None else []), situacao_cache)
+                        return resultado
+
+                if tipo_erro == "fatal":
+                    print(f"❌ Erro sem nova tentativa: {e}")
+                    self.telemetria.registrar_chamada(etapa=etapa, modelo=model, inicio=inicio, fim=time.time(), motivos=motivos, cache=situacao_cache, sucesso=False)
+                    return None
+
+                if tipo_erro == "repetir":
+                    print(f"❌ Erro de validação na tentativa {retry}: {e}")
+                    espera = delay
+                    motivos.append("validacao")
+
+                    # O modelo pequeno errou de novo: as próximas tentativas vão para o modelo maior. A chave do cache
+                    # continua a da rota, para a próxima execução reaproveitar a resposta válida.
+                    falhas_validacao += 1
+                    if escalar_para and model != escalar_para and falhas_validacao >= CONFIG["ia"]["escalonamento"]["falhas_validacao"]:
+                        print(f"↗️ {falhas_validacao} respostas inválidas de {model}; tentando com {escalar_para}.")
+                        self.telemetria.registrar_evento(etapa, "escalonamentos")
+                        model = escalar_para
+                        espera = 0
+                else:
+                    print(f"⚠️ Erro inesperado na tentativa {retry}: {e}")
+                    limite_atingido = eh_limite_taxa(e)
+                    indicado = self.limitador.registrar_cabecalhos(cabecalhos_erro(e), limite_atingido=limite_atingido)
+                    espera = tempo_espera(retry, delay, CONFIG["limitador"]["espera_maxima"], indicado)
+                    motivos.append("limite_taxa" if limite_atingido else "erro_api")
 
-            time.sleep(delay)
+            if retry < retries:
+                yield "pausa", espera
 
         print("❌ Não foi possível obter uma resposta válida após várias tentativas.")
+        self.telemetria.registrar_chamada(etapa=etapa, modelo=model, inicio=inicio, fim=time.time(), motivos=motivos, cache=situacao_cache, sucesso=False)
         return None
 
+    # Registra na telemetria a chamada que terminou com resposta, com os tokens reais quando a API informa, e devolve
+    # ao limitador o que foi reservado a mais.
+    def contabilizar_resposta(self, resposta, etapa, model, inicio, tokens_estimados, motivos, situacao_cache):
+        uso = getattr(getattr(resposta, "_raw_response", None), "usage", None)
+        tokens_prompt = getattr(uso, "prompt_tokens", 0) or 0
+        tokens_resposta = getattr(uso, "completion_tokens", 0) or 0
+        if uso is not None:
+            self.limitador.devolver_tokens(tokens_estimados - tokens_prompt - tokens_resposta)
+
+        self.telemetria.registrar_chamada(
+            etapa=etapa, modelo=model, inicio=inicio, fim=time.time(),
+            tokens_prompt=tokens_prompt, tokens_resposta=tokens_resposta,
+            motivos=motivos, cache=situacao_cache
+        )
+
+    # Passos para aproveitar uma resposta que falhou na validação (reparo_json.py). O JSON estragado (vírgulas
+    # sobrando, strings e listas sem fechar) é consertado localmente; se a resposta veio cortada, uma requisição pede
+    # só o que faltou (o resto do texto, os itens seguintes da lista e os campos que não chegaram), com a resposta
+    # cortada no histórico. Retorna (resultado, resposta do complemento ou None, tokens reservados para ele) ou None
+    # quando não há o que aproveitar, e a chamada segue com as novas tentativas de sempre.
+    def passos_aproveitar_resposta(self, erro, *, etapa, model, messages, json_schema, temperature, top_p, max_tokens):
+        bruto = texto_bruto(erro)
+        if not bruto:
+            return None
+
+        try:
+            reparo = reparar_json(bruto)
+        except ValueError:
+            self.telemetria.registrar_evento(etapa, "json_sem_conserto")
+            return None
+
+        reparo = desembrulhar(reparo, json_schema)
+        if not reparo["completo"]:
+            self.telemetria.registrar_evento(etapa, "respostas_cortadas")
+            # Um valor cortado fora dos campos do modelo não tem como ser completado nem descartado com segurança
+            if reparo["cortado"] is not None and reparo["cortado"] not in json_schema.model_fields:
+                self.telemetria.registrar_evento(etapa, "json_sem_conserto")
+                return None
+
+        # Sem nenhum campo aproveitado, pedir o que falta é o mesmo que pedir tudo de novo
+        if not isinstance(reparo["dados"], dict) or not reparo["dados"]:
+            self.telemetria.registrar_evento(etapa, "json_sem_conserto")
+            return None
+
+        pendentes = pendencias(json_schema, reparo)
+        complemento = None
+        tokens_estimados = 0
+        dados = reparo["dados"]
+
+        if pendentes:
+            if not CONFIG["reparo_json"]["complementar"]:
+                return None
+
+            campos = {campo: (info.annotation, info) for campo, info in json_schema.model_fields.items() if campo in pendentes}
+            pedidos = []
+            for campo, situacao in pendentes.items():
+                if situacao == "faltando":
+                    pedidos.append(PROMPT["PROMPT_COMPLEMENTO_FALTANDO"].format(campo=campo))
+                elif isinstance(dados[campo], str):
+                    pedidos.append(PROMPT["PROMPT_COMPLEMENTO_TEXTO"].format(campo=campo, final=dados[campo][-80:]))
+                else:
+                    pedidos.append(PROMPT["PROMPT_COMPLEMENTO_LISTA"].format(campo=campo, recebidos=len(dados[campo])))
+
+            mensagens = messages + [
+                {"role": "assistant", "content": bruto},
+                {"role": "user", "content": PROMPT["PROMPT_COMPLEMENTO_USER"].format(pedidos="\n".join(pedidos))},
+            ]
+            tokens_estimados = estimar_tokens(mensagens) + min(CONFIG["limitador"]["tokens_resposta_estimados"], max_tokens or CONFIG["limitador"]["tokens_resposta_estimados"])
+
+            yield "limitador", tokens_estimados
+            try:
+                complemento, _ = yield "requisicao", {
+                    "etapa": f"{etapa}_complemento", "model": model, "messages": mensagens,
+                    "json_schema": self.gerar_modelo(campos), "temperature": temperature, "top_p": top_p,
+                    "max_tokens": max_tokens, "tokens_estimados": tokens_estimados, "ao_parcial": None,
+                }
+            except Exception as e:
+                print(f"⚠️ O complemento da resposta cortada falhou: {e}")
+                self.telemetria.registrar_evento(etapa, "complementos_falhos")
+                return None
+
+            dados = juntar(dados, complemento.model_dump(), pendentes)
+
+        try:
+            resultado = json_schema.model_validate(dados).model_dump()
+        except Exception:
+            self.telemetria.registrar_evento(etapa, "complementos_falhos" if complemento is not None else "json_sem_conserto")
+            return None
+
+        self.telemetria.registrar_evento(etapa, "json_complementado" if complemento is not None else "json_reparado_local")
+        if not reparo["completo"]:
+            # Itens completos das listas cortadas que não precisaram ser gerados de novo
+            self.telemetria.registrar_evento(etapa, "itens_aproveitados", sum(len(valor) for valor in reparo["dados"].values() if isinstance(valor, list)))
+        self.telemetria.registrar_evento(etapa, "reenvios_evitados")
+        print(f"🩹 Resposta {'cortada completada' if complemento is not None else 'consertada'} sem reenviar o pedido inteiro.")
+        return resultado, complemento, tokens_estimados
+
     # Imprime a descrição do personagem
     def print_char(self, tipo, conteudo):
         if tipo == "geral":
             titulo = f"Descrição Geral do Personagem: ({len(conteudo)} caracteres)"
+        elif tipo == "resumo":
+            titulo = f"Resumo do Personagem: ({len(conteudo)} caracteres)"
         elif tipo == "descricao":
             titulo = f"Descrição do Personagem: ({len(conteudo)} caracteres)"
         elif tipo == "slogan":
@@ -205,9 +666,52 @@ class BuildMyCharUI:
     def perguntar(self, texto):
         pergunta_formatada = self.formatar_texto(texto, cor="rosa", negrito=True)
         dica_formatada = self.formatar_texto(" (aperte Enter para pular): ", italico=True)
-        resposta = input(pergunta_formatada + dica_formatada).strip()
+        with TRAVA_TERMINAL:
+            resposta = input(pergunta_formatada + dica_formatada).strip()
         return resposta
 
+    # Decide se um laço de tentativas deve continuar depois de esgotar uma rodada.
+    # No modo interativo pergunta ao usuário, dizendo de qual etapa é a pergunta; no modo em lote segue
+    # CONFIG["lote"]["rodadas_extras"].
+    def tentar_novamente(self, max_tentativas, rodada, etapa:str=""):
+        prefixo = f"[{etapa}] " if etapa else ""
+        if self.interativo:
+            with TRAVA_TERMINAL:
+                continuar = input(f"{prefixo}Deseja tentar mais {max_tentativas} vezes? (s/n): ").strip().lower() == 's'
+        else:
+            continuar = rodada <= CONFIG["lote"]["rodadas_extras"]
+
+        if not continuar:
+            print(f"{prefixo}Encerrando...")
+
+        return continuar
+
+    # Grava as respostas recebidas prontas (modo em lote e serviço) como as informações do personagem. As respostas
+    # ficam guardadas também como chegaram ("recebidas"): se o mesmo id chega de novo com outras respostas, as
+    # informações são substituídas, o hash das entradas muda e as etapas que dependem delas são geradas de novo. As
+    # respostas que não mudaram continuam como estavam guardadas (por exemplo, o nome gerado ou corrigido).
+    # Retorna True se as informações foram gravadas.
+    def receber_respostas(self, perguntas=None):
+        perguntas = perguntas or self.abrir_json(self.charJsons["perguntas"])
+        recebidas = {chave: str(valor).strip() for chave, valor in self.respostas_iniciais.items() if chave in perguntas and str(valor).strip()}
+
+        guardadas = self.abrir_json(self.charJsons["personagem_info"]) if self.existe_json(self.charJsons["personagem_info"]) else {}
+        informacoes = guardadas.get("informacoes") if isinstance(guardadas.get("informacoes"), dict) else None
+        anteriores = guardadas.get("recebidas", informacoes)
+        if informacoes is not None and anteriores == recebidas:
+            return False
+
+        novas = dict(recebidas)
+        if informacoes is not None and isinstance(anteriores, dict):
+            for chave, valor in informacoes.items():
+                if recebidas.get(chave, "") == anteriores.get(chave, ""):
+                    novas[chave] = valor
+
+        if informacoes is not None:
+            print(self.formatar_texto("Respostas diferentes das guardadas; as informações do personagem foram substituídas.", cor="amarelo"))
+        self.salvar_json(self.charJsons["personagem_info"], {"informacoes": novas, "recebidas": recebidas})
+        return True
+
     # Coleta informações do usuário sobre o personagem, perguntando uma série de questões definidas em um arquivo JSON.
     def coletar_informacoes(self):
         perguntas = self.abrir_json(self.charJsons["perguntas"])
@@ -215,14 +719,21 @@ class BuildMyCharUI:
             print(self.formatar_texto("Erro: Não foi possível carregar as perguntas do arquivo JSON.", cor="vermelho", negrito=True))
             return
         
+        # Respostas recebidas prontas (modo em lote e serviço) dispensam as perguntas
+        if self.respostas_iniciais is not None:
+            self.receber_respostas(perguntas)
+            self.respostas = dict(self.abrir_json(self.charJsons["personagem_info"]).get("informacoes") or {})
+            print(self.formatar_texto("Informações salvas com sucesso em: "+ self.local_json(self.charJsons["personagem_info"]), cor="verde"))
+            return
+
         total = len(perguntas)
         print(self.formatar_texto("Vamos coletar informações do seu personagem. Pode pular perguntas se quiser.", cor="azul", negrito=True))
         
-        if os.path.exists(self.charJsons["personagem_info"]):
+        if self.existe_json(self.charJsons["personagem_info"]):
             abrir_informacoes = self.abrir_json(self.charJsons["personagem_info"])
             if abrir_informacoes and isinstance(abrir_informacoes.get("informacoes"), dict):
                 self.respostas = abrir_informacoes.get("informacoes")
-                print(self.formatar_texto("Arquivo existente encontrado! Informações carregadas de: \"" + self.charJsons["personagem_info"] + "\"", cor="verde")) 
+                print(self.formatar_texto("Arquivo existente encontrado! Informações carregadas de: \"" + self.local_json(self.charJsons["personagem_info"]) + "\"", cor="verde")) 
                 self.print_char("info",self.respostas)
                 return
 
@@ -237,11 +748,14 @@ class BuildMyCharUI:
                 "informacoes": self.respostas
             }
             self.salvar_json(self.charJsons["personagem_info"], temp_respostas)
-            print(self.formatar_texto("Informações salvas com sucesso em: "+ self.charJsons["personagem_info"], cor="verde"))
+            print(self.formatar_texto("Informações salvas com sucesso em: "+ self.local_json(self.charJsons["personagem_info"]), cor="verde"))
         
             self.print_char("info",self.respostas)
             
     # Gera o nome do personagem, corrigindo capitalização e formatando conforme regras de nomes próprios em português.
+    # O nome digitado ou gerado passa pelo normalizador local (nomes.py); só os nomes que ele não resolve vão para o
+    # corretor da IA.
+    @EtapaIA
     def gerar_nome(self):
         nome_input = self.respostas.get("Nome", "").strip()
 
@@ -252,7 +766,7 @@ class BuildMyCharUI:
             else:
                 genero_input = genero_input.capitalize()
 
-            result = self.exec_ia(
+            result = yield PedidoIA(
                 PROMPT["PROMPT_GERADOR_NOME_SYSTEM"].format(genero=genero_input),
                 PROMPT["PROMPT_GERADOR_NOME_USER"].format(genero=genero_input),
                 self.gerar_modelo({
@@ -262,461 +776,713 @@ class BuildMyCharUI:
                         "nomecompleto": (str, Field(..., description="Junção do nome com o sobrenome")),
                     })]
                 }),
-                temperature=1.3,
-                top_p=0.95,
-                #model="llama-3.3-70b-versatile"
+                etapa="gerar_nome",
             )
             
             if result and isinstance(result.get("nomes"), list) and len(result["nomes"]) > 0:
                 print(self.formatar_texto(f"Gerado {len(result['nomes'])} itens."))
-                nome_input = random.choice(result["nomes"])
+                escolhido = random.choice(result["nomes"])
+                nome_input = escolhido.get("nomecompleto") or f"{escolhido.get('nome', '')} {escolhido.get('sobrenome', '')}".strip()
                 
             else:            
                 print(self.formatar_texto("Erro: Nome gerado está vazio. Por favor, forneça um nome manualmente.", cor="vermelho", negrito=True))
-                nome_input = input(self.formatar_texto("Digite o nome do personagem (até 20 caracteres): ", cor="rosa", negrito=True)).strip()
+                if not self.interativo:
+                    return
+                with TRAVA_TERMINAL:
+                    nome_input = input(self.formatar_texto("Digite o nome do personagem (até 20 caracteres): ", cor="rosa", negrito=True)).strip()
+
+        normalizado = normalizar_nome(nome_input, CONFIG["nome"]["limite_caracteres"])
+        if normalizado["resolvido"]:
+            nome_corrigido = normalizado["nome"]
+            self.telemetria.registrar_evento("corrigir_nome", "normalizado_local")
+        elif CONFIG["nome"]["corretor_ia"]:
+            print(self.formatar_texto(f"Nome \"{nome_input}\" precisa do corretor da IA: {normalizado['motivo']}.", cor="amarelo"))
+            nome_corrigido = yield from self.passos_corrigir_nome_ia(nome_input)
+        else:
+            nome_corrigido = nome_input
+
+        if nome_corrigido:
+            print(self.formatar_texto("Nome corrigido: " + nome_corrigido + "."))
+        
+            # Se nome foi realmente corrigido e está diferente
+            if nome_corrigido != self.respostas.get("Nome", ""):
+                self.respostas["Nome"] = nome_corrigido
                 
-            result = self.exec_ia(
-                PROMPT["PROMPT_CORRETOR_NOME_SYSTEM"],
-                PROMPT["PROMPT_CORRETOR_NOME_USER"].format(nome=nome_input),
-                self.gerar_modelo({
-                    "nome": (str, Field(..., description="Nome do personagem formatado e corrigido"))
-                }),
-                temperature=0.8,
-                top_p=0.8,
-            )
+                # Mantém as respostas como chegaram, usadas por receber_respostas
+                temp_respostas = dict(self.abrir_json(self.charJsons["personagem_info"]), informacoes=self.respostas)
+                
+                self.salvar_json(self.charJsons["personagem_info"], temp_respostas)
+                print(self.formatar_texto("Nome ajustado e atualizado com sucesso em: " + self.local_json(self.charJsons["personagem_info"]), cor="ciano"))
+                self.print_char("info", self.respostas)
 
-            if result and isinstance(result.get("nome"), str):
-                nome_corrigido = result["nome"]
-                print(self.formatar_texto("Nome corrigido: " + nome_corrigido + "."))
-            
-                # Se nome foi realmente corrigido e está diferente
-                if nome_corrigido and nome_corrigido != self.respostas.get("Nome", ""):
-                    self.respostas["Nome"] = nome_corrigido
-                    
-                    temp_respostas = {
-                        "informacoes": self.respostas
-                    }
-                    
-                    self.salvar_json(self.charJsons["personagem_info"], temp_respostas)
-                    print(self.formatar_texto("Nome ajustado e atualizado com sucesso em: " + self.charJsons["personagem_info"], cor="ciano"))
-                    self.print_personagem_info(self.respostas)
+            return nome_corrigido
+        else:
+            print(self.formatar_texto("Erro: nome formatado vazio ou inválido. Tente novamente ou revise as informações.", cor="vermelho", negrito=True))
+            return
 
-                return nome_corrigido
-            else:
-                print(self.formatar_texto("Erro: nome formatado vazio ou inválido. Tente novamente ou revise as informações.", cor="vermelho", negrito=True))
-                return
+    # Corrige o nome com a IA, para os nomes que o normalizador local não resolve. Retorna None se a resposta vier inválida.
+    @EtapaIA
+    def corrigir_nome_ia(self, nome):
+        result = yield PedidoIA(
+            PROMPT["PROMPT_CORRETOR_NOME_SYSTEM"],
+            PROMPT["PROMPT_CORRETOR_NOME_USER"].format(nome=nome),
+            self.gerar_modelo({
+                "nome": (str, Field(..., description="Nome do personagem formatado e corrigido"))
+            }),
+            etapa="corrigir_nome",
+        )
+
+        if result and isinstance(result.get("nome"), str) and result["nome"].strip():
+            return result["nome"].strip()
+        return None
 
 
     # Cria uma descrição geral do personagem com base nas informações coletadas, usando IA para gerar um texto criativo.
+    @EtapaIA
     def criar_descricao_geral(self):
         print(self.formatar_texto("\nVamos criar uma descrição geral do seu personagem, com base nas informações fornecidas.", cor="azul", negrito=True))
 
         # Já existe a descrição?
-        if os.path.exists(self.charJsons["personagem_geral"]):
+        if self.existe_json(self.charJsons["personagem_geral"]):
             abrir_descricao_geral = self.abrir_json(self.charJsons["personagem_geral"])
             if abrir_descricao_geral and isinstance(abrir_descricao_geral.get("descricao"), str):
                 self.personagem["Descrição Geral"] = abrir_descricao_geral.get("descricao")
-                print(self.formatar_texto("Arquivo existente encontrado! Descrição Geral carregada de: \"" + self.charJsons["personagem_geral"] + "\"", cor="verde"))
+                print(self.formatar_texto("Arquivo existente encontrado! Descrição Geral carregada de: \"" + self.local_json(self.charJsons["personagem_geral"]) + "\"", cor="verde"))
                 self.print_char("geral", self.personagem["Descrição Geral"])
                 return
 
         # Gera resumo com base nas respostas
         resumo = "\n".join(f"{k.capitalize()}: {v}" for k, v in self.respostas.items())
 
-        result = self.exec_ia(
+        # No modo interativo, a descrição aparece no terminal enquanto é gerada
+        exibido = []
+        def exibir_parcial(parcial):
+            texto = parcial.get("descricao") or ""
+            if not exibido:
+                print(self.formatar_texto("Descrição Geral do Personagem:", cor="amarelo", negrito=True))
+                exibido.append("")
+            if not texto.startswith(exibido[-1]):
+                # Nova tentativa dentro de exec_ia: o texto recomeça do zero
+                print()
+                exibido.append("")
+            print(self.formatar_texto(texto[len(exibido[-1]):], cor="amarelo", italico=True), end="", flush=True)
+            exibido.append(texto)
+
+        result = yield PedidoIA(
             PROMPT["PROMPT_DESCRICAO_GERAL_SYSTEM"],
             PROMPT["PROMPT_DESCRICAO_GERAL_USER"].format(resumo=resumo),
             self.gerar_modelo({
                 "descricao": (str, Field(..., description="Descrição completa do personagem"))
             }),
-            temperature=1,
-            top_p=1,
-            #model="llama-3.3-70b-versatile"
+            etapa="criar_descricao_geral",
+            ao_parcial=exibir_parcial if self.interativo and CONFIG["streaming"]["ativo"] else None,
         )
-        
+
+        if exibido:
+            print()
+
         if result and isinstance(result.get("descricao"), str):
             # Salvar e mostrar
             self.personagem["Descrição Geral"] = result.get("descricao")
             self.salvar_json(self.charJsons["personagem_geral"], result)
-            print(self.formatar_texto("Descrição Geral salva com sucesso em: "+ self.charJsons["personagem_geral"], cor="verde"))
-            self.print_char("geral", self.personagem["Descrição Geral"])
+            print(self.formatar_texto("Descrição Geral salva com sucesso em: "+ self.local_json(self.charJsons["personagem_geral"]), cor="verde"))
+            # Só mostra de novo se o texto não foi exibido por inteiro durante o streaming
+            if not exibido or exibido[-1] != self.personagem["Descrição Geral"]:
+                self.print_char("geral", self.personagem["Descrição Geral"])
         else:
             print(self.formatar_texto("Erro: descrição vazia ou inválida. Tente novamente ou revise as informações.", cor="vermelho", negrito=True))
             return
 
+    # Condensa a descrição geral num resumo estruturado, gerado uma vez por personagem. As etapas de
+    # CONFIG["resumo"]["etapas"] recebem o resumo no prompt no lugar da descrição completa.
+    @EtapaIA
+    def criar_resumo(self):
+        print(self.formatar_texto("\nVamos criar um resumo do seu personagem para as próximas etapas.", cor="azul", negrito=True))
+
+        # Já existe o resumo?
+        if self.existe_json(self.charJsons["personagem_resumo"]):
+            abrir_resumo = self.abrir_json(self.charJsons["personagem_resumo"])
+            if abrir_resumo:
+                self.resumo = self.formatar_resumo(abrir_resumo)
+                print(self.formatar_texto("Arquivo existente encontrado! Resumo carregado de: \"" + self.local_json(self.charJsons["personagem_resumo"]) + "\"", cor="verde"))
+                self.print_char("resumo", self.resumo)
+                return
+
+        result = yield PedidoIA(
+            PROMPT["PROMPT_RESUMO_SYSTEM"],
+            PROMPT["PROMPT_RESUMO_USER"].format(descricao=self.personagem.get("Descrição Geral", "")),
+            self.gerar_modelo({
+                "identidade": (str, Field(..., description="Nome, idade, gênero, ocupação e origem")),
+                "aparencia": (str, Field(..., description="Traços físicos e modo de se vestir")),
+                "personalidade": (str, Field(..., description="Traços de personalidade, virtudes e defeitos")),
+                "historia": (str, Field(..., description="Fatos principais do passado e da situação atual")),
+                "estilo_fala": (str, Field(..., description="Jeito de falar, sotaque, gírias e expressões")),
+                "relacoes": (str, Field(..., description="Pessoas importantes e como se relaciona com elas")),
+                "gostos": (str, Field(..., description="Gostos, desgostos, medos e objetivos")),
+            }),
+            etapa="criar_resumo",
+        )
+
+        if result and self.formatar_resumo(result):
+            self.resumo = self.formatar_resumo(result)
+            self.salvar_json(self.charJsons["personagem_resumo"], result)
+            print(self.formatar_texto("Resumo salvo com sucesso em: " + self.local_json(self.charJsons["personagem_resumo"]), cor="verde"))
+            self.print_char("resumo", self.resumo)
+        else:
+            # Sem resumo, as etapas seguem com a descrição geral completa
+            print(self.formatar_texto("Erro: resumo vazio ou inválido. As próximas etapas vão usar a descrição geral.", cor="vermelho", negrito=True))
+
+    # Junta os campos do resumo em linhas "Campo: valor", deixando de fora os campos vazios.
+    def formatar_resumo(self, resumo):
+        rotulos = {
+            "identidade": "Identidade",
+            "aparencia": "Aparência",
+            "personalidade": "Personalidade",
+            "historia": "História",
+            "estilo_fala": "Estilo de fala",
+            "relacoes": "Relações",
+            "gostos": "Gostos",
+        }
+        return "\n".join(f"{rotulo}: {resumo[chave].strip()}" for chave, rotulo in rotulos.items() if isinstance(resumo.get(chave), str) and resumo[chave].strip())
+
+    # Texto do personagem usado no prompt da etapa: o resumo, quando a etapa está em CONFIG["resumo"]["etapas"] e o
+    # resumo foi gerado, ou a descrição geral completa.
+    def descricao_para(self, etapa):
+        if self.resumo and etapa in CONFIG["resumo"]["etapas"]:
+            return self.resumo
+        return self.personagem.get("Descrição Geral", "")
+
+    # Gera um texto com limite de caracteres para a etapa. No modo de candidatos (CONFIG["candidatos"]), uma única
+    # requisição pede várias opções e fica com a maior que cabe no limite; a requisição só é repetida se nenhuma couber.
+    # Retorna {chave: texto} ou None se o usuário desistir.
+    @EtapaIA
+    def gerar_texto_limitado(self, etapa, chave, rotulo, descricao, prompt_system, prompt_user, *, max_caracteres:int):
+        quantidade = CONFIG["candidatos"]["quantidade"] if CONFIG["candidatos"]["ativo"] else 1
+
+        if quantidade > 1:
+            modelo = self.gerar_modelo({
+                "candidatos": (List[str], Field(..., description=f"Opções diferentes para: {descricao}"))
+            })
+            prompt_user = prompt_user + PROMPT["PROMPT_CANDIDATOS"].format(quantidade=quantidade, max_caracteres=max_caracteres)
+        else:
+            modelo = self.gerar_modelo({
+                chave: (str, Field(..., description=descricao))
+            })
+
+        rodada = 0
+        while True:
+            rodada += 1
+            max_tentativas:int = 5
+            for tentativa in range(max_tentativas):
+                result = yield PedidoIA(
+                    prompt_system,
+                    prompt_user,
+                    modelo,
+                    etapa=etapa,
+                    usar_cache=rodada == 1 and tentativa == 0,
+                )
+
+                if result and quantidade > 1:
+                    candidatos = [texto for texto in result.get("candidatos") or [] if isinstance(texto, str) and texto.strip()]
+                elif result and isinstance(result.get(chave), str):
+                    candidatos = [result.get(chave)]
+                else:
+                    candidatos = []
+
+                cabem = [texto for texto in candidatos if len(texto) <= max_caracteres]
+                if cabem:
+                    return {chave: max(cabem, key=len)}
+
+                self.telemetria.registrar_repeticao(etapa, "limite_caracteres" if candidatos else "resposta_invalida")
+                if not candidatos:
+                    print(self.formatar_texto(f"{rotulo} veio vazio ou inválido.", cor="amarelo"))
+                elif quantidade > 1:
+                    tamanhos = ", ".join(str(len(texto)) for texto in candidatos)
+                    print(self.formatar_texto(f"Nenhuma das {len(candidatos)} opções coube no limite de {max_caracteres} caracteres (tamanhos: {tamanhos}).", cor="amarelo"))
+                else:
+                    print(self.formatar_texto(f"{rotulo} passou do limite de {max_caracteres}: \"{candidatos[0]}\" ({len(candidatos[0])} caracteres) fora do intervalo.", cor="amarelo"))
+
+            if not self.tentar_novamente(max_tentativas, rodada, etapa):
+                return None
+
     # Gera um slogan para o personagem, garantindo que esteja dentro de um intervalo específico de caracteres e coerente com a descrição geral.
+    @EtapaIA
     def gerar_slogan(self):
         print(self.formatar_texto("\nVamos criar um Slogan para seu personagem.", cor="azul", negrito=True))
 
         # Já existe um slogan?
-        if os.path.exists(self.charJsons["personagem_slogan"]):
+        if self.existe_json(self.charJsons["personagem_slogan"]):
             abrir_slogan = self.abrir_json(self.charJsons["personagem_slogan"])
 
             if abrir_slogan and isinstance(abrir_slogan.get("slogan"), str):
                 self.personagem["Slogan"] = abrir_slogan.get("slogan")
-                print(self.formatar_texto("Arquivo existente encontrado! Slogan carregado de: \"" + self.charJsons["personagem_slogan"] + "\"", cor="verde"))
+                print(self.formatar_texto("Arquivo existente encontrado! Slogan carregado de: \"" + self.local_json(self.charJsons["personagem_slogan"]) + "\"", cor="verde"))
                 self.print_char("slogan",self.personagem["Slogan"])
                 return
 
-        descricao = self.personagem.get("Descrição Geral", "")
-        
-        while True:
-            max_tentativas:int = 5
-            max_caracteres:int = 50
-            for tentativa in range(max_tentativas):
-                result = self.exec_ia(
-                    PROMPT["PROMPT_SLOGAN_SYSTEM"],
-                    PROMPT["PROMPT_SLOGAN_USER"].format(descricao=descricao,max_caracteres=max_caracteres),
-                    self.gerar_modelo({
-                        "slogan": (str, Field(..., description="Slogan do personagem"))
-                    }),
-                    temperature=0.6,
-                    top_p=0.9,
-                    #model="llama-3.3-70b-versatile"
-                )
-                
-                if result and isinstance(result.get("slogan"), str) and len(result.get("slogan")) <= max_caracteres:
-                    self.personagem["Slogan"] = result.get("slogan")
-                    self.salvar_json(self.charJsons["personagem_slogan"], result)
-                    print(self.formatar_texto("Slogan salvo com sucesso em: " + self.charJsons["personagem_slogan"], cor="verde"))
-                    self.print_char("slogan",self.personagem["Slogan"])
+        descricao = self.descricao_para("gerar_slogan")
 
-                    return
-                
-                else:
-                    print(self.formatar_texto(f"O slogan passou do limite de {max_caracteres}: \"{result.get("slogan")}\" ({len(result.get("slogan"))} caracteres) fora do intervalo.", cor="amarelo"))
+        result = yield from self.passos_gerar_texto_limitado(
+            "gerar_slogan", "slogan", "O slogan", "Slogan do personagem",
+            PROMPT["PROMPT_SLOGAN_SYSTEM"],
+            PROMPT["PROMPT_SLOGAN_USER"].format(descricao=descricao,max_caracteres=50),
+            max_caracteres=50,
+        )
 
-            continuar = input(f"Deseja tentar mais {max_tentativas} vezes? (s/n): ").strip().lower()
-            if continuar != 's':
-                print("Encerrando...")
-                break
+        if result:
+            self.personagem["Slogan"] = result.get("slogan")
+            self.salvar_json(self.charJsons["personagem_slogan"], result)
+            print(self.formatar_texto("Slogan salvo com sucesso em: " + self.local_json(self.charJsons["personagem_slogan"]), cor="verde"))
+            self.print_char("slogan",self.personagem["Slogan"])
     
+    @EtapaIA
     def criar_descricao(self):
         print(self.formatar_texto("\nVamos criar a descrição do personagem.", cor="azul", negrito=True))
 
         # Já existe uma descrição?
-        if os.path.exists(self.charJsons["personagem_descricao"]):
+        if self.existe_json(self.charJsons["personagem_descricao"]):
             abrir_descricao = self.abrir_json(self.charJsons["personagem_descricao"])
             
             if abrir_descricao and isinstance(abrir_descricao.get("descricao"), str):
                 self.personagem["Descrição"] = abrir_descricao.get("descricao")
-                print(self.formatar_texto("Arquivo existente encontrado! Descrição carregada de: \"" + self.charJsons["personagem_descricao"] + "\"", cor="verde"))
+                print(self.formatar_texto("Arquivo existente encontrado! Descrição carregada de: \"" + self.local_json(self.charJsons["personagem_descricao"]) + "\"", cor="verde"))
                 self.print_char("descricao", self.personagem["Descrição"])
                 return
 
-        descricao_geral = self.personagem.get("Descrição Geral", "")
-        
-        while True:
-            max_tentativas:int = 5
-            max_caracteres:int = 500
-            for tentativa in range(max_tentativas):
-                result = self.exec_ia(
-                    PROMPT["PROMPT_DESCRICAO_SYSTEM"],
-                    PROMPT["PROMPT_DESCRICAO_USER"].format(descricao_geral=descricao_geral,max_caracteres=max_caracteres),
-                    self.gerar_modelo({
-                        "descricao": (str, Field(..., description="Descrição do personagem"))
-                    }),
-                    temperature=0.6,
-                    top_p=0.9,
-                    #model="llama-3.3-70b-versatile"
-                )
-                
-                if result and isinstance(result.get("descricao"), str) and len(result.get("descricao")) <= max_caracteres:
-                    self.personagem["Descrição"] = result.get("descricao")
-                    self.salvar_json(self.charJsons["personagem_descricao"], result)
-                    print(self.formatar_texto("Descrição salva com sucesso em: " + self.charJsons["personagem_descricao"], cor="verde"))
-                    self.print_char("descricao", self.personagem["Descrição"])
+        descricao_geral = self.descricao_para("criar_descricao")
 
-                    return
-                
-                else:
-                    print(self.formatar_texto(f"A descrição passou do limite de {max_caracteres}: \"{result.get("descricao")}\" ({len(result.get("descricao"))} caracteres) fora do intervalo.", cor="amarelo"))
+        result = yield from self.passos_gerar_texto_limitado(
+            "criar_descricao", "descricao", "A descrição", "Descrição do personagem",
+            PROMPT["PROMPT_DESCRICAO_SYSTEM"],
+            PROMPT["PROMPT_DESCRICAO_USER"].format(descricao_geral=descricao_geral,max_caracteres=500),
+            max_caracteres=500,
+        )
 
-            continuar = input(f"Deseja tentar mais {max_tentativas} vezes? (s/n): ").strip().lower()
-            if continuar != 's':
-                print("Encerrando...")
-                break
+        if result:
+            self.personagem["Descrição"] = result.get("descricao")
+            self.salvar_json(self.charJsons["personagem_descricao"], result)
+            print(self.formatar_texto("Descrição salva com sucesso em: " + self.local_json(self.charJsons["personagem_descricao"]), cor="verde"))
+            self.print_char("descricao", self.personagem["Descrição"])
     
     # Gera uma saudação personalizada para o personagem, garantindo que esteja dentro dos limites de caracteres e coerente com a descrição geral.
+    @EtapaIA
     def gerar_saudacao(self):
         print(self.formatar_texto("\nVamos gerar a saudação do personagem.", cor="azul", negrito=True))
 
         # Já existe uma saudação?
-        if os.path.exists(self.charJsons["personagem_saudacao"]):
+        if self.existe_json(self.charJsons["personagem_saudacao"]):
             abrir_saudacao = self.abrir_json(self.charJsons["personagem_saudacao"])
             
             if abrir_saudacao and isinstance(abrir_saudacao.get("saudacao"), str):
                 self.personagem["Saudação"] = abrir_saudacao.get("saudacao")
-                print(self.formatar_texto("Arquivo existente encontrado! Saudação carregada de: \"" + self.charJsons["personagem_saudacao"] + "\"", cor="verde"))
+                print(self.formatar_texto("Arquivo existente encontrado! Saudação carregada de: \"" + self.local_json(self.charJsons["personagem_saudacao"]) + "\"", cor="verde"))
                 self.print_char("saudacao",self.personagem["Saudação"])
                 return self.personagem["Saudação"]
 
-        descricao_geral = self.personagem.get("Descrição Geral", "")
+        descricao_geral = self.descricao_para("gerar_saudacao")
 
-        while True:
-            max_tentativas:int = 5
-            max_caracteres:int = 4096
-            for tentativa in range(max_tentativas):
-                result = self.exec_ia(
-                    PROMPT["PROMPT_SAUDACAO_SYSTEM"],
-                    PROMPT["PROMPT_SAUDACAO_USER"].format(descricao_geral=descricao_geral,max_caracteres=max_caracteres),
-                    self.gerar_modelo({
-                        "saudacao": (str, Field(..., description="Saudação do personagem"))
-                    }),
-                    temperature=0.7,
-                    top_p=0.9,
-                    #model="llama-3.3-70b-versatile"
-                )
-                
-                if result and isinstance(result.get("saudacao"), str) and len(result.get("saudacao")) <= max_caracteres:
-                    self.personagem["Saudação"] = result.get("saudacao")
-                    self.salvar_json(self.charJsons["personagem_saudacao"], result)
-                    print(self.formatar_texto("Saudação salva com sucesso em: " + self.charJsons["personagem_saudacao"], cor="verde"))
-                    self.print_char("saudacao",self.personagem["Saudação"])
-                    return
-                
-                else:
-                    print(self.formatar_texto(f"A saudação passou do limite de {max_caracteres}: \"{result.get("saudacao")}\" ({len(result.get("saudacao"))} caracteres) fora do intervalo.", cor="amarelo"))
+        result = yield from self.passos_gerar_texto_limitado(
+            "gerar_saudacao", "saudacao", "A saudação", "Saudação do personagem",
+            PROMPT["PROMPT_SAUDACAO_SYSTEM"],
+            PROMPT["PROMPT_SAUDACAO_USER"].format(descricao_geral=descricao_geral,max_caracteres=4096),
+            max_caracteres=4096,
+        )
 
-            continuar = input(f"Deseja tentar mais {max_tentativas} vezes? (s/n): ").strip().lower()
-            if continuar != 's':
-                print("Encerrando...")
-                break
+        if result:
+            self.personagem["Saudação"] = result.get("saudacao")
+            self.salvar_json(self.charJsons["personagem_saudacao"], result)
+            print(self.formatar_texto("Saudação salva com sucesso em: " + self.local_json(self.charJsons["personagem_saudacao"]), cor="verde"))
+            self.print_char("saudacao",self.personagem["Saudação"])
 
     # Gera etiquetas para o personagem, classificando-o em até 5 categorias a partir de uma lista pré-definida.
+    @EtapaIA
     def gerar_etiquetas(self):
         print(self.formatar_texto("\nVamos gerar as etiquetas (máx. 5 categorias).", cor="azul", negrito=True))
 
         # Já existe um arquivo?
-        if os.path.exists(self.charJsons["personagem_etiquetas"]):
+        if self.existe_json(self.charJsons["personagem_etiquetas"]):
             abrir_etiquetas = self.abrir_json(self.charJsons["personagem_etiquetas"])
 
             if abrir_etiquetas and isinstance(abrir_etiquetas.get("etiquetas"), list):
                 self.personagem["Etiquetas"] = abrir_etiquetas.get("etiquetas")
-                print(self.formatar_texto("Arquivo existente encontrado! Etiquetas carregadas de: \"" + self.charJsons["personagem_etiquetas"] + "\"", cor="verde"))
+                print(self.formatar_texto("Arquivo existente encontrado! Etiquetas carregadas de: \"" + self.local_json(self.charJsons["personagem_etiquetas"]) + "\"", cor="verde"))
                 self.print_char("etiquetas",self.personagem["Etiquetas"])
                 return
 
-        descricao = self.personagem.get("Descrição Geral", "")
+        descricao = self.descricao_para("gerar_etiquetas")
         
+        rodada = 0
         while True:
+            rodada += 1
             max_tentativas:int = 5
             max_caracteres:int = 5
             for tentativa in range(max_tentativas):
-                result = self.exec_ia(
+                result = yield PedidoIA(
                     PROMPT["PROMPT_ETIQUETAS_SYSTEM"],
                     PROMPT["PROMPT_ETIQUETAS_USER"].format(descricao=descricao),
                     self.gerar_modelo({
                         "etiquetas": (List[str], Field(..., description="Lista de etiquetas associadas ao personagem"))
                     }),
-                    temperature=0.5,
-                    top_p=0.9,
-                    #model="llama-3.3-70b-versatile"
+                    etapa="gerar_etiquetas",
+                    usar_cache=rodada == 1 and tentativa == 0,
                 )
                 
                 if result and isinstance(result.get("etiquetas"), list) and len(result.get("etiquetas")) <= max_caracteres:
                     self.personagem["Etiquetas"] = result.get("etiquetas")
                     self.salvar_json(self.charJsons["personagem_etiquetas"], result)
-                    print(self.formatar_texto("Etiquetas salvas com sucesso em: " + self.charJsons["personagem_etiquetas"], cor="verde"))
+                    print(self.formatar_texto("Etiquetas salvas com sucesso em: " + self.local_json(self.charJsons["personagem_etiquetas"]), cor="verde"))
                     self.print_char("etiquetas",self.personagem["Etiquetas"])
 
                     return
 
                 else:
+                    self.telemetria.registrar_repeticao("gerar_etiquetas", "limite_etiquetas" if result else "resposta_invalida")
                     print(self.formatar_texto(f"O número de etiquetas selecionadas passou do limite de {max_caracteres}.", cor="amarelo"))
 
-            continuar = input(f"Deseja tentar mais {max_tentativas} vezes? (s/n): ").strip().lower()
-            if continuar != 's':
-                print("Encerrando...")
+            if not self.tentar_novamente(max_tentativas, rodada, "gerar_etiquetas"):
                 break
 
-    # Gera um prompt para definir o personagem, formatando as informações de título, descrição e conteúdo.
-    def gerar_prompt_definicao(self, dados):
-        lista_perguntas = []
-
-        for pergunta in dados["perguntas"]:
-            lista_perguntas.append({
-                "pergunta_id": pergunta['indice'],
-                "pergunta": pergunta['pergunta'],
-                "resposta" : ""
-            })
-
-        Modelo = self.gerar_modelo({
-            "perguntas": (List[self.gerar_modelo({
-                "pergunta_id": (str, Field(..., description="Id da pergunta")),
-                "pergunta": (str, Field(..., description="Pergunta a ser respondida")),
-                "resposta": (str, Field(..., description="Resposta da pergunta")),
-            })], Field(..., description="Lista de perguntas e respostas")),
-        })
-        
-
-        instrucao = dados.get("instrucao", "")
-        instrucao = f"- {instrucao}" if instrucao else ""
+    # Gera um prompt para definir o personagem a partir do template compilado do catálogo (instrução e lista de perguntas já formatadas).
+    @EtapaIA
+    def gerar_prompt_definicao(self, template):
+        Modelo = self.modelo_definicao()
 
         # Verifica se os dados contêm as chaves necessárias
-        descricao_personagem = self.personagem.get("Descrição Geral", "")
+        descricao_personagem = self.descricao_para("gerar_definicao")
         
+        rodada = 0
         while True:
+            rodada += 1
             max_tentativas:int = 5
             for tentativa in range(max_tentativas):
-                result = self.exec_ia(
+                result = yield PedidoIA(
                     PROMPT["PROMPT_INSTRUCAO_SYSTEM"],
-                    PROMPT["PROMPT_INSTRUCAO_USER"].format(descricao=descricao_personagem, instrucao=instrucao, lista=lista_perguntas),
+                    PROMPT["PROMPT_INSTRUCAO_USER"].format(descricao=descricao_personagem, instrucao=template["instrucao"], lista=template["lista"]),
                     Modelo,
-                    temperature=0.6,
-                    top_p=0.9,
-                    #model="llama-3.3-70b-versatile"
+                    etapa="gerar_definicao",
+                    usar_cache=rodada == 1 and tentativa == 0,
                 )
      
                 if result and isinstance(result.get("perguntas"), list):
                     return result
                 
                 else:
+                    self.telemetria.registrar_repeticao("gerar_definicao", "resposta_invalida")
                     print(self.formatar_texto("Erro ao obter respostas.", cor="amarelo"))
 
-            continuar = input(f"Deseja tentar mais {max_tentativas} vezes? (s/n): ").strip().lower()
-            if continuar != 's':
-                print("Encerrando...")
+            if not self.tentar_novamente(max_tentativas, rodada, "gerar_definicao"):
                 break
-            
+
+    # Modelo de resposta das definições: a lista de perguntas com as respostas.
+    def modelo_definicao(self):
+        return self.gerar_modelo({
+            "perguntas": (List[self.gerar_modelo({
+                "pergunta_id": (str, Field(..., description="Id da pergunta")),
+                "pergunta": (str, Field(..., description="Pergunta a ser respondida")),
+                "resposta": (str, Field(..., description="Resposta da pergunta")),
+            })], Field(..., description="Lista de perguntas e respostas")),
+        })
+
+    # Separa os templates pendentes em pacotes que cabem no orçamento de tokens do modelo. O prompt sem as seções
+    # (com a descrição) entra uma vez por pacote; cada template soma a sua seção e a resposta estimada das perguntas.
+    # Com CONFIG["definicao"]["agrupar"] desligado, cada template vira um pacote.
+    def agrupar_definicoes(self, pendentes):
+        if not CONFIG["definicao"]["agrupar"]:
+            return [[pendente] for pendente in pendentes]
+
+        base = estimar_tokens([
+            {"content": PROMPT["PROMPT_INSTRUCAO_SYSTEM"]},
+            {"content": PROMPT["PROMPT_INSTRUCAO_AGRUPADA_USER"].format(descricao=self.descricao_para("gerar_definicao"), secoes="")},
+        ])
+
+        def custo(pendente):
+            _, template, _ = pendente
+            return len(template["secao"]) // 4 + len(template["perguntas"]) * CONFIG["definicao"]["tokens_resposta_por_pergunta"]
+
+        return empacotar(pendentes, custo, orcamento_pacote(modelo_etapa("gerar_definicao")) - base)
+
+    # Responde as perguntas de um pacote de templates e retorna {identificador: resultado}, no mesmo formato de
+    # gerar_prompt_definicao. Um template sozinho segue o caminho de sempre. Num pacote, os templates que voltam sem
+    # todas as respostas são divididos em pacotes menores e pedidos de novo, até chegar a um template por requisição.
+    @EtapaIA
+    def responder_pacote(self, pacote):
+        if len(pacote) == 1:
+            identificador, template, _ = pacote[0]
+            return {identificador: (yield from self.passos_gerar_prompt_definicao(template))}
+
+        result = yield PedidoIA(
+            PROMPT["PROMPT_INSTRUCAO_SYSTEM"],
+            PROMPT["PROMPT_INSTRUCAO_AGRUPADA_USER"].format(
+                descricao=self.descricao_para("gerar_definicao"),
+                secoes="".join(template["secao"] for _, template, _ in pacote),
+            ),
+            self.modelo_definicao(),
+            etapa="gerar_definicao",
+            retries=CONFIG["definicao"]["tentativas_pacote"],
+        )
+        respostas = result.get("perguntas") if result and isinstance(result.get("perguntas"), list) else []
+
+        resultados = {}
+        incompletos = []
+        for identificador, template, novo_arquivo in pacote:
+            prefixo = identificador + "."
+            perguntas = [
+                dict(pergunta, pergunta_id=pergunta["pergunta_id"][len(prefixo):])
+                for pergunta in respostas if str(pergunta.get("pergunta_id", "")).startswith(prefixo)
+            ]
+
+            if template["indices"].keys() <= {pergunta["pergunta_id"] for pergunta in perguntas}:
+                resultados[identificador] = {"perguntas": perguntas}
+            else:
+                incompletos.append((identificador, template, novo_arquivo))
+
+        if incompletos:
+            self.telemetria.registrar_repeticao("gerar_definicao", "pacote_incompleto")
+            print(self.formatar_texto(f"{len(incompletos)} de {len(pacote)} templates voltaram incompletos; pedindo de novo em pacotes menores.", cor="amarelo"))
+
+            metade = (len(incompletos) + 1) // 2
+            for parte in (incompletos[:metade], incompletos[metade:]):
+                if parte:
+                    resultados.update((yield from self.passos_responder_pacote(parte)))
+
+        return resultados
+
+    # Responde um pacote de templates e salva cada definição assim que o pacote termina. Um pacote com erro não
+    # interrompe os demais.
+    @EtapaIA
+    def definir_pacote(self, pacote):
+        try:
+            resultados = yield from self.passos_responder_pacote(pacote)
+        except Exception as e:
+            for identificador, _, _ in pacote:
+                print(self.formatar_texto(f"Erro ao responder perguntas do template {identificador}: {e}", cor="vermelho", negrito=True))
             return
 
-    # Gera a definição do personagem, iterando sobre um template JSON e coletando informações específicas.
+        for identificador, _, novo_arquivo in pacote:
+            result_perguntas = resultados.get(identificador)
+
+            if result_perguntas:
+                self.personagem["Definição"][identificador] = result_perguntas.get("perguntas")
+                self.salvar_json(novo_arquivo, result_perguntas)
+                print(self.formatar_texto(f"Definição parcial salva com sucesso em: {self.local_json(novo_arquivo)}", cor="verde"))
+
+            else:
+                print(self.formatar_texto(f"Erro ao responder perguntas do template {identificador}: Resposta vazia ou inválida da IA. Tente novamente.", cor="vermelho", negrito=True))
+
+    # Gera a definição do personagem, iterando sobre os templates do catálogo e coletando informações específicas.
+    # As perguntas dos templates pendentes são agrupadas em pacotes (CONFIG["definicao"]) e os pacotes rodam em
+    # paralelo (threads ou tarefas do asyncio), limitados por CONFIG["definicao"]["max_workers"].
+    @EtapaIA
     def gerar_definicao(self):
-        template_files = [f for f in os.listdir(self.charJsons["personagem_templates"]) if f.endswith('.json')]
-        if not template_files:
+        catalogo = obter_catalogo(self.charJsons["personagem_templates"])
+        for arquivo, erro in catalogo.erros.items():
+            print(self.formatar_texto(f"Erro: Template '{arquivo}' está vazio ou malformado ({erro}). Verifique o arquivo JSON.", cor="vermelho", negrito=True))
+
+        if not catalogo.templates:
             print(self.formatar_texto("Nenhum template de definição encontrada. Por favor, adicione templates JSON na pasta '" + self.charJsons["personagem_templates"] + "'.", cor="vermelho", negrito=True))
             return
         
-        else:
-            if "Definição" not in self.personagem:
-                self.personagem["Definição"] = {}
-    
-            print(self.formatar_texto("\nVamos gerar a definição do personagem.", cor="azul", negrito=True))
+        if "Definição" not in self.personagem:
+            self.personagem["Definição"] = {}
+
+        print(self.formatar_texto("\nVamos gerar a definição do personagem.", cor="azul", negrito=True))
+        
+        # Carrega os templates na ordem, separando os que já têm definição salva dos que precisam ser gerados
+        pendentes = []
+        self.allTemplates = list(catalogo.templates)
+        total = len(self.allTemplates)
+        for i, template in enumerate(self.allTemplates, start=1):
+            caminho = os.path.join(self.charJsons["personagem_templates"], template["arquivo"])
+            msg = f"Verificando definição {i} de {total}: {caminho}"
+            print(self.formatar_texto(msg, cor="amarelo", italico=True))
+
+            identificador = template["identificador"]
             
-            total = len(template_files)
-            for i, file in enumerate(template_files, start=1):
-                caminho = os.path.join(self.charJsons["personagem_templates"], file)
-                msg = f"Verificando definição {i} de {total}: {caminho}"
-                print(self.formatar_texto(msg, cor="amarelo", italico=True))
-
-                # Abre o template JSON e carrega os dados
-                load_template = self.abrir_json(caminho)
-                if not isinstance(load_template, dict) or not load_template:
-                    print(self.formatar_texto(f"Erro: Template '{file}' está vazio ou malformado. Verifique o arquivo JSON.", cor="vermelho", negrito=True))
+            definicao_file = self.charJsons["personagem_definicao"]
+            novo_arquivo = definicao_file.replace(".json", f"_{identificador}.json")
+            
+            # Já existe uma definição?
+            if self.existe_json(novo_arquivo):
+                abrir_definicao = self.abrir_json(novo_arquivo)
+
+                if abrir_definicao and isinstance(abrir_definicao.get("perguntas"), list):
+                    self.personagem["Definição"][identificador] = abrir_definicao.get("perguntas")
+                    print(self.formatar_texto(f"Arquivo existente encontrado! Definição carregada de: \"{self.local_json(novo_arquivo)}\"", cor="verde"))
                     continue
-                
-                # Adiciona o template carregado à lista de templates
-                self.allTemplates.append(load_template)
-                
-                print(self.formatar_texto(f"Template '{file}' carregado com sucesso!", cor="verde"))
-                
-                # Se o template for um dicionário, pega o primeiro identificador e os dados
-                identificador = list(load_template.keys())[0]
-                dados = load_template[identificador]
-                
-                definicao_file = self.charJsons["personagem_definicao"]
-                novo_arquivo = definicao_file.replace(".json", f"_{identificador}.json")
-                
-                # Já existe uma definição?
-                if os.path.exists(novo_arquivo):
-                    abrir_definicao = self.abrir_json(novo_arquivo)
 
-                    if abrir_definicao and isinstance(abrir_definicao.get("perguntas"), list):
-                        self.personagem["Definição"][identificador] = abrir_definicao.get("perguntas")
-                        print(self.formatar_texto(f"Arquivo existente encontrado! Definição carregada de: \"{novo_arquivo}\"", cor="verde"))
-                        self.print_char("definicao",identificador)
-                        continue
+            pendentes.append((identificador, template, novo_arquivo))
 
-                else:
-                    result_perguntas = self.gerar_prompt_definicao(dados)
-                    
-                    if result_perguntas:
-                        self.personagem["Definição"][identificador] = result_perguntas.get("perguntas")
-                        self.salvar_json(novo_arquivo, result_perguntas)
-                        print(self.formatar_texto(f"Definição parcial salva com sucesso em: {novo_arquivo}", cor="verde"))
-                        self.print_char("definicao",identificador)
-                        
-                    else:
-                        print(self.formatar_texto("Erro ao responder perguntas: Resposta vazia ou inválida da IA. Tente novamente.", cor="vermelho", negrito=True))
-                    
-                    continue
+        pacotes = self.agrupar_definicoes(pendentes)
+        if len(pacotes) < len(pendentes):
+            print(self.formatar_texto(f"{len(pendentes)} templates agrupados em {len(pacotes)} requisições.", cor="ciano"))
+
+        # Dispara os pacotes em paralelo
+        yield Paralelo([self.passos_definir_pacote(pacote) for pacote in pacotes], max_workers=CONFIG["definicao"]["max_workers"])
 
+        # Mostra as definições na ordem dos templates
+        for template in self.allTemplates:
+            identificador = template["identificador"]
+            if identificador in self.personagem["Definição"]:
+                self.print_char("definicao", identificador)
 
+
+    # Gera diálogos até ter CONFIG["dialogos"]["alvo_unicos"] pares diferentes entre si. Pares quase iguais a um já
+    # guardado (MinHash/LSH sobre msg1 e msg2) são descartados assim que chegam, e as chamadas param quando o alvo é
+    # atingido ou depois de CONFIG["dialogos"]["max_chamadas"] respostas. Com o orçamento ativo, cada chamada pede só
+    # os diálogos que ainda cabem na definição final, e no fim ficam os de maior valor; os que sobram são guardados à
+    # parte ("dialogos_excedentes") e voltam a concorrer na próxima execução.
+    @EtapaIA
     def criar_dialogos(self):
         self.personagem["Diálogos"] = []
+        alvo = CONFIG["dialogos"]["alvo_unicos"]
+        detector = DetectorDuplicatas(
+            limiar=CONFIG["dialogos"]["limiar_similaridade"],
+            permutacoes=CONFIG["dialogos"]["permutacoes"],
+            bandas=CONFIG["dialogos"]["bandas"],
+        )
+        orcamento = self.orcamento_dialogos()
         
         print(self.formatar_texto("\nVamos criar uma lista de dialogos para seu personagem, com base nas informações fornecidas.", cor="azul", negrito=True))
 
         # Já existe aos diálogos?
-        if os.path.exists(self.charJsons["personagem_dialogos"]):
+        if self.existe_json(self.charJsons["personagem_dialogos"]):
             abrir_dialogos = self.abrir_json(self.charJsons["personagem_dialogos"])
             if abrir_dialogos and isinstance(abrir_dialogos.get("dialogos"), list):
-                self.personagem["Diálogos"] = abrir_dialogos["dialogos"]
-                print(self.formatar_texto("Arquivo existente encontrado! Diálogos carregada de: \"" + self.charJsons["personagem_dialogos"] + "\"", cor="verde"))
-                self.print_char("dialogos",self.personagem["Diálogos"])
-                
-                if len(abrir_dialogos["dialogos"]) > 100:
-                    return
-                
-                
+                self.adicionar_dialogos(detector, abrir_dialogos["dialogos"] + abrir_dialogos.get("dialogos_excedentes", []))
+                print(self.formatar_texto("Arquivo existente encontrado! Diálogos carregada de: \"" + self.local_json(self.charJsons["personagem_dialogos"]) + "\"", cor="verde"))
+
+        if orcamento and orcamento.espaco <= 0:
+            print(self.formatar_texto(f"A definição já tem {orcamento.tamanho_definicoes} de {orcamento.limite} caracteres e não sobra espaço para diálogos.", cor="amarelo"))
+        elif orcamento:
+            print(self.formatar_texto(f"Definição com {orcamento.tamanho_definicoes} de {orcamento.limite} caracteres; cabem cerca de {orcamento.cabem([])} diálogos.", cor="ciano"))
 
         # Gera rediálogos com base na descrição geral
-        descricao = self.personagem.get("Descrição Geral", "")
+        descricao = self.descricao_para("criar_dialogos")
+        max_chamadas = CONFIG["dialogos"]["max_chamadas"]
+
+        for chamada in range(max_chamadas):
+            faltam = alvo - len(self.personagem["Diálogos"])
+            if faltam <= 0:
+                break
+
+            quantidade = min(CONFIG["dialogos"]["por_chamada"], faltam)
+            if orcamento:
+                quantidade = orcamento.pedir(self.personagem["Diálogos"], quantidade, CONFIG["dialogos"]["orcamento"]["minimo_por_chamada"])
+                if not quantidade:
+                    self.telemetria.registrar_evento("criar_dialogos", "chamadas_evitadas_orcamento", max_chamadas - chamada)
+                    print(self.formatar_texto("A definição final não tem espaço para mais diálogos.", cor="ciano"))
+                    break
 
+            dialogos = yield from self.passos_pedir_dialogos(descricao, quantidade)
+            if dialogos is None:
+                break
+
+            novos = self.adicionar_dialogos(detector, dialogos)
+            self.telemetria.registrar_evento("criar_dialogos", "dialogos_repetidos", len(dialogos) - novos)
+            self.salvar_json(self.charJsons["personagem_dialogos"], {"dialogos": self.personagem["Diálogos"]})
+            print(self.formatar_texto(f"{novos} diálogos novos, {len(dialogos) - novos} repetidos descartados ({len(self.personagem['Diálogos'])} de {alvo}).", cor="ciano"))
+
+        temp_dialogos = {"dialogos": self.personagem["Diálogos"]}
+
+        # Ficam na definição os diálogos de maior valor que cabem no orçamento
+        if orcamento:
+            escolhidos, excedentes = orcamento.ajustar(self.personagem["Diálogos"])
+            if excedentes:
+                self.telemetria.registrar_evento("criar_dialogos", "dialogos_cortados", len(excedentes))
+                print(self.formatar_texto(f"{len(excedentes)} diálogos não cabem na definição final e ficam de fora.", cor="amarelo"))
+            self.personagem["Diálogos"] = escolhidos
+            temp_dialogos = {"dialogos": escolhidos, "dialogos_excedentes": excedentes}
+
+        # Com o orçamento, nenhum diálogo também é um resultado: a definição não deixou espaço
+        if self.personagem["Diálogos"] or orcamento:
+            self.salvar_json(self.charJsons["personagem_dialogos"], temp_dialogos)
+            print(self.formatar_texto("Diálogos salvos com sucesso em: "+ self.local_json(self.charJsons["personagem_dialogos"]), cor="verde"))
+            self.print_char("dialogos",self.personagem["Diálogos"])
+
+    # Orçamento dos diálogos a partir do tamanho atual das seções de definição, ou None com o orçamento desligado.
+    def orcamento_dialogos(self):
+        config = CONFIG["dialogos"]["orcamento"]
+        if not config["ativo"]:
+            return None
+
+        templates = self.allTemplates or obter_catalogo(self.charJsons["personagem_templates"]).templates
+        dados = dict(self.dados_exportacao(), dialogos=[])
+        return OrcamentoDialogos(
+            tamanho_pedacos(pedacos_definicao(dados, templates)),
+            limite=config["limite_caracteres"],
+            margem=config["margem"],
+            caracteres_por_dialogo=config["caracteres_por_dialogo"],
+        )
+
+    # Adiciona os diálogos que não são quase iguais a um já guardado e retorna quantos entraram.
+    def adicionar_dialogos(self, detector, dialogos):
+        novos = 0
+        for dialogo in dialogos:
+            if detector.eh_duplicata(texto_dialogo(dialogo)):
+                continue
+
+            self.personagem["Diálogos"].append({
+                "user1": dialogo["user1"],
+                "msg1": dialogo["msg1"],
+                "user2": dialogo["user2"],
+                "msg2": dialogo["msg2"],
+            })
+            novos += 1
+
+        return novos
+
+    # Pede uma lista de diálogos à IA, repetindo enquanto a resposta vier inválida. Retorna None se o usuário desistir.
+    @EtapaIA
+    def pedir_dialogos(self, descricao, quantidade:int=20):
+        Modelo = self.gerar_modelo({
+            "dialogos": (List[
+                self.gerar_modelo({
+                    "user1": (str, Field(..., description="Primeiro usuário")),
+                    "msg1": (str, Field(..., description="Mensagem do primeiro usuário")),
+                    "user2": (str, Field(..., description="Segundo usuário")),
+                    "msg2": (str, Field(..., description="Mensagem do segundo usuário")),
+                })
+            ], Field(..., description="Diálogos entre usuários")),
+        })
+
+        rodada = 0
         while True:
+            rodada += 1
             max_tentativas:int = 5
             for tentativa in range(max_tentativas):
-                Modelo = self.gerar_modelo({
-                    "dialogos": (List[
-                        self.gerar_modelo({
-                            "user1": (str, Field(..., description="Primeiro usuário")),
-                            "msg1": (str, Field(..., description="Mensagem do primeiro usuário")),
-                            "user2": (str, Field(..., description="Segundo usuário")),
-                            "msg2": (str, Field(..., description="Mensagem do segundo usuário")),
-                        })
-                    ], Field(..., description="Diálogos entre usuários")),
-                })
-                
-                result = self.exec_ia(
+                result = yield PedidoIA(
                     PROMPT["PROMPT_DIALOGOS_SYSTEM"],
-                    PROMPT["PROMPT_DIALOGOS_USER"].format(descricao=descricao),
+                    PROMPT["PROMPT_DIALOGOS_USER"].format(descricao=descricao, quantidade=quantidade),
                     Modelo,
-                    temperature=1.2,
-                    top_p=0.95,
-                    #model="llama-3.3-70b-versatile"
+                    etapa="criar_dialogos",
                 )
                 
                 if result and isinstance(result.get("dialogos"), list):
-                    for dialogo in result.get("dialogos"):
-                        self.personagem["Diálogos"].append({
-                            "user1": dialogo["user1"],
-                            "msg1": dialogo["msg1"],
-                            "user2": dialogo["user2"],
-                            "msg2": dialogo["msg2"],
-                        })
-                    temp_dialogos = {}
-                    temp_dialogos["dialogos"] = self.personagem["Diálogos"]
-                    self.salvar_json(self.charJsons["personagem_dialogos"], temp_dialogos)
-                    print(self.formatar_texto("Diálogos salvos com sucesso em: "+ self.charJsons["personagem_dialogos"], cor="verde"))
-                    self.print_char("dialogos",self.personagem["Diálogos"])
-
-                    return
+                    return result.get("dialogos")
                 
                 else:
+                    self.telemetria.registrar_repeticao("criar_dialogos", "resposta_invalida")
                     print(self.formatar_texto("Erro na geração dos diálogos", cor="amarelo"))
 
-            continuar = input(f"Deseja tentar mais {max_tentativas} vezes? (s/n): ").strip().lower()
-            if continuar != 's':
-                print("Encerrando...")
-                break
+            if not self.tentar_novamente(max_tentativas, rodada, "criar_dialogos"):
+                return None
   
-    # Imprime todas as informações do personagem de forma organizada.
+    # Dados do personagem no formato do exportador (exportador.py).
+    def dados_exportacao(self):
+        return {
+            "nome": self.respostas.get("Nome", ""),
+            "slogan": self.personagem.get("Slogan", ""),
+            "descricao": self.personagem.get("Descrição", ""),
+            "saudacao": self.personagem.get("Saudação", ""),
+            "etiquetas": self.personagem.get("Etiquetas", []),
+            "definicoes": self.personagem.get("Definição", {}),
+            "dialogos": self.personagem.get("Diálogos", []),
+        }
+
+    # Imprime todas as informações do personagem de forma organizada. A definição final é montada pelo exportador:
+    # sem cores no artefato salvo e com cores só no terminal.
     def imprimir_personagem(self):
         templates = self.allTemplates
-        dialogos = self.personagem.get("Diálogos", [])
-        
-        codigo = ""
         
         if not templates:
             print(self.formatar_texto(
@@ -729,89 +1495,21 @@ class BuildMyCharUI:
             "\nVamos Gerar as Definições Gerais do Personagem:",
             cor="azul", negrito=True
         ))
-        
-        codigo += "----\n"
-        codigo += self.formatar_texto("### DEFINIÇÕES DO PERSONAGEM ###", cor="rosa", negrito=True)
-        codigo += "\n----\n"
-        
-        for i, template in enumerate(templates, start=1):
-            if isinstance(template, dict) and template:
-                identificador = list(template.keys())[0]
-                dados = template[identificador]
-                dados_comp = self.personagem["Definição"][identificador]
-                status_perguntas = []
-
-                titulo = dados.get("titulo", "")
-                codigo_perguntas = "\n\n----\n"
-                codigo_perguntas += "** " + self.formatar_texto(titulo, cor="ciano", negrito=True) + " **\n"
-                codigo_perguntas += "----\n"
-                
-                for p, pergunta in enumerate(dados.get("perguntas", []), start=1):
-                    try:
-                        pergunta_indice = pergunta.get("indice", None)
-                        pergunta_texto = pergunta.get("resposta", None)
-                        pergunta_resposta = next((p for p in dados_comp if p["pergunta_id"] == pergunta_indice), None)
-                        pergunta_resposta = pergunta_resposta["resposta"]
-                        
-                        pergunda_pronta = pergunta_texto.replace("{" + f"{pergunta_indice}" + "}", pergunta_resposta)
-  
-                        if pergunta_texto and pergunta_resposta:
-                            codigo_perguntas += "- " + pergunda_pronta + "\n"
-                            status_perguntas.append(pergunta_indice)
-                                
-                    except Exception as e:
-                        print(self.formatar_texto(f"Erro ao processar a pergunta {p} do template {identificador}: {e}", cor="vermelho", negrito=True))
-                        continue
-                            
-                codigo_perguntas += "----\n"  
-                
-                if len(status_perguntas) > 0:
-                    codigo += codigo_perguntas
-        
-        # DIÁLOGOS
-        if dialogos:
-            codigo_dialogo = "\n\n\n\n----\n"
-            codigo_dialogo += self.formatar_texto("### DIÁLOGOS DO PERSONAGEM ###", cor="rosa", negrito=True)
-            codigo_dialogo += "\n----\n\n\n----\n"
-            
-            status_dialogos = []
-            
-            for i, dialogo in enumerate(dialogos, start=1):
-                if isinstance(dialogo, dict) and len(dialogo) == 4:
-                    user_a_type = dialogo.get("user1", "")
-                    user_a_msg = dialogo.get("msg1", "")
-                    user_b_type = dialogo.get("user2", "")
-                    user_b_msg = dialogo.get("msg2", "")
-
-                    # Verifica se o diálogo é válido
-                    if not user_a_type or not user_b_type or not user_a_msg or not user_b_msg:
-                        print(self.formatar_texto(f"Diálogo {i} inválido ou incompleto. Pulando...", cor="vermelho", negrito=True))
-                        continue
-                                   
-                    # Formata o diálogo
-                    user_a_type = user_a_type.strip()
-                    user_a_msg = user_a_msg.strip()
-                    user_b_type = user_b_type.strip()
-                    user_b_msg = user_b_msg.strip()
-
-                    codigo_dialogo += f"{{{{{user_a_type}}}}}: {user_a_msg}\n"
-                    codigo_dialogo += f"{{{{{user_b_type}}}}}: {user_b_msg}\n"
-                    codigo_dialogo += "----\n"
-                    
-                    status_dialogos.append(i)
-                    
-            if len(status_dialogos) > 0:
-                codigo += codigo_dialogo
 
-        codigo_final = {"codigo": codigo.strip()}
+        dados = self.dados_exportacao()
+        codigo = io.StringIO()
+        escrever_texto(codigo, dados, templates)
+        codigo_final = {"codigo": codigo.getvalue()}
         
         self.personagem["Definição Final"] = codigo_final["codigo"]
         
         # Salva o código gerado em um arquivo JSON
         self.salvar_json(self.charJsons["personagem_definicoes"], codigo_final)
-        if os.path.exists(self.charJsons["personagem_definicoes"]):
-            print(self.formatar_texto("Definições gerais do personagem salvas com sucesso em: " + self.charJsons["personagem_definicoes"], cor="verde"))
-            print("\n\n" + codigo)
+        if self.existe_json(self.charJsons["personagem_definicoes"]):
+            print(self.formatar_texto("Definições gerais do personagem salvas com sucesso em: " + self.local_json(self.charJsons["personagem_definicoes"]), cor="verde"))
+            print("\n")
+            escrever_texto(sys.stdout, dados, templates, ansi=True)
+            print()
         
     def done(self):
         print(self.formatar_texto("\n\nParabéns! Você completou a criação do seu personagem.", cor="verde", negrito=True))
@@ -837,25 +1535,75 @@ class BuildMyCharUI:
         print(self.formatar_texto("Etiquetas (" + str(len(etiquetas)) + " de 5 etiquetas):", cor="ciano", negrito=True))
         print(self.formatar_texto(lista_etiquetas))
         print("----------")
-        print(self.formatar_texto("Definições (" + str(len(self.personagem.get("Definição Final"))) + " de 32000 caracteres):", cor="ciano", negrito=True))
+        print(self.formatar_texto("Definições (" + str(len(self.personagem.get("Definição Final"))) + " de " + str(CONFIG["dialogos"]["orcamento"]["limite_caracteres"]) + " caracteres):", cor="ciano", negrito=True))
         print(self.formatar_texto(self.personagem.get("Definição Final")))
         
         print("###################################")
         
+    # Monta as etapas declaradas em CONFIG["etapas"] (com o resumo, se alguma etapa usa), ligando cada uma ao método de mesmo nome.
+    # Com `assincrono`, as etapas que chamam a IA usam a versão `_async` do método.
+    def etapas(self, assincrono:bool=False):
+        def metodo(nome):
+            return getattr(self, nome + "_async") if assincrono and hasattr(self, nome + "_async") else getattr(self, nome)
+
+        return [dict(etapa, funcao=self.telemetria.medir(etapa["nome"], metodo(etapa["nome"]))) for etapa in etapas_ativas()]
+
+    # Marca para gerar de novo as saídas das etapas cujas entradas mudaram desde a última execução.
+    def planejar_regeneracao(self):
+        # As respostas recebidas entram antes do plano, para que respostas novas regenerem o que depende delas
+        if self.respostas_iniciais is not None:
+            self.receber_respostas()
+
+        plano = planejar_regeneracao(self.personagem_id, self.charJsons, self.armazenamento)
+        etapas = {etapa["nome"]: etapa for etapa in etapas_ativas()}
+
+        # Etapas sem saída guardada seriam geradas de qualquer jeito; só as que já existem são avisadas
+        desatualizadas = {nome: motivo for nome, motivo in plano.items() if motivo and motivo != "sem saída guardada"}
+        with self.trava_regenerar:
+            self.regenerar = {saida for nome in desatualizadas for saida in etapas[nome]["saidas"]}
+
+        if desatualizadas:
+            print(self.formatar_texto("Etapas que serão geradas de novo: " + ", ".join(f"{nome} ({motivo})" for nome, motivo in desatualizadas.items()), cor="amarelo"))
+
+        return plano
+
+    # Executa as etapas pelo agendador: depois da descrição geral, as etapas independentes rodam em paralelo.
     def start(self):
-        self.coletar_informacoes()
-        self.gerar_nome()
-        self.criar_descricao_geral()
-        self.gerar_slogan()
-        self.criar_descricao()
-        self.gerar_saudacao()
-        self.gerar_etiquetas()
-        self.gerar_definicao()
-        self.criar_dialogos()
-        self.criar_dialogos()
-        self.criar_dialogos()
-        self.imprimir_personagem()
-        self.done()
+        self.planejar_regeneracao()
+
+        agendador = AgendadorEtapas(self.etapas(), max_workers=CONFIG["agendador"]["max_workers"], ao_progresso=self.ao_progresso)
+        agendador.executar()
+        self.concluir(agendador)
+
+    # Versão assíncrona de start: as etapas rodam como tarefas do loop de eventos, sem threads, e as chamadas à IA
+    # passam por exec_ia_async. Vários personagens podem rodar no mesmo loop (ver lote.executar_lote_async).
+    async def start_async(self):
+        self.planejar_regeneracao()
+
+        agendador = AgendadorEtapas(self.etapas(assincrono=True), max_workers=CONFIG["agendador"]["max_workers"], ao_progresso=self.ao_progresso)
+        await agendador.executar_async()
+        self.concluir(agendador)
+
+    # Guarda o resultado do agendador, exporta a telemetria e os histogramas do hedging e mostra os erros das etapas.
+    def concluir(self, agendador):
+        self.erros_etapas = agendador.erros
+        self.duracoes_etapas = agendador.duracoes
+        self.etapas_ignoradas = agendador.ignoradas
+
+        if CONFIG["telemetria"]["ativo"] and self.exportar_telemetria:
+            self.telemetria.exportar()
+        if CONFIG["hedge"]["ativo"]:
+            self.hedge.salvar()
+
+        if self.cache is not None:
+            estatisticas = self.cache.estatisticas()
+            print(self.formatar_texto(f"Cache de respostas: {estatisticas['acertos']} acertos, {estatisticas['faltas']} faltas, {estatisticas['ignoradas']} ignoradas.", cor="cinza"))
+
+        for nome, erro in agendador.erros.items():
+            print(self.formatar_texto(f"Erro na etapa {nome}: {erro}", cor="vermelho", negrito=True))
+
+        if agendador.ignoradas:
+            print(self.formatar_texto("Etapas não executadas por falha em uma dependência: " + ", ".join(agendador.ignoradas), cor="amarelo"))
         
         
 # Verifica se o script está sendo executado diretamente 
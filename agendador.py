@@ -0,0 +1,160 @@
+import time
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class AgendadorEtapas:
+    # Executa as etapas do personagem como um grafo de dependências: cada etapa declara as entradas que consome e as
+    # saídas que produz, e todas as etapas com entradas prontas rodam em paralelo.
+    # `ao_progresso`, se informado, recebe um evento {"tipo": "etapa", "etapa": ..., "situacao": ...} quando cada etapa
+    # começa, termina, falha ou é ignorada.
+    def __init__(self, etapas, max_workers:int=4, ao_progresso=None):
+        self.etapas = {etapa["nome"]: etapa for etapa in etapas}
+        self.max_workers = max_workers
+        self.ao_progresso = ao_progresso
+        self.erros = {}
+        self.ignoradas = []
+        self.duracoes = {}
+
+        produtores = {}
+        for etapa in etapas:
+            for saida in etapa.get("saidas", []):
+                if saida in produtores:
+                    raise ValueError(f"Saída '{saida}' declarada por mais de uma etapa: {produtores[saida]} e {etapa['nome']}.")
+                produtores[saida] = etapa["nome"]
+
+        # Cada etapa depende das etapas que produzem as suas entradas
+        self.dependencias = {}
+        for etapa in etapas:
+            dependencias = set()
+            for entrada in etapa.get("entradas", []):
+                if entrada not in produtores:
+                    raise ValueError(f"Entrada '{entrada}' da etapa {etapa['nome']} não é produzida por nenhuma etapa.")
+                dependencias.add(produtores[entrada])
+            self.dependencias[etapa["nome"]] = dependencias
+
+        self.verificar_ciclos()
+
+    # Repassa o evento da etapa para `ao_progresso`.
+    def notificar(self, nome, situacao, **dados):
+        if self.ao_progresso is not None:
+            self.ao_progresso(dict(dados, tipo="etapa", etapa=nome, situacao=situacao))
+
+    # Garante que o grafo não tem ciclos, para que toda etapa consiga ficar pronta em algum momento.
+    def verificar_ciclos(self):
+        visitando, visitadas = set(), set()
+
+        def visitar(nome):
+            if nome in visitadas:
+                return
+            if nome in visitando:
+                raise ValueError(f"Ciclo de dependências encontrado na etapa {nome}.")
+            visitando.add(nome)
+            for dependencia in self.dependencias[nome]:
+                visitar(dependencia)
+            visitando.discard(nome)
+            visitadas.add(nome)
+
+        for nome in self.etapas:
+            visitar(nome)
+
+    # Executa a etapa, repetindo a função quando a etapa pede mais de uma execução, e registra quanto tempo levou.
+    def executar_etapa(self, etapa):
+        self.notificar(etapa["nome"], "iniciada")
+        inicio = time.perf_counter()
+        try:
+            for _ in range(etapa.get("repeticoes", 1)):
+                etapa["funcao"]()
+        except Exception as e:
+            self.notificar(etapa["nome"], "erro", erro=str(e))
+            raise
+        finally:
+            self.duracoes[etapa["nome"]] = time.perf_counter() - inicio
+
+        self.notificar(etapa["nome"], "concluida", duracao=round(self.duracoes[etapa["nome"]], 4))
+
+    # Roda todas as etapas respeitando as dependências. Etapas que dependem de uma etapa com erro são ignoradas.
+    def executar(self):
+        pendentes = dict(self.dependencias)
+        concluidas = set()
+        em_execucao = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pendentes or em_execucao:
+                # Descarta as etapas que nunca vão ficar prontas
+                for nome, dependencias in list(pendentes.items()):
+                    if dependencias & (set(self.erros) | set(self.ignoradas)):
+                        self.ignoradas.append(nome)
+                        del pendentes[nome]
+                        self.notificar(nome, "ignorada")
+
+                # Mantém a ordem de declaração ao disparar as etapas prontas
+                for nome in [nome for nome in self.etapas if nome in pendentes]:
+                    if pendentes[nome] <= concluidas:
+                        del pendentes[nome]
+                        em_execucao[executor.submit(self.executar_etapa, self.etapas[nome])] = nome
+
+                if not em_execucao:
+                    break
+
+                prontas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in prontas:
+                    nome = em_execucao.pop(futuro)
+                    erro = futuro.exception()
+                    if erro is not None:
+                        self.erros[nome] = erro
+                    else:
+                        concluidas.add(nome)
+
+        return concluidas
+
+    # Versão assíncrona de executar_etapa. Funções de etapa que não são corrotinas (as que não chamam a IA) rodam
+    # direto no loop de eventos.
+    async def executar_etapa_async(self, etapa):
+        self.notificar(etapa["nome"], "iniciada")
+        inicio = time.perf_counter()
+        try:
+            for _ in range(etapa.get("repeticoes", 1)):
+                resultado = etapa["funcao"]()
+                if inspect.isawaitable(resultado):
+                    await resultado
+        except Exception as e:
+            self.notificar(etapa["nome"], "erro", erro=str(e))
+            raise
+        finally:
+            self.duracoes[etapa["nome"]] = time.perf_counter() - inicio
+
+        self.notificar(etapa["nome"], "concluida", duracao=round(self.duracoes[etapa["nome"]], 4))
+
+    # Versão assíncrona de executar: as etapas prontas viram tarefas do loop de eventos, até max_workers ao mesmo tempo.
+    async def executar_async(self):
+        pendentes = dict(self.dependencias)
+        concluidas = set()
+        em_execucao = {}
+
+        while pendentes or em_execucao:
+            for nome, dependencias in list(pendentes.items()):
+                if dependencias & (set(self.erros) | set(self.ignoradas)):
+                    self.ignoradas.append(nome)
+                    del pendentes[nome]
+                    self.notificar(nome, "ignorada")
+
+            for nome in [nome for nome in self.etapas if nome in pendentes]:
+                if pendentes[nome] <= concluidas and len(em_execucao) < self.max_workers:
+                    del pendentes[nome]
+                    em_execucao[asyncio.ensure_future(self.executar_etapa_async(self.etapas[nome]))] = nome
+
+            if not em_execucao:
+                break
+
+            prontas, _ = await asyncio.wait(em_execucao, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in prontas:
+                nome = em_execucao.pop(tarefa)
+                erro = tarefa.exception()
+                if erro is not None:
+                    self.erros[nome] = erro
+                else:
+                    concluidas.add(nome)
+
+        return concluidas
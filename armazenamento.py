@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from config import CONFIG
+
+
+class ArmazenamentoSQLite:
+    # Guarda os artefatos de todos os personagens num único banco SQLite, separados pelo id do personagem.
+    # O modo WAL deixa vários processos lerem enquanto outro grava, e cada gravação é uma transação própria: quem lê
+    # nunca vê um artefato pela metade.
+    def __init__(self, caminho:str):
+        diretorio = os.path.dirname(caminho)
+        if diretorio and not os.path.exists(diretorio):
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.caminho = caminho
+        self.trava = threading.Lock()
+
+        # Espera até 30s quando outro processo está gravando, em vez de falhar com "database is locked"
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS personagens (
+                personagem_id TEXT PRIMARY KEY,
+                criado REAL NOT NULL,
+                atualizado REAL NOT NULL
+            )
+        """)
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS artefatos (
+                personagem_id TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                dados TEXT NOT NULL,
+                atualizado REAL NOT NULL,
+                hash_entradas TEXT,
+                PRIMARY KEY (personagem_id, chave)
+            ) WITHOUT ROWID
+        """)
+
+        # Bancos criados antes do registro das entradas não têm a coluna
+        colunas = [linha[1] for linha in self.conexao.execute("PRAGMA table_info(artefatos)")]
+        if "hash_entradas" not in colunas:
+            self.conexao.execute("ALTER TABLE artefatos ADD COLUMN hash_entradas TEXT")
+        self.conexao.commit()
+
+    # Retorna os dados do artefato, ou None se ele não existir.
+    def abrir(self, personagem_id, chave):
+        with self.trava:
+            linha = self.conexao.execute("SELECT dados FROM artefatos WHERE personagem_id = ? AND chave = ?", (personagem_id, chave)).fetchone()
+
+        return json.loads(linha[0]) if linha else None
+
+    # Grava o artefato, com o hash das entradas que o geraram, e atualiza o personagem na mesma transação.
+    def salvar(self, personagem_id, chave, dados, hash_entradas=None):
+        texto = json.dumps(dados, ensure_ascii=False)
+        agora = time.time()
+
+        with self.trava, self.conexao:
+            self.conexao.execute(
+                "INSERT INTO personagens (personagem_id, criado, atualizado) VALUES (?, ?, ?) "
+                "ON CONFLICT (personagem_id) DO UPDATE SET atualizado = excluded.atualizado",
+                (personagem_id, agora, agora),
+            )
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO artefatos (personagem_id, chave, dados, atualizado, hash_entradas) VALUES (?, ?, ?, ?, ?)",
+                (personagem_id, chave, texto, agora, hash_entradas),
+            )
+
+    def existe(self, personagem_id, chave):
+        with self.trava:
+            return self.conexao.execute("SELECT 1 FROM artefatos WHERE personagem_id = ? AND chave = ?", (personagem_id, chave)).fetchone() is not None
+
+    # Hash das entradas de cada artefato do personagem (None quando não foi registrado).
+    def hashes(self, personagem_id):
+        with self.trava:
+            linhas = self.conexao.execute("SELECT chave, hash_entradas FROM artefatos WHERE personagem_id = ?", (personagem_id,)).fetchall()
+
+        return dict(linhas)
+
+    # Lista os personagens guardados, do mais recente para o mais antigo.
+    def listar(self):
+        with self.trava:
+            linhas = self.conexao.execute("SELECT personagem_id, criado, atualizado FROM personagens ORDER BY atualizado DESC").fetchall()
+
+        return [{"id": personagem_id, "criado": criado, "atualizado": atualizado} for personagem_id, criado, atualizado in linhas]
+
+    # Carrega todos os artefatos de um personagem numa única consulta.
+    def carregar(self, personagem_id):
+        with self.trava:
+            linhas = self.conexao.execute("SELECT chave, dados FROM artefatos WHERE personagem_id = ?", (personagem_id,)).fetchall()
+
+        return {chave: json.loads(dados) for chave, dados in linhas}
+
+    # Onde o artefato está guardado, para as mensagens ao usuário.
+    def descrever(self, personagem_id, chave):
+        return f"{self.caminho} ({personagem_id}/{chave})"
+
+
+class ArmazenamentoArquivos:
+    # Guarda os artefatos como arquivos JSON, numa pasta por personagem: <diretorio>/<id>/<chave>.json. O hash das
+    # entradas de cada artefato fica ao lado, em <chave>.hash.
+    def __init__(self, diretorio:str):
+        self.diretorio = diretorio
+
+    # Pasta do personagem. O id vira o nome da pasta: um id que sairia do diretório do armazenamento ("..", "a/b" ou
+    # um caminho absoluto) é recusado.
+    def pasta(self, personagem_id):
+        if personagem_id in ("", ".", "..") or os.path.basename(personagem_id) != personagem_id:
+            raise ValueError(f"id de personagem inválido: {personagem_id!r}")
+        return os.path.join(self.diretorio, personagem_id)
+
+    def caminho(self, personagem_id, chave):
+        return os.path.join(self.pasta(personagem_id), f"{chave}.json")
+
+    def abrir(self, personagem_id, chave):
+        caminho = self.caminho(personagem_id, chave)
+        if not os.path.exists(caminho):
+            return None
+
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    # Grava num arquivo temporário e troca de uma vez, para que quem lê nunca encontre um arquivo pela metade.
+    def salvar(self, personagem_id, chave, dados, hash_entradas=None):
+        caminho = self.caminho(personagem_id, chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+        # O hash vai antes: um artefato novo nunca fica ao lado do hash de uma versão antiga
+        caminho_hash = caminho[:-5] + ".hash"
+        if hash_entradas:
+            with open(caminho_hash, 'w', encoding='utf-8') as f:
+                f.write(hash_entradas)
+        elif os.path.exists(caminho_hash):
+            os.remove(caminho_hash)
+
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=4)
+        os.replace(temporario, caminho)
+
+    def existe(self, personagem_id, chave):
+        return os.path.exists(self.caminho(personagem_id, chave))
+
+    def hashes(self, personagem_id):
+        pasta = self.pasta(personagem_id)
+        if not os.path.isdir(pasta):
+            return {}
+
+        hashes = {}
+        for arquivo in os.listdir(pasta):
+            if arquivo.endswith(".json"):
+                caminho_hash = os.path.join(pasta, arquivo[:-5] + ".hash")
+                if os.path.exists(caminho_hash):
+                    with open(caminho_hash, 'r', encoding='utf-8') as f:
+                        hashes[arquivo[:-5]] = f.read().strip()
+                else:
+                    hashes[arquivo[:-5]] = None
+
+        return hashes
+
+    def listar(self):
+        if not os.path.isdir(self.diretorio):
+            return []
+
+        personagens = []
+        for personagem_id in os.listdir(self.diretorio):
+            pasta = os.path.join(self.diretorio, personagem_id)
+            if os.path.isdir(pasta):
+                atualizado = os.path.getmtime(pasta)
+                personagens.append({"id": personagem_id, "criado": os.path.getctime(pasta), "atualizado": atualizado})
+
+        return sorted(personagens, key=lambda personagem: personagem["atualizado"], reverse=True)
+
+    def carregar(self, personagem_id):
+        pasta = self.pasta(personagem_id)
+        if not os.path.isdir(pasta):
+            return {}
+
+        return {arquivo[:-5]: self.abrir(personagem_id, arquivo[:-5]) for arquivo in os.listdir(pasta) if arquivo.endswith(".json")}
+
+    def descrever(self, personagem_id, chave):
+        return self.caminho(personagem_id, chave)
+
+
+# Chave do artefato do personagem para o caminho, ou None se o caminho for um arquivo comum (perguntas, templates).
+# Os artefatos são os arquivos de charJsons na mesma pasta de "personagem_info".
+def chave_artefato(caminho, charJsons):
+    if os.path.dirname(caminho) == os.path.dirname(charJsons["personagem_info"]):
+        return os.path.splitext(os.path.basename(caminho))[0]
+    return None
+
+
+_armazenamento = None
+_trava_armazenamento = threading.Lock()
+
+
+# Retorna o armazenamento de personagens compartilhado pelo processo, conforme CONFIG["armazenamento"].
+def obter_armazenamento():
+    global _armazenamento
+
+    with _trava_armazenamento:
+        if _armazenamento is None:
+            if CONFIG["armazenamento"]["backend"] == "arquivos":
+                _armazenamento = ArmazenamentoArquivos(CONFIG["armazenamento"]["diretorio"])
+            elif CONFIG["armazenamento"]["backend"] == "sqlite":
+                _armazenamento = ArmazenamentoSQLite(CONFIG["armazenamento"]["caminho"])
+            else:
+                raise ValueError(f"Backend de armazenamento desconhecido: {CONFIG['armazenamento']['backend']}")
+
+    return _armazenamento
@@ -0,0 +1,170 @@
+# Benchmark da exportação da definição final, comparando a montagem antiga de imprimir_personagem (texto inteiro
+# montado com `+=`, com as cores ANSI embutidas) com o exportador em streaming (exportador.py).
+#
+# Gera N personagens sintéticos num armazenamento SQLite temporário, com respostas para todos os templates e 60
+# diálogos, e exporta todos para um arquivo. Mede o tempo total (incluindo a leitura do armazenamento), o pico de
+# memória (tracemalloc) e os códigos ANSI que foram parar no arquivo. Também confere que o texto novo é igual ao
+# antigo sem as cores. Rodar com 200 e com 2000 personagens mostra se a memória cresce com o lote.
+#
+#   python benchmarks/bench_exportador.py --personagens 2000
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from config import CONFIG
+from armazenamento import ArmazenamentoSQLite
+from catalogo_templates import CatalogoTemplates
+from exportador import formatar_ansi, dados_de_artefatos, exportar_personagens
+from cliente_falso import gerar_texto, FALANTES
+
+ANSI = re.compile(r"\033\[[0-9;]*m")
+
+
+# Guarda os artefatos de um personagem sintético, como o pipeline deixaria.
+def criar_personagem(armazenamento, personagem_id, templates, aleatorio):
+    armazenamento.salvar(personagem_id, "personagem_info", {"informacoes": {"Nome": f"Personagem {personagem_id}"}})
+    armazenamento.salvar(personagem_id, "personagem_slogan", {"slogan": gerar_texto(45, aleatorio)})
+    armazenamento.salvar(personagem_id, "personagem_descricao", {"descricao": gerar_texto(480, aleatorio)})
+    armazenamento.salvar(personagem_id, "personagem_saudacao", {"saudacao": gerar_texto(900, aleatorio)})
+    armazenamento.salvar(personagem_id, "personagem_etiquetas", {"etiquetas": ["Adventure", "Comedy", "Kind"]})
+
+    for template in templates:
+        armazenamento.salvar(personagem_id, f"personagem_definicao_{template['identificador']}", {"perguntas": [
+            {"pergunta_id": pergunta["indice"], "pergunta": pergunta["pergunta"], "resposta": gerar_texto(aleatorio.randint(20, 120), aleatorio)}
+            for pergunta in template["perguntas"]
+        ]})
+
+    armazenamento.salvar(personagem_id, "personagem_dialogos", {"dialogos": [
+        {"user1": aleatorio.choice(FALANTES), "msg1": gerar_texto(aleatorio.randint(20, 90), aleatorio),
+         "user2": "char", "msg2": gerar_texto(aleatorio.randint(20, 90), aleatorio)}
+        for _ in range(60)
+    ]})
+
+
+# Montagem antiga de imprimir_personagem: o texto inteiro é concatenado com `+=` e leva as cores ANSI.
+def montar_antigo(dados, templates):
+    codigo = ""
+    codigo += "----\n"
+    codigo += formatar_ansi("### DEFINIÇÕES DO PERSONAGEM ###", cor="rosa", negrito=True)
+    codigo += "\n----\n"
+
+    for template in templates:
+        dados_comp = dados["definicoes"].get(template["identificador"], [])
+        status_perguntas = []
+
+        codigo_perguntas = "\n\n----\n"
+        codigo_perguntas += "** " + formatar_ansi(template["titulo"], cor="ciano", negrito=True) + " **\n"
+        codigo_perguntas += "----\n"
+
+        for pergunta in template["perguntas"]:
+            pergunta_resposta = next((p for p in dados_comp if p["pergunta_id"] == pergunta["indice"]), None)
+            if pergunta["resposta"] and pergunta_resposta and pergunta_resposta["resposta"]:
+                codigo_perguntas += "- " + pergunta["resposta"].replace("{" + pergunta["indice"] + "}", pergunta_resposta["resposta"]) + "\n"
+                status_perguntas.append(pergunta["indice"])
+
+        codigo_perguntas += "----\n"
+        if status_perguntas:
+            codigo += codigo_perguntas
+
+    if dados["dialogos"]:
+        codigo_dialogo = "\n\n\n\n----\n"
+        codigo_dialogo += formatar_ansi("### DIÁLOGOS DO PERSONAGEM ###", cor="rosa", negrito=True)
+        codigo_dialogo += "\n----\n\n\n----\n"
+
+        for dialogo in dados["dialogos"]:
+            codigo_dialogo += f"{{{{{dialogo['user1'].strip()}}}}}: {dialogo['msg1'].strip()}\n"
+            codigo_dialogo += f"{{{{{dialogo['user2'].strip()}}}}}: {dialogo['msg2'].strip()}\n"
+            codigo_dialogo += "----\n"
+
+        codigo += codigo_dialogo
+
+    return codigo.strip()
+
+
+# Exportação antiga: cada personagem vira o texto montado por inteiro, gravado como uma linha JSON.
+def exportar_antigo(saida, armazenamento, personagem_ids, templates):
+    for personagem_id in personagem_ids:
+        dados = dados_de_artefatos(armazenamento.carregar(personagem_id))
+        saida.write(json.dumps({"id": personagem_id, "codigo": montar_antigo(dados, templates)}, ensure_ascii=False) + "\n")
+
+
+# Roda a exportação duas vezes: uma medindo o tempo e outra, com o tracemalloc (que deixa tudo mais lento), o pico de
+# memória. Depois conta os códigos ANSI que ficaram no arquivo.
+def medir(nome, exportar, caminho):
+    inicio = time.perf_counter()
+    with open(caminho, "w", encoding="utf-8") as saida:
+        exportar(saida)
+    duracao = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    with open(caminho, "w", encoding="utf-8") as saida:
+        exportar(saida)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with open(caminho, "r", encoding="utf-8") as f:
+        codigos_ansi = sum(len(ANSI.findall(linha)) + linha.count("\\u001b[") for linha in f)
+
+    return {
+        "cenario": nome,
+        "tempo_total": round(duracao, 4),
+        "pico_memoria_kb": round(pico / 1024, 1),
+        "megabytes_arquivo": round(os.path.getsize(caminho) / 1024 / 1024, 2),
+        "codigos_ansi_no_arquivo": codigos_ansi,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do exportador da definição final.")
+    parser.add_argument("--personagens", type=int, default=500, help="Personagens sintéticos exportados.")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Salva o resultado em JSON.")
+    args = parser.parse_args()
+
+    aleatorio = random.Random(args.semente)
+    templates = CatalogoTemplates(CONFIG["charJsons"]["personagem_templates"]).atualizar()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazenamento = ArmazenamentoSQLite(os.path.join(diretorio, "personagens.sqlite3"))
+        personagem_ids = [f"p{i}" for i in range(args.personagens)]
+        for personagem_id in personagem_ids:
+            criar_personagem(armazenamento, personagem_id, templates, aleatorio)
+
+        # O texto novo precisa ser igual ao antigo sem as cores
+        antigo = ANSI.sub("", montar_antigo(dados_de_artefatos(armazenamento.carregar("p0")), templates))
+        linha = []
+        exportar_personagens(type("Saida", (), {"write": lambda self, texto: linha.append(texto)})(), armazenamento, ["p0"], templates, "caijson")
+        novo = json.loads("".join(linha))["definition"]
+        if antigo != novo:
+            print("A definição exportada é diferente da montagem antiga.")
+            sys.exit(1)
+
+        resultados = [
+            medir("antigo_concatenacao", lambda saida: exportar_antigo(saida, armazenamento, personagem_ids, templates), os.path.join(diretorio, "antigo.jsonl")),
+            medir("exportador_caijson", lambda saida: exportar_personagens(saida, armazenamento, personagem_ids, templates, "caijson"), os.path.join(diretorio, "novo.jsonl")),
+            medir("exportador_texto", lambda saida: exportar_personagens(saida, armazenamento, personagem_ids, templates, "texto"), os.path.join(diretorio, "novo.txt")),
+        ]
+
+    print(f"{args.personagens} personagens")
+    print(f"{'cenário':<22} {'tempo':>9} {'pico de memória':>17} {'arquivo':>10} {'códigos ANSI':>14}")
+    for resultado in resultados:
+        print(f"{resultado['cenario']:<22} {resultado['tempo_total']:>8.3f}s {resultado['pico_memoria_kb']:>14.1f} KB {resultado['megabytes_arquivo']:>7.2f} MB {resultado['codigos_ansi_no_arquivo']:>14}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
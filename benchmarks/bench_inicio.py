@@ -0,0 +1,191 @@
+# Benchmark do tempo de inicialização (cold start), no estilo de `python -X importtime`.
+#
+# Cada cenário roda num processo Python novo, com `-X importtime`, e mede o tempo total do processo, o tempo de
+# importação dos módulos de primeiro nível e quais dependências pesadas (groq, instructor, pydantic, httpx) foram
+# carregadas. Os cenários:
+#   importar_main: só `import main`;
+#   listar: `main.py --listar`, que não chama a IA;
+#   personagem_em_cache: reabre um personagem já gerado (com o ClienteFalso), sem nenhuma chamada à IA.
+# Os dois últimos não devem importar a pilha da IA; se importarem, o script sai com erro. Com --referencia, compara com
+# um resultado salvo e sai com erro se algum cenário ficar mais lento que a tolerância, para acompanhar o tempo de
+# inicialização entre versões.
+#
+#   python benchmarks/bench_inicio.py --repeticoes 7 --saida inicio.json
+#   python benchmarks/bench_inicio.py --referencia inicio.json --tolerancia 0.25
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+import contextlib
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from config import CONFIG
+
+PESADOS = ["groq", "instructor", "pydantic", "httpx"]
+
+RESPOSTAS = {
+    "Nome": "Ana Souza",
+    "Idade": "27 anos",
+    "Gênero": "Feminino",
+    "Origem": "Salvador, Bahia",
+}
+
+# Código do processo filho: configura o armazenamento temporário, roda o cenário sem saída no terminal e imprime, na
+# última linha, o tempo e as dependências pesadas carregadas.
+FILHO = """
+import os, sys, json, time, contextlib
+inicio = time.perf_counter()
+sys.path.insert(0, {raiz!r})
+from config import CONFIG
+CONFIG["armazenamento"].update(backend="sqlite", caminho={banco!r})
+CONFIG["telemetria"]["ativo"] = False
+CONFIG["cache"]["ativo"] = False
+CONFIG["hedge"]["arquivo"] = None
+with contextlib.redirect_stdout(open(os.devnull, "w")):
+{codigo}
+print(json.dumps({{"segundos": time.perf_counter() - inicio, "pesados": [modulo for modulo in {pesados!r} if modulo in sys.modules]}}))
+"""
+
+CENARIOS = {
+    "importar_main": "import main",
+    "listar": "import main; sys.argv = ['main.py', '--listar']; main.main()",
+    "personagem_em_cache": (
+        "from BuildMyChar import BuildMyCharUI\n"
+        "def proibido(self): raise RuntimeError('chamada à IA numa execução em cache')\n"
+        "BuildMyCharUI.cliente_ia = proibido\n"
+        f"BuildMyCharUI({RESPOSTAS!r}, interativo=False, personagem_id='inicio')"
+    ),
+}
+
+# Cenários que não podem carregar a pilha da IA
+SEM_IA = {"listar", "personagem_em_cache"}
+
+
+# Gera o personagem do cenário em cache, neste processo, com o ClienteFalso.
+def preparar_personagem(banco):
+    from cliente_falso import ClienteFalso
+    from BuildMyChar import BuildMyCharUI
+
+    CONFIG["armazenamento"].update(backend="sqlite", caminho=banco)
+    CONFIG["telemetria"]["ativo"] = False
+    CONFIG["cache"]["ativo"] = False
+    CONFIG["hedge"]["arquivo"] = None
+    CONFIG["limitador"]["requisicoes_por_minuto"] = 10 ** 9
+    CONFIG["limitador"]["tokens_por_minuto"] = 10 ** 12
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        BuildMyCharUI(dict(RESPOSTAS), interativo=False, cliente=ClienteFalso(latencia=("fixa", 0.0, 0.0), semente=42), personagem_id="inicio")
+
+
+# Soma o tempo cumulativo dos módulos de primeiro nível na saída de `-X importtime` e retorna (total em segundos,
+# {módulo: segundos}).
+def ler_importtime(saida):
+    modulos = {}
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|")
+        if not nome[1:].startswith(" "):
+            modulos[nome.strip()] = modulos.get(nome.strip(), 0) + int(cumulativo) / 1_000_000
+
+    return sum(modulos.values()), modulos
+
+
+# Roda o cenário num processo novo e retorna as medidas.
+def executar(codigo, banco):
+    script = FILHO.format(raiz=RAIZ, banco=banco, codigo="    " + codigo.replace("\n", "\n    "), pesados=PESADOS)
+    ambiente = dict(os.environ, GROQ_API_KEY=os.environ.get("GROQ_API_KEY") or "chave-do-benchmark")
+
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True, env=ambiente, cwd=RAIZ)
+    total = time.perf_counter() - inicio
+
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1])
+
+    importacao, modulos = ler_importtime(processo.stderr)
+    filho = json.loads(processo.stdout.strip().splitlines()[-1])
+    return {"processo": total, "dentro": filho["segundos"], "importacao": importacao, "modulos": modulos, "pesados": filho["pesados"]}
+
+
+def bench_cenario(nome, codigo, banco, repeticoes):
+    medidas = [executar(codigo, banco) for _ in range(repeticoes)]
+
+    def mediana(chave):
+        return round(statistics.median(medida[chave] for medida in medidas), 4)
+
+    modulos = medidas[len(medidas) // 2]["modulos"]
+
+    return {
+        "cenario": nome,
+        "tempo_total": mediana("processo"),
+        "tempo_no_processo": mediana("dentro"),
+        "importacao": mediana("importacao"),
+        "mais_lentos": {modulo: round(segundos, 4) for modulo, segundos in sorted(modulos.items(), key=lambda item: -item[1])[:5]},
+        "pesados": sorted(set(modulo for medida in medidas for modulo in medida["pesados"])),
+    }
+
+
+def imprimir(resultado):
+    print(f"\n== {resultado['cenario']} ==")
+    print(f"processo: {resultado['tempo_total'] * 1000:.1f} ms | no processo: {resultado['tempo_no_processo'] * 1000:.1f} ms | importações: {resultado['importacao'] * 1000:.1f} ms | dependências pesadas: {', '.join(resultado['pesados']) or 'nenhuma'}")
+    for modulo, segundos in resultado["mais_lentos"].items():
+        print(f"  {modulo:<24} {segundos * 1000:8.1f} ms")
+
+
+# Compara com um resultado salvo e retorna os cenários que ficaram mais lentos que a tolerância.
+def comparar(resultados, referencia, tolerancia):
+    regressoes = []
+    anteriores = {resultado["cenario"]: resultado for resultado in referencia}
+
+    for resultado in resultados:
+        anterior = anteriores.get(resultado["cenario"])
+        if anterior and resultado["tempo_total"] > anterior["tempo_total"] * (1 + tolerancia):
+            regressoes.append(f"{resultado['cenario']}: {anterior['tempo_total'] * 1000:.1f} ms -> {resultado['tempo_total'] * 1000:.1f} ms")
+
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de inicialização do BuildMyChar.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos por cenário; vale a mediana.")
+    parser.add_argument("--saida", help="Salva o resultado em JSON.")
+    parser.add_argument("--referencia", help="Resultado JSON anterior para detectar regressões.")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita antes de acusar regressão.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        banco = os.path.join(diretorio, "personagens.sqlite3")
+        preparar_personagem(banco)
+        resultados = [bench_cenario(nome, codigo, banco, args.repeticoes) for nome, codigo in CENARIOS.items()]
+
+    for resultado in resultados:
+        imprimir(resultado)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=4)
+
+    falhas = [f"{resultado['cenario']} importou {', '.join(resultado['pesados'])}" for resultado in resultados if resultado["cenario"] in SEM_IA and resultado["pesados"]]
+
+    if args.referencia:
+        with open(args.referencia, "r", encoding="utf-8") as f:
+            falhas += comparar(resultados, json.load(f), args.tolerancia)
+
+    if falhas:
+        print("\nRegressões na inicialização:")
+        for falha in falhas:
+            print(f"  {falha}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
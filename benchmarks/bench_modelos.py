@@ -0,0 +1,118 @@
+# Micro-benchmark da montagem dos modelos de resposta, com e sem o registro de modelos (modelos_ia.py).
+#
+# Para cada especificação usada pelas etapas, mede o custo por chamada de criar o modelo pydantic e gerar o seu JSON
+# schema (usado na chave do cache). Sem o registro, cada chamada cria uma classe nova e refaz os dois passos. Mede
+# também, à parte, a conversão que o instructor faz a cada requisição, como referência do que sobra.
+#
+#   python benchmarks/bench_modelos.py --repeticoes 500
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import List
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import instructor
+from pydantic import create_model, Field
+from modelos_ia import RegistroModelos
+
+# Conversão feita pelo instructor a cada requisição. Nas versões com o núcleo v2, o schema de função fica em um
+# lru_cache indexado pela classe, que só acerta quando a mesma classe é reutilizada.
+try:
+    from instructor.v2.core.response_model import prepare_response_model
+    from instructor.v2.providers.openai.schema import generate_openai_schema
+
+    def converter(modelo):
+        return generate_openai_schema(prepare_response_model(modelo))
+except ImportError:
+    def converter(modelo):
+        return instructor.openai_schema(modelo).openai_schema
+
+
+# Especificações das etapas, montadas com a função que cria os modelos (create_model direto ou o registro).
+def especificacoes(criar):
+    return {
+        "gerar_nome": lambda: criar({
+            "nomes": List[criar({
+                "nome": (str, Field(..., description="Primeiro nome do personagem")),
+                "sobrenome": (str, Field(..., description="Sobrenome do personagem")),
+                "nomecompleto": (str, Field(..., description="Junção do nome com o sobrenome")),
+            })]
+        }),
+        "gerar_slogan": lambda: criar({
+            "slogan": (str, Field(..., description="Slogan do personagem"))
+        }),
+        "gerar_definicao": lambda: criar({
+            "perguntas": (List[criar({
+                "pergunta_id": (str, Field(..., description="Id da pergunta")),
+                "pergunta": (str, Field(..., description="Pergunta a ser respondida")),
+                "resposta": (str, Field(..., description="Resposta da pergunta")),
+            })], Field(..., description="Lista de perguntas e respostas")),
+        }),
+        "criar_dialogos": lambda: criar({
+            "dialogos": (List[
+                criar({
+                    "user1": (str, Field(..., description="Primeiro usuário")),
+                    "msg1": (str, Field(..., description="Mensagem do primeiro usuário")),
+                    "user2": (str, Field(..., description="Segundo usuário")),
+                    "msg2": (str, Field(..., description="Mensagem do segundo usuário")),
+                })
+            ], Field(..., description="Diálogos entre usuários")),
+        }),
+    }
+
+
+# Tempo médio por chamada, em microssegundos, de montar o modelo e obter o seu schema.
+def medir(montar, schema, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        schema(montar())
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+# Tempo médio por chamada, em microssegundos, da conversão do instructor para o mesmo modelo.
+def medir_conversao(modelo, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        converter(modelo)
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark do registro de modelos de resposta.")
+    parser.add_argument("--repeticoes", type=int, default=300, help="Chamadas medidas por especificação.")
+    parser.add_argument("--saida", help="Salva o resultado em JSON.")
+    args = parser.parse_args()
+
+    registro = RegistroModelos()
+    sem_registro = especificacoes(lambda campos: create_model("Modelo", **campos))
+    com_registro = especificacoes(registro.obter)
+
+    resultados = {}
+    for etapa in sem_registro:
+        antes = medir(sem_registro[etapa], lambda modelo: modelo.model_json_schema(), args.repeticoes)
+        depois = medir(com_registro[etapa], registro.schema, args.repeticoes)
+        conversao = medir_conversao(com_registro[etapa](), args.repeticoes)
+        resultados[etapa] = {
+            "sem_registro_us": round(antes, 1),
+            "com_registro_us": round(depois, 1),
+            "economia_us": round(antes - depois, 1),
+            "conversao_instructor_us": round(conversao, 1),
+        }
+
+    print(f"{'etapa':<18} {'sem registro':>14} {'com registro':>14} {'economia':>12} {'instructor':>14}")
+    for etapa, dados in resultados.items():
+        print(f"{etapa:<18} {dados['sem_registro_us']:>12.1f}µs {dados['com_registro_us']:>12.1f}µs {dados['economia_us']:>10.1f}µs {dados['conversao_instructor_us']:>12.1f}µs")
+    print(f"\nregistro: {registro.estatisticas()}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Benchmark do normalizador local de nomes (nomes.py), que substitui a chamada ao corretor da IA.
+#
+# Monta nomes a partir de listas de nomes e sobrenomes brasileiros que NÃO estão no dicionário de acentos do
+# normalizador (os que estiverem são descartados e contados), digitados de jeitos comuns (tudo minúsculo, tudo
+# maiúsculo, sem acentos, com espaços sobrando), e mede o tempo por nome, quantos o normalizador resolve sem a IA e
+# quantos desses saem com o nome errado (um acento perdido que a IA teria corrigido). Os que não são resolvidos
+# aparecem por motivo; são as chamadas que ainda iriam para o corretor da IA.
+#
+#   python benchmarks/bench_nomes.py --nomes 20000
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from nomes import ACENTOS, normalizar_nome, sem_acentos
+
+CANDIDATOS_PRIMEIROS = ["Anísio", "Aurélio", "Benício", "Dalila", "Enéas", "Glória", "Jordão", "Lourenço", "Mércia",
+    "Nélio", "Olívia", "Quitéria", "Rosângela", "Salomão", "Teresinha", "Ubiratã", "Zacarias", "Argemiro", "Jandira",
+    "Cléber", "Wanderléia", "Gilmar", "Edvaldo", "Iara", "Nádia", "Sílvio", "Abílio", "Acácio", "Adélia", "Arlete",
+    "Bráulio", "Cleonice", "Dirceu", "Edileusa", "Eliézer", "Gérson", "Ivonete", "Joaquim", "Lindalva", "Marlene",
+    "Neuza", "Osvaldo", "Raimundo", "Sidnei", "Valdir", "Jurandir"]
+CANDIDATOS_SOBRENOMES = ["Barbosa", "Cavalcanti", "Damasceno", "Fontes", "Gusmão", "Loureiro", "Macêdo", "Peçanha",
+    "Quintão", "Tavares", "Valença", "Xavier", "Bragança", "Furtado", "Albuquerque", "Bezerra", "Calixto", "Figueiró",
+    "Jucá", "Leitão", "Monção", "Nogueira", "Paixão", "Queiroz", "Rebouças", "Tenório", "Vasconcelos", "Coutinho", "Sá",
+    "Aguiar", "Bastos", "Cardoso", "Dantas", "Esteves", "Freitas", "Matos", "Pinheiro", "Rezende", "Siqueira", "Teixeira",
+    "Vieira", "Lacerda", "Medeiros", "Meireles", "Sodré", "Tibúrcio", "Caldas"]
+PARTICULAS = ["", "", "da ", "de ", "dos "]
+
+
+# Só os nomes fora do dicionário do normalizador; devolve a lista e quantos foram descartados.
+def fora_do_dicionario(nomes):
+    fora = [nome for nome in nomes if sem_acentos(nome) not in ACENTOS]
+    return fora, len(nomes) - len(fora)
+
+
+# Nome sorteado e digitado de um jeito comum; devolve o texto digitado e o nome esperado.
+def sortear_nome(aleatorio, primeiros, sobrenomes):
+    primeiro = aleatorio.choice(primeiros)
+    # Alguns nomes compostos com hífen
+    if aleatorio.random() < 0.1:
+        primeiro = f"{primeiro}-{aleatorio.choice(primeiros)}"
+    esperado = f"{primeiro} {aleatorio.choice(PARTICULAS)}{aleatorio.choice(sobrenomes)}"
+    forma = aleatorio.choice(["minusculo", "maiusculo", "sem_acentos", "espacos", "correto"])
+
+    if forma == "minusculo":
+        digitado = esperado.lower()
+    elif forma == "maiusculo":
+        digitado = esperado.upper()
+    elif forma == "sem_acentos":
+        digitado = sem_acentos(esperado)
+    elif forma == "espacos":
+        digitado = "  " + esperado.lower().replace(" ", "   ") + " "
+    else:
+        digitado = esperado
+
+    return digitado, esperado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do normalizador local de nomes.")
+    parser.add_argument("--nomes", type=int, default=20000)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    primeiros, descartados_primeiros = fora_do_dicionario(CANDIDATOS_PRIMEIROS)
+    sobrenomes, descartados_sobrenomes = fora_do_dicionario(CANDIDATOS_SOBRENOMES)
+    aleatorio = random.Random(args.semente)
+    casos = [sortear_nome(aleatorio, primeiros, sobrenomes) for _ in range(args.nomes)]
+
+    inicio = time.perf_counter()
+    resultados = [normalizar_nome(digitado) for digitado, _ in casos]
+    duracao = time.perf_counter() - inicio
+
+    resolvidos = sum(1 for resultado in resultados if resultado["resolvido"])
+    corretos = sum(1 for resultado, (_, esperado) in zip(resultados, casos) if resultado["nome"] == esperado)
+    # Nomes acima do limite perdem os nomes do meio, então não ficam iguais ao esperado
+    encurtados = sum(1 for resultado, (_, esperado) in zip(resultados, casos) if resultado["resolvido"] and len(esperado) > 20)
+    errados = resolvidos - corretos - encurtados
+    motivos = Counter(resultado["motivo"] for resultado in resultados if not resultado["resolvido"])
+
+    print(f"amostra fora do dicionário: {len(primeiros)} nomes e {len(sobrenomes)} sobrenomes "
+        f"({descartados_primeiros + descartados_sobrenomes} descartados por estarem no dicionário)")
+    print(f"{args.nomes} nomes em {duracao * 1000:.1f} ms ({duracao / args.nomes * 1_000_000:.1f} µs por nome)")
+    print(f"resolvidos localmente: {resolvidos} ({resolvidos / args.nomes:.1%}), iguais ao esperado: {corretos} ({corretos / args.nomes:.1%})")
+    print(f"encurtados para 20 caracteres: {encurtados}; resolvidos com o nome errado: {errados} ({errados / args.nomes:.1%})")
+    print(f"iriam para o corretor da IA: {args.nomes - resolvidos}")
+    for motivo, quantidade in motivos.most_common(10):
+        print(f"  {quantidade:>6}  {motivo}")
+
+
+if __name__ == "__main__":
+    main()
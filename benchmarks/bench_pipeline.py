@@ -0,0 +1,319 @@
+# Benchmark do pipeline completo sem rede, usando o ClienteFalso no lugar da Groq.
+#
+# Mede, para um personagem e para N personagens em lote: tempo total, latência por etapa, número de chamadas à IA e
+# de novas tentativas. Com --referencia, compara com um resultado salvo e sai com erro se o tempo piorar além da
+# tolerância, para uso em CI.
+#
+#   python benchmarks/bench_pipeline.py --personagens 20 --saida resultado.json
+#   python benchmarks/bench_pipeline.py --referencia resultado.json --tolerancia 0.25
+#   python benchmarks/bench_pipeline.py --segundos-por-mil-tokens 0.2 --resumo todas
+#   python benchmarks/bench_pipeline.py --limite-definicao 12000 --sem-orcamento
+#   python benchmarks/bench_pipeline.py --sem-rotas
+#   python benchmarks/bench_pipeline.py --personagens 40 --taxa-lentas 0.03 --hedge
+#   python benchmarks/bench_pipeline.py --personagens 200 --simultaneos 200 --requisicoes 64 --assincrono
+#   python benchmarks/bench_pipeline.py --taxa-cortadas 0.2 --taxa-json-invalido 0.05 --sem-reparo
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import contextlib
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from config import CONFIG
+from cliente_falso import ClienteFalso
+from telemetria import obter_telemetria
+from hedge import obter_controle_hedge
+from BuildMyChar import BuildMyCharUI
+import lote
+
+# Eventos do reparo de JSON (reparo_json.py) mostrados no resultado
+EVENTOS_REPARO = ["respostas_cortadas", "json_reparado_local", "json_complementado", "itens_aproveitados", "reenvios_evitados", "complementos_falhos", "json_sem_conserto"]
+
+# Modelo pequeno das rotas, simulado mais rápido (e, com --falhas-modelo-pequeno, menos confiável) que o padrão
+MODELO_PEQUENO = "llama-3.1-8b-instant"
+
+RESPOSTAS = {
+    "Nome": "",
+    "Idade": "27 anos",
+    "Gênero": "Feminino",
+    "Traços de personalidade": "curiosa, teimosa, brincalhona",
+    "Origem": "Salvador, Bahia",
+    "Estilo de fala": "informal, cheia de gírias baianas",
+}
+
+
+class Medicoes:
+    # Acumula as chamadas feitas por etapa em todos os personagens e o maior número de threads vivas durante o cenário.
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.chamadas = defaultdict(int)
+        self.duracoes = defaultdict(list)
+        self.threads = threading.active_count()
+
+    def registrar_chamada(self, etapa):
+        with self.trava:
+            self.chamadas[etapa] += 1
+            self.threads = max(self.threads, threading.active_count())
+
+    def registrar_duracoes(self, duracoes):
+        with self.trava:
+            for etapa, duracao in duracoes.items():
+                self.duracoes[etapa].append(duracao)
+
+
+# Cria uma subclasse de BuildMyCharUI que conta as chamadas de exec_ia e guarda a duração das etapas.
+def classe_medida(medicoes):
+    class BuildMyCharMedido(BuildMyCharUI):
+        def exec_ia(self, *args, etapa:str="", **kwargs):
+            medicoes.registrar_chamada(etapa or "sem_etapa")
+            return super().exec_ia(*args, etapa=etapa, **kwargs)
+
+        async def exec_ia_async(self, *args, etapa:str="", **kwargs):
+            medicoes.registrar_chamada(etapa or "sem_etapa")
+            return await super().exec_ia_async(*args, etapa=etapa, **kwargs)
+
+        def start(self):
+            super().start()
+            medicoes.registrar_duracoes(self.duracoes_etapas)
+
+        async def start_async(self):
+            await super().start_async()
+            medicoes.registrar_duracoes(self.duracoes_etapas)
+
+    return BuildMyCharMedido
+
+
+# Soma de cada evento do reparo de JSON em todas as etapas, para comparar antes e depois do cenário.
+def contar_eventos_reparo():
+    eventos = obter_telemetria().eventos
+    return {evento: sum(contagens.get(evento, 0) for contagens in eventos.values()) for evento in EVENTOS_REPARO}
+
+
+# Resultado do cenário. O custo e os modelos de cada etapa vêm das chamadas que a telemetria registrou no cenário.
+def resumir(nome, inicio, medicoes, cliente, hedge_antes, reparo_antes):
+    chamadas_etapas = sum(medicoes.chamadas.values())
+    registradas = list(obter_telemetria().chamadas)
+    latencias = sorted(chamada["duracao"] for chamada in registradas)
+    hedge = obter_controle_hedge().estatisticas()
+    hedges = hedge["duplicadas"] - hedge_antes["duplicadas"]
+    custos = defaultdict(float)
+    tokens = defaultdict(int)
+    modelos = defaultdict(lambda: defaultdict(int))
+    for chamada in registradas:
+        custos[chamada["etapa"]] += chamada["custo"]
+        tokens[chamada["etapa"]] += chamada["tokens_prompt"]
+        modelos[chamada["etapa"]][chamada["modelo"]] += 1
+
+    return {
+        "cenario": nome,
+        "tempo_total": round(time.perf_counter() - inicio, 4),
+        "chamadas_ia": chamadas_etapas,
+        "chamadas_cliente": cliente.chamadas,
+        "tokens_prompt": cliente.tokens_prompt,
+        "custo": round(sum(custos.values()), 6),
+        "latencia_p50": round(percentil(latencias, 0.5), 4),
+        "latencia_p99": round(percentil(latencias, 0.99), 4),
+        "threads": medicoes.threads,
+        "hedges": hedges,
+        "hedges_vencidos_pela_copia": hedge["vencidas_pela_copia"] - hedge_antes["vencidas_pela_copia"],
+        # Chamadas extras feitas dentro de exec_ia depois de uma falha da API ou de validação (sem as cópias do hedging)
+        "novas_tentativas": cliente.chamadas - chamadas_etapas - hedges,
+        "falhas_simuladas": dict(cliente.falhas),
+        "reparo_json": {evento: quantidade - reparo_antes[evento] for evento, quantidade in contar_eventos_reparo().items()},
+        "etapas": {
+            etapa: {
+                "chamadas": medicoes.chamadas.get(etapa, 0),
+                "latencia_media": round(sum(medicoes.duracoes[etapa]) / len(medicoes.duracoes[etapa]), 4) if medicoes.duracoes.get(etapa) else None,
+                "latencia_maxima": round(max(medicoes.duracoes[etapa]), 4) if medicoes.duracoes.get(etapa) else None,
+                "custo": round(custos.get(etapa, 0.0), 6),
+                "tokens_prompt": tokens.get(etapa, 0),
+                "modelos": dict(modelos.get(etapa, {})),
+            }
+            for etapa in sorted(set(medicoes.duracoes) | set(medicoes.chamadas))
+        },
+    }
+
+
+# Percentil de uma lista já ordenada (0 sem valores).
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(p * len(valores)))] if valores else 0
+
+
+def criar_cliente(args, assincrono:bool=False):
+    return ClienteFalso(
+        latencia=(args.distribuicao, args.latencia, args.desvio),
+        taxa_falhas=args.taxa_falhas,
+        taxa_excesso=args.taxa_excesso,
+        taxa_repeticao=args.taxa_repeticao,
+        segundos_por_mil_tokens=args.segundos_por_mil_tokens,
+        lentidao=(args.taxa_lentas, args.fator_lentas),
+        modelos={MODELO_PEQUENO: {"latencia": args.latencia_modelo_pequeno, "falhas_validacao": args.falhas_modelo_pequeno}},
+        taxa_cortadas=args.taxa_cortadas,
+        taxa_json_invalido=args.taxa_json_invalido,
+        semente=args.semente,
+        assincrono=assincrono,
+    )
+
+
+def bench_um_personagem(args, diretorio):
+    medicoes = Medicoes()
+    cliente = criar_cliente(args)
+    obter_telemetria().reiniciar()
+    hedge_antes = obter_controle_hedge().estatisticas()
+    reparo_antes = contar_eventos_reparo()
+    inicio = time.perf_counter()
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        classe_medida(medicoes)(dict(RESPOSTAS), interativo=False, cliente=cliente, personagem_id="bench_um")
+
+    return resumir("um_personagem", inicio, medicoes, cliente, hedge_antes, reparo_antes)
+
+
+def bench_lote(args, diretorio):
+    medicoes = Medicoes()
+    cliente = criar_cliente(args, assincrono=args.assincrono)
+
+    entrada = os.path.join(diretorio, "respostas.jsonl")
+    with open(entrada, "w", encoding="utf-8") as f:
+        for i in range(args.personagens):
+            f.write(json.dumps(dict(RESPOSTAS, id=f"bench{i}"), ensure_ascii=False) + "\n")
+
+    lote.BuildMyCharUI = classe_medida(medicoes)
+    obter_telemetria().reiniciar()
+    hedge_antes = obter_controle_hedge().estatisticas()
+    reparo_antes = contar_eventos_reparo()
+    inicio = time.perf_counter()
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        if args.assincrono:
+            asyncio.run(lote.executar_lote_async(entrada, os.path.join(diretorio, "saida.jsonl"), personagens_simultaneos=args.simultaneos, requisicoes_simultaneas=args.requisicoes, cliente=cliente))
+        else:
+            lote.executar_lote(entrada, os.path.join(diretorio, "saida.jsonl"), personagens_simultaneos=args.simultaneos, requisicoes_simultaneas=args.requisicoes, cliente=cliente)
+
+    return resumir(f"lote_{args.personagens}_personagens" + ("_async" if args.assincrono else ""), inicio, medicoes, cliente, hedge_antes, reparo_antes)
+
+
+def imprimir(resultado):
+    print(f"\n== {resultado['cenario']} ==")
+    print(f"tempo total: {resultado['tempo_total']:.3f}s | threads: {resultado['threads']} | chamadas à IA: {resultado['chamadas_ia']} | tokens de prompt: {resultado['tokens_prompt']} | custo: ${resultado['custo']:.4f} | latência das chamadas p50 {resultado['latencia_p50']:.3f}s p99 {resultado['latencia_p99']:.3f}s | hedges: {resultado['hedges']} ({resultado['hedges_vencidos_pela_copia']} vencidos pela cópia) | novas tentativas: {resultado['novas_tentativas']} | falhas simuladas: {resultado['falhas_simuladas']}")
+    if any(resultado["reparo_json"].values()):
+        print("reparo de JSON: " + ", ".join(f"{evento} {quantidade}" for evento, quantidade in resultado["reparo_json"].items()))
+    for etapa, dados in resultado["etapas"].items():
+        modelos = ", ".join(f"{modelo} x{quantidade}" for modelo, quantidade in dados["modelos"].items())
+        if dados["latencia_media"] is None:
+            print(f"  {etapa:<24} {'(chamada dentro de outra etapa)':<30} chamadas {dados['chamadas']:<4} prompt {dados['tokens_prompt']:<7} ${dados['custo']:.4f}  {modelos}")
+        else:
+            print(f"  {etapa:<24} média {dados['latencia_media']:.3f}s  máx {dados['latencia_maxima']:.3f}s  chamadas {dados['chamadas']:<4} prompt {dados['tokens_prompt']:<7} ${dados['custo']:.4f}  {modelos}")
+
+
+# Compara com um resultado salvo e retorna os cenários que ficaram mais lentos que a tolerância.
+def comparar(resultados, referencia, tolerancia):
+    regressoes = []
+    anteriores = {resultado["cenario"]: resultado for resultado in referencia}
+
+    for resultado in resultados:
+        anterior = anteriores.get(resultado["cenario"])
+        if anterior and resultado["tempo_total"] > anterior["tempo_total"] * (1 + tolerancia):
+            regressoes.append(f"{resultado['cenario']}: {anterior['tempo_total']:.3f}s -> {resultado['tempo_total']:.3f}s")
+
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline do BuildMyChar.")
+    parser.add_argument("--personagens", type=int, default=10, help="Personagens no cenário em lote.")
+    parser.add_argument("--simultaneos", type=int, default=4, help="Personagens gerados ao mesmo tempo no lote.")
+    parser.add_argument("--requisicoes", type=int, default=16, help="Requisições à IA em andamento no lote.")
+    parser.add_argument("--distribuicao", default="lognormal", choices=["fixa", "normal", "lognormal", "uniforme"])
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latência média simulada por chamada, em segundos.")
+    parser.add_argument("--desvio", type=float, default=0.02, help="Desvio da latência simulada, em segundos.")
+    parser.add_argument("--taxa-falhas", type=float, default=0.0)
+    parser.add_argument("--taxa-excesso", type=float, default=0.0)
+    parser.add_argument("--taxa-cortadas", type=float, default=0.0, help="Probabilidade de uma resposta simulada chegar cortada no meio do JSON.")
+    parser.add_argument("--taxa-json-invalido", type=float, default=0.0, help="Probabilidade de uma resposta simulada vir com uma vírgula sobrando no JSON.")
+    parser.add_argument("--sem-reparo", action="store_true", help="Desliga o reparo de JSON: toda resposta estragada é pedida de novo por inteiro.")
+    parser.add_argument("--taxa-repeticao", type=float, default=0.0, help="Probabilidade de cada diálogo simulado repetir um anterior.")
+    parser.add_argument("--candidatos", type=int, default=CONFIG["candidatos"]["quantidade"], help="Opções pedidas por requisição nos textos com limite (1 desativa).")
+    parser.add_argument("--segundos-por-mil-tokens", type=float, default=0.0, help="Latência simulada somada por mil tokens de prompt.")
+    parser.add_argument("--resumo", default="", help="Etapas que usam o resumo no lugar da descrição geral, separadas por vírgula, ou \"todas\".")
+    parser.add_argument("--sem-agrupar", action="store_true", help="Uma requisição por template de definição, sem pacotes.")
+    parser.add_argument("--limite-definicao", type=int, default=CONFIG["dialogos"]["orcamento"]["limite_caracteres"], help="Limite de caracteres da definição final.")
+    parser.add_argument("--sem-orcamento", action="store_true", help="Pede diálogos até o alvo, sem medir o espaço que sobra na definição.")
+    parser.add_argument("--sem-rotas", action="store_true", help="Todas as etapas no modelo padrão, ignorando o modelo das rotas.")
+    parser.add_argument("--latencia-modelo-pequeno", type=float, default=0.35, help=f"Fator da latência simulada do {MODELO_PEQUENO}.")
+    parser.add_argument("--falhas-modelo-pequeno", type=float, default=0.0, help=f"Probabilidade de uma resposta inválida do {MODELO_PEQUENO}.")
+    parser.add_argument("--taxa-lentas", type=float, default=0.0, help="Probabilidade de uma chamada simulada travar.")
+    parser.add_argument("--fator-lentas", type=float, default=20.0, help="Quantas vezes a chamada travada demora mais.")
+    parser.add_argument("--hedge", action="store_true", help="Liga o hedging das chamadas (CONFIG[\"hedge\"]).")
+    parser.add_argument("--assincrono", action="store_true", help="Roda o lote com lote.executar_lote_async, num único loop asyncio.")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Salva o resultado em JSON.")
+    parser.add_argument("--referencia", help="Resultado JSON anterior para detectar regressões.")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita antes de acusar regressão.")
+    args = parser.parse_args()
+
+    # Sem cache e sem limite de taxa: o benchmark mede o pipeline, não a conta da Groq
+    CONFIG["cache"]["ativo"] = False
+    CONFIG["limitador"]["requisicoes_por_minuto"] = 10 ** 9
+    CONFIG["limitador"]["tokens_por_minuto"] = 10 ** 12
+    CONFIG["lote"]["rodadas_extras"] = 3
+    # Cada cenário guarda todas as suas chamadas, para os percentis de latência
+    CONFIG["telemetria"]["max_registros"] = None
+    CONFIG["reparo_json"]["ativo"] = not args.sem_reparo
+    CONFIG["candidatos"]["ativo"] = args.candidatos > 1
+    CONFIG["candidatos"]["quantidade"] = args.candidatos
+    CONFIG["definicao"]["agrupar"] = not args.sem_agrupar
+    CONFIG["dialogos"]["orcamento"]["ativo"] = not args.sem_orcamento
+    CONFIG["dialogos"]["orcamento"]["limite_caracteres"] = args.limite_definicao
+    # As latências simuladas são curtas: sem espera mínima, e o histograma (na pasta temporária) não vem de execuções
+    # anteriores
+    CONFIG["hedge"].update(ativo=args.hedge, espera_minima=0.0)
+    if args.sem_rotas:
+        for rota in CONFIG["ia"]["rotas"].values():
+            rota.pop("modelo", None)
+    if args.resumo == "todas":
+        CONFIG["resumo"]["etapas"] = ["gerar_slogan", "criar_descricao", "gerar_saudacao", "gerar_etiquetas", "gerar_definicao", "criar_dialogos"]
+    else:
+        CONFIG["resumo"]["etapas"] = [etapa.strip() for etapa in args.resumo.split(",") if etapa.strip()]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Personagens, relatórios, histograma do hedge e caches do benchmark numa pasta temporária, sem misturar com
+        # os arquivos de uma execução real em temp/
+        CONFIG["armazenamento"]["backend"] = "sqlite"
+        CONFIG["armazenamento"]["caminho"] = os.path.join(diretorio, "personagens.sqlite3")
+        CONFIG["telemetria"]["relatorio_json"] = os.path.join(diretorio, "relatorio_execucao.json")
+        CONFIG["telemetria"]["prometheus"] = os.path.join(diretorio, "metricas.prom")
+        CONFIG["hedge"]["arquivo"] = os.path.join(diretorio, "latencias_etapas.json")
+        CONFIG["cache"]["caminho"] = os.path.join(diretorio, "cache_ia.sqlite3")
+        CONFIG["catalogo"]["cache"] = os.path.join(diretorio, "catalogo_templates.json")
+        resultados = [bench_um_personagem(args, diretorio), bench_lote(args, diretorio)]
+
+    for resultado in resultados:
+        imprimir(resultado)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=4)
+
+    if args.referencia:
+        with open(args.referencia, "r", encoding="utf-8") as f:
+            regressoes = comparar(resultados, json.load(f), args.tolerancia)
+
+        if regressoes:
+            print("\nRegressões de desempenho:")
+            for regressao in regressoes:
+                print(f"  {regressao}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
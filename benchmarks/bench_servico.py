@@ -0,0 +1,236 @@
+# Teste de ponta a ponta e benchmark do modo serviço (servico.py), com o ClienteFalso no lugar da Groq.
+#
+# Sobe o serviço numa porta livre, envia N trabalhos por HTTP (uma parte com prioridade maior), acompanha o fluxo SSE
+# de cada um até o evento "fim" e consulta /metricas durante a execução. Mostra a vazão, a espera na fila por
+# prioridade, o tempo de execução, a maior profundidade da fila e a utilização dos workers. Sai com erro se algum
+# trabalho não terminar com a definição final ou se o fluxo de eventos vier fora de ordem; com --referencia, também
+# se o tempo total piorar além da tolerância.
+#
+#   python benchmarks/bench_servico.py --trabalhos 40 --workers 4 --saida servico.json
+#   python benchmarks/bench_servico.py --referencia servico.json --tolerancia 0.25
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from config import CONFIG
+from cliente_falso import ClienteFalso
+from servico import criar_servico, parar_servico
+
+RESPOSTAS = {
+    "Nome": "",
+    "Idade": "27 anos",
+    "Gênero": "Feminino",
+    "Traços de personalidade": "curiosa, teimosa, brincalhona",
+    "Origem": "Salvador, Bahia",
+    "Estilo de fala": "informal, cheia de gírias baianas",
+}
+
+
+def pedir(url, dados=None):
+    corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8") if dados is not None else None
+    pedido = urllib.request.Request(url, data=corpo, headers={"Content-Type": "application/json"} if corpo else {})
+    with urllib.request.urlopen(pedido) as resposta:
+        return json.loads(resposta.read())
+
+
+# Lê o fluxo SSE do trabalho até o fim e retorna a lista de eventos, cada um com o momento em que chegou.
+def acompanhar(url):
+    eventos = []
+    dados = []
+
+    with urllib.request.urlopen(url) as resposta:
+        for linha in resposta:
+            linha = linha.decode("utf-8").rstrip("\n")
+            if linha.startswith("data:"):
+                dados.append(linha[len("data:"):].strip())
+            elif not linha and dados:
+                evento = json.loads("\n".join(dados))
+                evento["recebido"] = time.time()
+                eventos.append(evento)
+                dados = []
+
+    return eventos
+
+
+# Consulta /metricas até `parar` ser marcado, guardando a maior fila e os workers ocupados.
+def amostrar(url, parar, amostras):
+    while not parar.is_set():
+        amostras.append(pedir(url))
+        parar.wait(0.05)
+
+
+# Problemas no fluxo de eventos de um trabalho: precisa começar pela fila, ter o início, o progresso das etapas e dos
+# artefatos, e terminar com o "fim".
+def verificar_eventos(eventos):
+    tipos = [evento["tipo"] for evento in eventos]
+    problemas = []
+
+    if tipos[:2] != ["fila", "inicio"]:
+        problemas.append(f"começa com {tipos[:2]}")
+    if not tipos or tipos[-1] != "fim" or tipos.count("fim") != 1:
+        problemas.append("não termina com um único evento fim")
+    for tipo in ("etapa", "artefato"):
+        if tipo not in tipos:
+            problemas.append(f"sem eventos {tipo}")
+
+    return problemas
+
+
+# Percentil de uma lista já ordenada (0 sem valores).
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(p * len(valores)))] if valores else 0
+
+
+def bench_servico(args):
+    cliente = ClienteFalso(latencia=(args.distribuicao, args.latencia, args.desvio), taxa_falhas=args.taxa_falhas, semente=args.semente)
+    servidor = criar_servico("127.0.0.1", 0, workers=args.workers, requisicoes_simultaneas=args.requisicoes, cliente=cliente)
+    base = f"http://127.0.0.1:{servidor.server_address[1]}"
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    # A cada `args.prioritarios` trabalhos, um vai com prioridade maior
+    pedidos = [dict(RESPOSTAS, id=f"servico{i}", prioridade=10 if args.prioritarios and i % args.prioritarios == 0 else 0) for i in range(args.trabalhos)]
+    fluxos = {}
+    amostras = []
+    parar = threading.Event()
+
+    def seguir(trabalho_id):
+        fluxos[trabalho_id] = acompanhar(f"{base}/trabalhos/{trabalho_id}/eventos")
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        amostrador = threading.Thread(target=amostrar, args=(f"{base}/metricas", parar, amostras), daemon=True)
+        amostrador.start()
+        inicio = time.perf_counter()
+
+        seguidores = []
+        for dados in pedidos:
+            trabalho = pedir(f"{base}/trabalhos", dados)
+            seguidor = threading.Thread(target=seguir, args=(trabalho["id"],), daemon=True)
+            seguidor.start()
+            seguidores.append(seguidor)
+
+        for seguidor in seguidores:
+            seguidor.join()
+        tempo_total = time.perf_counter() - inicio
+
+        parar.set()
+        amostrador.join()
+        finais = {dados["id"]: pedir(f"{base}/trabalhos/{dados['id']}") for dados in pedidos}
+        metricas = pedir(f"{base}/metricas")
+        parar_servico(servidor)
+
+    problemas = []
+    for dados in pedidos:
+        trabalho_id = dados["id"]
+        final = finais[trabalho_id]
+        problemas += [f"{trabalho_id}: fluxo {problema}" for problema in verificar_eventos(fluxos.get(trabalho_id, []))]
+        if final["estado"] != "concluido" or not (final["resultado"] or {}).get("definicao_final"):
+            problemas.append(f"{trabalho_id}: terminou como {final['estado']} sem a definição final")
+        elif fluxos[trabalho_id][-1]["resultado"]["definicao_final"] != final["resultado"]["definicao_final"]:
+            problemas.append(f"{trabalho_id}: definição final do fluxo diferente da consulta")
+
+    esperas = {}
+    for dados in pedidos:
+        resultado = finais[dados["id"]]["resultado"] or {}
+        if "espera_fila" in resultado:
+            esperas.setdefault(dados["prioridade"], []).append(resultado["espera_fila"])
+    execucoes = sorted(final["resultado"]["tempo_execucao"] for final in finais.values() if (final["resultado"] or {}).get("tempo_execucao") is not None)
+    # Do envio ao primeiro artefato salvo, como quem acompanha o progresso pelo SSE veria
+    primeiros = sorted(
+        next(evento["recebido"] for evento in fluxo if evento["tipo"] == "artefato") - fluxo[0]["momento"]
+        for fluxo in fluxos.values() if any(evento["tipo"] == "artefato" for evento in fluxo)
+    )
+
+    return {
+        "cenario": f"servico_{args.trabalhos}_trabalhos_{args.workers}_workers",
+        "tempo_total": round(tempo_total, 4),
+        "vazao": round(args.trabalhos / tempo_total, 3),
+        "chamadas_cliente": cliente.chamadas,
+        "espera_fila": {
+            str(prioridade): {"p50": round(percentil(sorted(valores), 0.5), 4), "p95": round(percentil(sorted(valores), 0.95), 4)}
+            for prioridade, valores in sorted(esperas.items(), reverse=True)
+        },
+        "execucao_p50": round(percentil(execucoes, 0.5), 4),
+        "execucao_p95": round(percentil(execucoes, 0.95), 4),
+        "primeiro_artefato_p50": round(percentil(primeiros, 0.5), 4),
+        "eventos_por_trabalho": round(sum(len(fluxo) for fluxo in fluxos.values()) / max(len(fluxos), 1), 1),
+        "fila_maxima": metricas["fila_maxima"],
+        "workers_ocupados_max": max((amostra["workers_ocupados"] for amostra in amostras), default=0),
+        "utilizacao": metricas["utilizacao"],
+        "totais": metricas["totais"],
+        "problemas": problemas,
+    }
+
+
+def imprimir(resultado):
+    print(f"\n== {resultado['cenario']} ==")
+    print(f"tempo total: {resultado['tempo_total']:.3f}s | vazão: {resultado['vazao']:.2f} personagens/s | chamadas à IA: {resultado['chamadas_cliente']} | eventos por trabalho: {resultado['eventos_por_trabalho']}")
+    print(f"fila máxima: {resultado['fila_maxima']} | workers ocupados (máx): {resultado['workers_ocupados_max']} | utilização: {resultado['utilizacao'] * 100:.1f}% | trabalhos: {resultado['totais']}")
+    print(f"execução p50 {resultado['execucao_p50']:.3f}s p95 {resultado['execucao_p95']:.3f}s | primeiro artefato p50 {resultado['primeiro_artefato_p50']:.3f}s")
+    for prioridade, espera in resultado["espera_fila"].items():
+        print(f"  espera na fila, prioridade {prioridade:>3}: p50 {espera['p50']:.3f}s  p95 {espera['p95']:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de ponta a ponta e benchmark do serviço de personagens.")
+    parser.add_argument("--trabalhos", type=int, default=20, help="Trabalhos enviados ao serviço.")
+    parser.add_argument("--workers", type=int, default=4, help="Workers do serviço.")
+    parser.add_argument("--requisicoes", type=int, default=16, help="Requisições à IA em andamento no serviço.")
+    parser.add_argument("--prioritarios", type=int, default=4, help="Um a cada N trabalhos vai com prioridade maior (0 desativa).")
+    parser.add_argument("--distribuicao", default="lognormal", choices=["fixa", "normal", "lognormal", "uniforme"])
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latência média simulada por chamada, em segundos.")
+    parser.add_argument("--desvio", type=float, default=0.02, help="Desvio da latência simulada, em segundos.")
+    parser.add_argument("--taxa-falhas", type=float, default=0.0)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Salva o resultado em JSON.")
+    parser.add_argument("--referencia", help="Resultado JSON anterior para detectar regressões.")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita antes de acusar regressão.")
+    args = parser.parse_args()
+
+    # Sem cache, sem limite de taxa e sem telemetria em disco: o benchmark mede o serviço, não a conta da Groq
+    CONFIG["cache"]["ativo"] = False
+    CONFIG["limitador"]["requisicoes_por_minuto"] = 10 ** 9
+    CONFIG["limitador"]["tokens_por_minuto"] = 10 ** 12
+    CONFIG["lote"]["rodadas_extras"] = 3
+    CONFIG["telemetria"]["ativo"] = False
+    CONFIG["hedge"].update(ativo=False, arquivo=None)
+    CONFIG["servico"]["log_requisicoes"] = False
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        CONFIG["armazenamento"]["backend"] = "sqlite"
+        CONFIG["armazenamento"]["caminho"] = os.path.join(diretorio, "personagens.sqlite3")
+        resultado = bench_servico(args)
+
+    imprimir(resultado)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump([resultado], f, ensure_ascii=False, indent=4)
+
+    falhas = list(resultado["problemas"])
+    if args.referencia:
+        with open(args.referencia, "r", encoding="utf-8") as f:
+            anteriores = {anterior["cenario"]: anterior for anterior in json.load(f)}
+        anterior = anteriores.get(resultado["cenario"])
+        if anterior and resultado["tempo_total"] > anterior["tempo_total"] * (1 + args.tolerancia):
+            falhas.append(f"{resultado['cenario']}: {anterior['tempo_total']:.3f}s -> {resultado['tempo_total']:.3f}s")
+
+    if falhas:
+        print("\nProblemas no serviço:")
+        for falha in falhas:
+            print(f"  {falha}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
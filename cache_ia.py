@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from config import CONFIG
+from modelos_ia import obter_registro
+
+
+class CacheRespostas:
+    # Cache em disco (SQLite) das respostas da IA, endereçado pelo hash da requisição completa.
+    def __init__(self, caminho:str, *, max_entradas:int=10000, max_megabytes:float=200, max_idade_dias:float=30):
+        diretorio = os.path.dirname(caminho)
+        if diretorio and not os.path.exists(diretorio):
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.max_entradas = max_entradas
+        self.max_bytes = int(max_megabytes * 1024 * 1024)
+        self.max_idade = max_idade_dias * 24 * 60 * 60
+        self.acertos = 0
+        self.faltas = 0
+        self.ignoradas = 0
+        self.trava = threading.Lock()
+
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                resposta TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                criado REAL NOT NULL,
+                acessado REAL NOT NULL
+            )
+        """)
+        self.conexao.execute("CREATE INDEX IF NOT EXISTS respostas_acessado ON respostas (acessado)")
+        self.conexao.commit()
+
+    # Gera a chave da requisição: modelo, mensagens, schema JSON do modelo de resposta, parâmetros de amostragem e
+    # limite de tokens da resposta, já resolvidos pela rota da etapa.
+    @staticmethod
+    def gerar_chave(model, messages, json_schema, temperature, top_p, max_tokens=None):
+        requisicao = {
+            "model": model,
+            "messages": messages,
+            "schema": obter_registro().schema(json_schema),
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_tokens": max_tokens,
+        }
+        texto = json.dumps(requisicao, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    # Retorna a resposta salva para a chave, ou None se não existir ou estiver expirada.
+    def obter(self, chave):
+        agora = time.time()
+
+        with self.trava:
+            linha = self.conexao.execute("SELECT resposta, criado FROM respostas WHERE chave = ?", (chave,)).fetchone()
+
+            if linha is None or agora - linha[1] > self.max_idade:
+                self.faltas += 1
+                return None
+
+            self.conexao.execute("UPDATE respostas SET acessado = ? WHERE chave = ?", (agora, chave))
+            self.conexao.commit()
+            self.acertos += 1
+
+        return json.loads(linha[0])
+
+    # Salva a resposta e aplica a remoção por idade e tamanho.
+    def salvar(self, chave, resposta):
+        texto = json.dumps(resposta, ensure_ascii=False)
+        agora = time.time()
+
+        with self.trava:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO respostas (chave, resposta, tamanho, criado, acessado) VALUES (?, ?, ?, ?, ?)",
+                (chave, texto, len(texto.encode("utf-8")), agora, agora)
+            )
+            self.remover_excedentes(agora)
+            self.conexao.commit()
+
+    # Remove as entradas expiradas e, se o cache passar do limite de entradas ou de tamanho, as menos acessadas.
+    def remover_excedentes(self, agora):
+        self.conexao.execute("DELETE FROM respostas WHERE criado < ?", (agora - self.max_idade,))
+
+        total, tamanho = self.conexao.execute("SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()
+        if total <= self.max_entradas and tamanho <= self.max_bytes:
+            return
+
+        excedente_bytes = tamanho - self.max_bytes
+        remover = []
+        for chave, tamanho_entrada in self.conexao.execute("SELECT chave, tamanho FROM respostas ORDER BY acessado"):
+            if total <= self.max_entradas and excedente_bytes <= 0:
+                break
+            remover.append((chave,))
+            total -= 1
+            excedente_bytes -= tamanho_entrada
+
+        self.conexao.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+
+    # Conta uma chamada que não consultou o cache por ter sido dispensada na chamada ou na etapa.
+    def registrar_ignorada(self):
+        with self.trava:
+            self.ignoradas += 1
+
+    # Contadores de uso do cache.
+    def estatisticas(self):
+        with self.trava:
+            total, tamanho = self.conexao.execute("SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()
+
+        return {
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "ignoradas": self.ignoradas,
+            "entradas": total,
+            "bytes": tamanho,
+        }
+
+
+_cache = None
+_trava_cache = threading.Lock()
+
+
+# Retorna o cache compartilhado por todos os personagens do processo, ou None se estiver desativado em CONFIG["cache"].
+def obter_cache():
+    global _cache
+
+    if not CONFIG["cache"]["ativo"]:
+        return None
+
+    with _trava_cache:
+        if _cache is None:
+            _cache = CacheRespostas(
+                CONFIG["cache"]["caminho"],
+                max_entradas=CONFIG["cache"]["max_entradas"],
+                max_megabytes=CONFIG["cache"]["max_megabytes"],
+                max_idade_dias=CONFIG["cache"]["max_idade_dias"],
+            )
+
+    return _cache
@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import threading
+from config import CONFIG, PROMPT
+from telemetria import gravar_atomico
+
+# Muda quando o formato dos templates compilados muda, invalidando os caches em disco antigos
+VERSAO = 1
+
+
+class CatalogoTemplates:
+    # Templates de definição validados e compilados uma vez: os trechos de prompt já formatados e as perguntas
+    # indexadas por `indice`, para consulta em O(1). Os templates compilados ficam num cache em disco, com o mtime e o
+    # hash de cada arquivo; outro processo (ou a próxima execução) só recompila os arquivos que mudaram.
+    def __init__(self, diretorio:str, caminho_cache:str=None):
+        self.diretorio = diretorio
+        self.caminho_cache = caminho_cache
+        self.trava = threading.Lock()
+        self.arquivos = {}
+        self.templates = []
+        self.por_identificador = {}
+        self.erros = {}
+        self.compilados = 0
+        self.prompts = hash_prompts()
+
+        if caminho_cache and os.path.exists(caminho_cache):
+            try:
+                with open(caminho_cache, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+                if (cache.get("versao"), cache.get("diretorio"), cache.get("prompts")) == (VERSAO, os.path.abspath(diretorio), self.prompts):
+                    self.arquivos = cache.get("arquivos", {})
+            except (OSError, ValueError):
+                self.arquivos = {}
+
+    # Confere o mtime de cada arquivo da pasta e recompila só os que mudaram. Um mtime novo com o mesmo conteúdo
+    # (arquivo salvo sem alterações) reaproveita o template compilado.
+    def atualizar(self):
+        with self.trava:
+            # Com outro prompt de seção, os trechos compilados não valem mais
+            if self.prompts != hash_prompts():
+                self.arquivos = {}
+                self.prompts = hash_prompts()
+
+            nomes = sorted(nome for nome in os.listdir(self.diretorio) if nome.endswith('.json')) if os.path.isdir(self.diretorio) else []
+            arquivos = {}
+            alterado = set(nomes) != set(self.arquivos)
+
+            for nome in nomes:
+                caminho = os.path.join(self.diretorio, nome)
+                mtime = os.stat(caminho).st_mtime_ns
+                anterior = self.arquivos.get(nome)
+
+                if anterior and anterior["mtime"] == mtime:
+                    arquivos[nome] = anterior
+                    continue
+
+                with open(caminho, 'rb') as f:
+                    conteudo = f.read()
+                hash_arquivo = hashlib.sha256(conteudo).hexdigest()
+
+                if anterior and anterior["hash"] == hash_arquivo:
+                    arquivos[nome] = dict(anterior, mtime=mtime)
+                else:
+                    arquivos[nome] = dict(compilar_template(nome, conteudo), mtime=mtime, hash=hash_arquivo)
+                    self.compilados += 1
+                alterado = True
+
+            self.arquivos = arquivos
+            self.indexar()
+
+            if alterado and self.caminho_cache:
+                gravar_atomico(self.caminho_cache, json.dumps({"versao": VERSAO, "diretorio": os.path.abspath(self.diretorio), "prompts": self.prompts, "arquivos": arquivos}, ensure_ascii=False))
+
+        return self.templates
+
+    # Monta a lista de templates válidos na ordem dos arquivos e o índice por identificador.
+    def indexar(self):
+        self.templates = []
+        self.por_identificador = {}
+        self.erros = {}
+
+        for nome, entrada in self.arquivos.items():
+            template = entrada.get("template")
+            if template is None:
+                self.erros[nome] = entrada["erro"]
+            elif template["identificador"] in self.por_identificador:
+                self.erros[nome] = f"Identificador '{template['identificador']}' repetido em {self.por_identificador[template['identificador']]['arquivo']}."
+            else:
+                self.templates.append(template)
+                self.por_identificador[template["identificador"]] = template
+
+    def template(self, identificador):
+        return self.por_identificador.get(identificador)
+
+    # Pergunta do template pelo seu `indice`, ou None.
+    def pergunta(self, identificador, indice):
+        template = self.por_identificador.get(identificador)
+        if template is None or indice not in template["indices"]:
+            return None
+        return template["perguntas"][template["indices"][indice]]
+
+
+# Valida o conteúdo de um arquivo de template e devolve {"template": ...} com os trechos de prompt prontos, ou
+# {"erro": ...} explicando o problema.
+def compilar_template(nome, conteudo):
+    try:
+        dados = json.loads(conteudo)
+    except ValueError as e:
+        return {"template": None, "erro": f"JSON inválido: {e}"}
+
+    if not isinstance(dados, dict) or not dados:
+        return {"template": None, "erro": "Template vazio ou malformado."}
+
+    identificador = list(dados.keys())[0]
+    template = dados[identificador]
+    perguntas = template.get("perguntas") if isinstance(template, dict) else None
+    if not isinstance(perguntas, list) or not perguntas:
+        return {"template": None, "erro": "Template sem a lista de perguntas."}
+
+    indices = {}
+    for posicao, pergunta in enumerate(perguntas):
+        if not isinstance(pergunta, dict) or not all(isinstance(pergunta.get(campo), str) and pergunta[campo] for campo in ("indice", "pergunta", "resposta")):
+            return {"template": None, "erro": f"Pergunta {posicao + 1} sem indice, pergunta ou resposta."}
+        if pergunta["indice"] in indices:
+            return {"template": None, "erro": f"Indice '{pergunta['indice']}' repetido."}
+        indices[pergunta["indice"]] = posicao
+
+    instrucao = template.get("instrucao", "")
+    instrucao = f"- {instrucao}" if instrucao else ""
+
+    # Perguntas como vão no prompt: de um template sozinho e, no prompt agrupado, com o identificador na frente do id
+    lista = json.dumps([{"pergunta_id": pergunta["indice"], "pergunta": pergunta["pergunta"], "resposta": ""} for pergunta in perguntas], ensure_ascii=False)
+    lista_agrupada = json.dumps([{"pergunta_id": f"{identificador}.{pergunta['indice']}", "pergunta": pergunta["pergunta"], "resposta": ""} for pergunta in perguntas], ensure_ascii=False)
+
+    return {"template": {
+        "arquivo": nome,
+        "identificador": identificador,
+        "titulo": template.get("titulo", ""),
+        "instrucao": instrucao,
+        "perguntas": perguntas,
+        "indices": indices,
+        "lista": lista,
+        "secao": PROMPT["PROMPT_INSTRUCAO_SECAO"].format(titulo=template.get("titulo", identificador), instrucao=instrucao, lista=lista_agrupada),
+    }}
+
+
+# Hash dos prompts usados na compilação: mudar o prompt de seção invalida os trechos guardados no cache em disco.
+def hash_prompts():
+    return hashlib.sha256(PROMPT["PROMPT_INSTRUCAO_SECAO"].encode("utf-8")).hexdigest()
+
+
+_catalogos = {}
+_trava_catalogos = threading.Lock()
+
+
+# Retorna o catálogo da pasta de templates, compartilhado pelo processo e atualizado pelo mtime dos arquivos.
+def obter_catalogo(diretorio):
+    with _trava_catalogos:
+        if diretorio not in _catalogos:
+            _catalogos[diretorio] = CatalogoTemplates(diretorio, CONFIG["catalogo"]["cache"] if CONFIG["catalogo"]["ativo"] else None)
+        catalogo = _catalogos[diretorio]
+
+    catalogo.atualizar()
+    return catalogo
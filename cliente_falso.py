@@ -0,0 +1,349 @@
+import re
+import math
+import time
+import asyncio
+import random
+import typing
+import threading
+from types import SimpleNamespace
+import httpx
+import groq
+from pydantic import BaseModel, ValidationError
+
+PALAVRAS = (
+    "ela sempre carrega um caderno velho cheio de desenhos e anota tudo o que ouve nas ruas da cidade "
+    "fala rápido quando está nervosa ri alto das próprias piadas e guarda segredos com um cuidado quase exagerado "
+    "cresceu numa casa barulhenta perto do porto aprendeu cedo a negociar e nunca perde uma boa conversa"
+).split()
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor", "Isabela", "João"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Pereira", "Costa", "Rodrigues", "Almeida", "Nascimento", "Lima", "Araújo"]
+ETIQUETAS = ["Adventure", "Comedy", "Slice of Life", "Romance", "Mystery/Thriller", "Kind", "Best friend", "Drama"]
+FALANTES = ["char", "user", "random_user_1", "random_user_2"]
+
+
+class ClienteFalso:
+    # Substituto local do cliente `instructor.patch(Groq(...))`, para medir o pipeline sem rede e sem gastar cota.
+    # Devolve respostas válidas para qualquer modelo criado por `gerar_modelo`, com latência, falhas e textos acima
+    # do limite configuráveis.
+    #
+    # latencia: (distribuição, média, desvio) em segundos; distribuição "fixa", "normal", "lognormal" ou "uniforme".
+    # taxa_falhas: probabilidade de cada chamada falhar, sorteando entre `tipos_falha`.
+    # taxa_excesso: probabilidade de um texto com limite de caracteres no prompt vir acima do limite.
+    # taxa_repeticao: probabilidade de cada diálogo repetir um diálogo já devolvido antes, com pequenas mudanças.
+    # segundos_por_mil_tokens: latência somada por mil tokens de prompt, como o processamento da entrada no modelo.
+    # lentidao: (probabilidade, fator) de uma chamada travar, com a latência multiplicada pelo fator.
+    # modelos: por nome de modelo, {"latencia": fator aplicado à latência, "falhas_validacao": probabilidade de uma
+    #   resposta inválida}, para simular modelos pequenos mais rápidos e menos confiáveis.
+    # assincrono: `create` vira corrotina, como no cliente `instructor.patch(AsyncGroq(...))`.
+    # taxa_cortadas: probabilidade de a resposta chegar cortada no meio do JSON (como no limite de tokens).
+    # taxa_json_invalido: probabilidade de a resposta completa vir com uma vírgula sobrando no fim do JSON.
+    # As duas falham como o instructor: ValidationError `json_invalid` do pydantic, com o texto recebido.
+    def __init__(self, *, latencia=("lognormal", 0.5, 0.3), taxa_falhas:float=0.0, tipos_falha=("validacao", "limite", "timeout"), taxa_excesso:float=0.0, taxa_repeticao:float=0.0, segundos_por_mil_tokens:float=0.0, lentidao=(0.0, 1.0), modelos:dict=None, taxa_cortadas:float=0.0, taxa_json_invalido:float=0.0, assincrono:bool=False, semente=None):
+        self.latencia = latencia
+        self.taxa_falhas = taxa_falhas
+        self.taxa_cortadas = taxa_cortadas
+        self.taxa_json_invalido = taxa_json_invalido
+        self.tipos_falha = tipos_falha
+        self.taxa_excesso = taxa_excesso
+        self.taxa_repeticao = taxa_repeticao
+        self.segundos_por_mil_tokens = segundos_por_mil_tokens
+        self.lentidao = lentidao
+        self.modelos = modelos or {}
+        self.assincrono = assincrono
+        self.chamadas_modelo = {}
+        self.dialogos = []
+        self.aleatorio = random.Random(semente)
+        self.trava = threading.Lock()
+        self.chamadas = 0
+        self.tokens_prompt = 0
+        self.falhas = {}
+        self.chat = _Chat(self)
+
+    # Sorteia a latência de uma chamada conforme a distribuição configurada.
+    def sortear_latencia(self):
+        distribuicao, media, desvio = self.latencia
+
+        with self.trava:
+            if distribuicao == "fixa":
+                valor = media
+            elif distribuicao == "normal":
+                valor = self.aleatorio.gauss(media, desvio)
+            elif distribuicao == "uniforme":
+                valor = self.aleatorio.uniform(media - desvio, media + desvio)
+            elif distribuicao == "lognormal":
+                # Parametrizada pela média e desvio da própria latência, não do logaritmo
+                sigma2 = (desvio / media) ** 2 if media else 0
+                valor = self.aleatorio.lognormvariate(math.log(media) - 0.5 * math.log1p(sigma2), sigma2 ** 0.5) if media > 0 else 0.0
+            else:
+                raise ValueError(f"Distribuição de latência desconhecida: {distribuicao}")
+
+        return max(0.0, valor)
+
+    def sortear(self, probabilidade):
+        with self.trava:
+            return self.aleatorio.random() < probabilidade
+
+    # Simula a chamada `chat.completions.create` do instructor. Com `stream=True`, devolve um gerador de objetos
+    # parciais, como o instructor faz com `response_model=instructor.Partial[...]`.
+    def criar(self, *, model=None, messages=None, response_model=None, stream=False, **kwargs):
+        latencia, perfil = self.contar_chamada(model, messages)
+
+        if stream:
+            return self.transmitir(latencia, messages, response_model, perfil)
+
+        time.sleep(latencia)
+        return self.responder(messages, response_model, perfil)
+
+    # Versão assíncrona de criar. Com `stream=True`, devolve um gerador assíncrono de objetos parciais.
+    async def criar_async(self, *, model=None, messages=None, response_model=None, stream=False, **kwargs):
+        latencia, perfil = self.contar_chamada(model, messages)
+
+        if stream:
+            return self.transmitir_async(latencia, messages, response_model, perfil)
+
+        await asyncio.sleep(latencia)
+        return self.responder(messages, response_model, perfil)
+
+    # Conta a chamada e sorteia a sua latência. Retorna (latência, perfil do modelo).
+    def contar_chamada(self, model, messages):
+        tokens_prompt = sum(len(str(mensagem.get("content", ""))) for mensagem in messages or []) // 4 + 1
+        perfil = self.modelos.get(model, {})
+        with self.trava:
+            self.chamadas += 1
+            self.tokens_prompt += tokens_prompt
+            self.chamadas_modelo[model] = self.chamadas_modelo.get(model, 0) + 1
+
+        latencia = (self.sortear_latencia() + tokens_prompt / 1000 * self.segundos_por_mil_tokens) * perfil.get("latencia", 1.0)
+        if self.sortear(self.lentidao[0]):
+            latencia *= self.lentidao[1]
+
+        return latencia, perfil
+
+    # Monta a resposta completa, ou lança a falha sorteada.
+    def responder(self, messages, response_model, perfil=None):
+        tipo = None
+        if self.sortear(self.taxa_falhas):
+            with self.trava:
+                tipo = self.aleatorio.choice(self.tipos_falha)
+        elif self.sortear((perfil or {}).get("falhas_validacao", 0.0)):
+            tipo = "validacao"
+
+        if tipo:
+            with self.trava:
+                self.falhas[tipo] = self.falhas.get(tipo, 0) + 1
+            raise criar_falha(tipo, response_model)
+
+        prompt = messages[-1]["content"] if messages else ""
+        contexto = {
+            "limite": _limite_caracteres(prompt),
+            "excesso": self.sortear(self.taxa_excesso),
+            "taxa_excesso": self.taxa_excesso,
+            "quantidade": _quantidade_opcoes(prompt),
+            "taxa_repeticao": self.taxa_repeticao,
+            "dialogos": self.dialogos,
+            "ids": re.findall(r"""['"]pergunta_id['"]\s*:\s*['"]([^'"]+)['"]""", prompt),
+        }
+
+        with self.trava:
+            dados = gerar_valor(response_model, "", contexto, self.aleatorio)
+
+        # Uso de tokens estimado como na API (cerca de 4 caracteres por token), anexado como o instructor faz
+        modelo = response_model(**dados)
+        uso = SimpleNamespace(
+            prompt_tokens=sum(len(str(mensagem.get("content", ""))) for mensagem in messages or []) // 4 + 1,
+            completion_tokens=len(modelo.model_dump_json()) // 4 + 1,
+        )
+        object.__setattr__(modelo, "_raw_response", SimpleNamespace(usage=uso))
+
+        texto = modelo.model_dump_json()
+        if self.sortear(self.taxa_cortadas):
+            with self.trava:
+                corte = int(len(texto) * self.aleatorio.uniform(0.3, 0.95))
+            raise self.falha_json("cortada", response_model, texto[:corte])
+        if self.sortear(self.taxa_json_invalido):
+            raise self.falha_json("json_invalido", response_model, texto[:-1] + ",}")
+
+        return modelo
+
+    # Conta a falha e devolve o erro que o pydantic dá ao validar o texto estragado.
+    def falha_json(self, tipo, response_model, texto):
+        with self.trava:
+            self.falhas[tipo] = self.falhas.get(tipo, 0) + 1
+        try:
+            response_model.model_validate_json(texto)
+        except ValidationError as e:
+            return e
+        return ValueError(f"JSON {tipo} simulado")
+
+    # Entrega a resposta em pedaços: o primeiro chega depois de uma fração da latência e o restante dela é dividido
+    # entre os pedaços seguintes, como uma resposta gerada token a token.
+    def transmitir(self, latencia, messages, response_model, perfil=None, pedacos:int=20):
+        time.sleep(latencia * 0.2)
+        resposta = self.responder(messages, response_model, perfil)
+        dados = resposta.model_dump()
+
+        for pedaco in range(1, pedacos + 1):
+            yield self.pedaco(response_model, resposta, dados, pedaco, pedacos)
+            if pedaco < pedacos:
+                time.sleep(latencia * 0.8 / pedacos)
+
+    async def transmitir_async(self, latencia, messages, response_model, perfil=None, pedacos:int=20):
+        await asyncio.sleep(latencia * 0.2)
+        resposta = self.responder(messages, response_model, perfil)
+        dados = resposta.model_dump()
+
+        for pedaco in range(1, pedacos + 1):
+            yield self.pedaco(response_model, resposta, dados, pedaco, pedacos)
+            if pedaco < pedacos:
+                await asyncio.sleep(latencia * 0.8 / pedacos)
+
+    # Objeto parcial com a fração `pedaco / pedacos` da resposta; o último leva o uso de tokens, como o fim de um
+    # stream da Groq.
+    def pedaco(self, response_model, resposta, dados, pedaco, pedacos):
+        parcial = response_model.model_construct(**cortar_valor(dados, pedaco / pedacos))
+        if pedaco == pedacos:
+            object.__setattr__(parcial, "_raw_response", resposta._raw_response)
+        return parcial
+
+
+class _Completions:
+    def __init__(self, cliente):
+        self.cliente = cliente
+
+    def create(self, **kwargs):
+        if self.cliente.assincrono:
+            return self.cliente.criar_async(**kwargs)
+        return self.cliente.criar(**kwargs)
+
+
+class _Chat:
+    def __init__(self, cliente):
+        self.completions = _Completions(cliente)
+
+
+# Corta textos e listas na fração indicada, imitando uma resposta ainda incompleta.
+def cortar_valor(valor, fracao):
+    if isinstance(valor, dict):
+        return {chave: cortar_valor(item, fracao) for chave, item in valor.items()}
+    if isinstance(valor, list):
+        return [cortar_valor(item, fracao) for item in valor[:math.ceil(len(valor) * fracao)]]
+    if isinstance(valor, str):
+        return valor[:math.ceil(len(valor) * fracao)]
+    return valor
+
+
+# Procura no prompt o limite de caracteres pedido ("no máximo 500 caracteres", "limite de 50 caracteres").
+def _limite_caracteres(prompt):
+    limites = [int(valor) for valor in re.findall(r"(\d+) caracteres", prompt)]
+    return min(limites) if limites else None
+
+
+# Procura no prompt quantas opções ou pares foram pedidos ("Gere 3 opções diferentes", "Gere 20 pares de mensagens").
+def _quantidade_opcoes(prompt):
+    quantidade = re.search(r"(\d+) (?:opções|pares)", prompt)
+    return int(quantidade.group(1)) if quantidade else None
+
+
+# Cria a exceção correspondente a um tipo de falha simulada.
+def criar_falha(tipo, response_model):
+    requisicao = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+    if tipo == "limite":
+        resposta = httpx.Response(429, headers={"retry-after": "0.1"}, request=requisicao)
+        return groq.RateLimitError("Rate limit simulado", response=resposta, body=None)
+
+    if tipo == "timeout":
+        return groq.APITimeoutError(request=requisicao)
+
+    try:
+        response_model.model_validate({})
+    except Exception as e:
+        return e
+
+    return ValueError("Falha simulada")
+
+
+# Texto com o tamanho pedido, montado a partir de palavras de exemplo.
+def gerar_texto(tamanho, aleatorio):
+    palavras = []
+    total = 0
+    while total < tamanho:
+        palavra = aleatorio.choice(PALAVRAS)
+        palavras.append(palavra)
+        total += len(palavra) + 1
+
+    texto = " ".join(palavras)[:max(1, tamanho)].strip()
+    return texto[:1].upper() + texto[1:]
+
+
+# Gera um valor válido para a anotação, usando o nome do campo para deixar o conteúdo plausível.
+def gerar_valor(anotacao, campo, contexto, aleatorio):
+    if isinstance(anotacao, type) and issubclass(anotacao, BaseModel):
+        return {nome: gerar_valor(info.annotation, nome, contexto, aleatorio) for nome, info in anotacao.model_fields.items()}
+
+    if typing.get_origin(anotacao) in (list, typing.List):
+        (tipo_item,) = typing.get_args(anotacao) or (str,)
+
+        if campo == "perguntas" and contexto["ids"]:
+            itens = []
+            for pergunta_id in contexto["ids"]:
+                item = gerar_valor(tipo_item, "", contexto, aleatorio)
+                item["pergunta_id"] = pergunta_id
+                itens.append(item)
+            return itens
+
+        # Cada opção sorteia à parte se passa do limite, como textos independentes do modelo
+        if campo == "candidatos":
+            return [
+                gerar_valor(tipo_item, "", dict(contexto, excesso=aleatorio.random() < contexto["taxa_excesso"]), aleatorio)
+                for _ in range(contexto["quantidade"] or 3)
+            ]
+
+        # Diálogos quase iguais aos anteriores, como um modelo com temperatura alta costuma devolver
+        if campo == "dialogos":
+            dialogos = []
+            for _ in range(contexto["quantidade"] or 20):
+                if contexto["dialogos"] and aleatorio.random() < contexto["taxa_repeticao"]:
+                    dialogo = dict(aleatorio.choice(contexto["dialogos"]))
+                    dialogo["msg2"] = dialogo["msg2"].rstrip(".!?") + aleatorio.choice(["!", "...", "?"])
+                else:
+                    dialogo = gerar_valor(tipo_item, "", contexto, aleatorio)
+                    contexto["dialogos"].append(dialogo)
+                dialogos.append(dialogo)
+            return dialogos
+
+        if campo == "etiquetas":
+            return aleatorio.sample(ETIQUETAS, aleatorio.randint(3, 5))
+
+        quantidade = {"dialogos": 20, "nomes": 10}.get(campo, 3)
+        return [gerar_valor(tipo_item, "", contexto, aleatorio) for _ in range(quantidade)]
+
+    if anotacao is int:
+        return aleatorio.randint(0, 100)
+
+    if anotacao is float:
+        return aleatorio.random()
+
+    if anotacao is bool:
+        return aleatorio.random() < 0.5
+
+    # Textos
+    if campo in ("nome", "nomecompleto"):
+        return f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)}" if campo == "nomecompleto" else aleatorio.choice(NOMES)
+    if campo == "sobrenome":
+        return aleatorio.choice(SOBRENOMES)
+    if campo in ("user1", "user2"):
+        return aleatorio.choice(FALANTES)
+    if campo in ("msg1", "msg2"):
+        return gerar_texto(aleatorio.randint(20, 90), aleatorio)
+    if campo == "pergunta":
+        return gerar_texto(40, aleatorio) + "?"
+
+    limite = contexto["limite"]
+    if limite:
+        if contexto["excesso"]:
+            return gerar_texto(int(limite * aleatorio.uniform(1.1, 1.6)) + 1, aleatorio)
+        return gerar_texto(int(limite * aleatorio.uniform(0.6, 0.95)), aleatorio)
+
+    return gerar_texto(aleatorio.randint(60, 240), aleatorio)
@@ -3,6 +3,7 @@ CONFIG = {
         "perguntas": "perguntas.json",
         "personagem_info": "temp/personagem_info.json",
         "personagem_geral": "temp/personagem_geral.json",
+        "personagem_resumo": "temp/personagem_resumo.json",
         "personagem_slogan": "temp/personagem_slogan.json",
         "personagem_descricao": "temp/personagem_descricao.json",
         "personagem_saudacao": "temp/personagem_saudacao.json",
@@ -11,7 +12,229 @@ CONFIG = {
         "personagem_definicoes": "temp/personagem_definicoes.json",
         "personagem_dialogos": "temp/personagem_dialogos.json",
         "personagem_templates": "templates/"
-    }
+    },
+    "ia": {
+        # Modelo usado pelas etapas sem rota própria
+        "modelo": "llama3-70b-8192",
+        # Rotas das chamadas à IA, pelo nome da etapa passado a exec_ia: modelo (padrão: o modelo acima), limite de
+        # tokens da resposta e parâmetros de amostragem. Tarefas simples (corrigir o nome, escolher etiquetas, responder
+        # as perguntas dos templates) vão para um modelo pequeno e rápido.
+        "rotas": {
+            "gerar_nome": {"max_tokens": 512, "temperature": 1.3, "top_p": 0.95},
+            "corrigir_nome": {"modelo": "llama-3.1-8b-instant", "max_tokens": 256, "temperature": 0.8, "top_p": 0.8},
+            "criar_descricao_geral": {"max_tokens": 4096, "temperature": 1, "top_p": 1},
+            "criar_resumo": {"max_tokens": 1024, "temperature": 0.3, "top_p": 0.9},
+            "gerar_slogan": {"max_tokens": 512, "temperature": 0.6, "top_p": 0.9},
+            "criar_descricao": {"max_tokens": 1024, "temperature": 0.6, "top_p": 0.9},
+            "gerar_saudacao": {"max_tokens": 4096, "temperature": 0.7, "top_p": 0.9},
+            "gerar_etiquetas": {"modelo": "llama-3.1-8b-instant", "max_tokens": 128, "temperature": 0.5, "top_p": 0.9},
+            "gerar_definicao": {"modelo": "llama-3.1-8b-instant", "max_tokens": 4096, "temperature": 0.6, "top_p": 0.9},
+            "criar_dialogos": {"max_tokens": 4096, "temperature": 1.2, "top_p": 0.95}
+        },
+        # Depois de `falhas_validacao` respostas inválidas seguidas, a chamada continua no `modelo` de escalonamento
+        # (ou no "escalar_para" da rota). Não vale para etapas que já usam esse modelo.
+        "escalonamento": {
+            "modelo": "llama3-70b-8192",
+            "falhas_validacao": 2
+        },
+        # Preço de cada modelo em dólares por milhão de tokens (prompt, resposta), usado no custo do relatório de execução
+        "precos": {
+            "llama3-70b-8192": [0.59, 0.79],
+            "llama3-8b-8192": [0.05, 0.08],
+            "llama-3.3-70b-versatile": [0.59, 0.79],
+            "llama-3.1-8b-instant": [0.05, 0.08]
+        },
+        # Janela de contexto de cada modelo, em tokens (prompt e resposta), usada para dimensionar as requisições agrupadas
+        "janelas_contexto": {
+            "llama3-70b-8192": 8192,
+            "llama3-8b-8192": 8192,
+            "llama-3.3-70b-versatile": 131072,
+            "llama-3.1-8b-instant": 131072
+        },
+        "janela_contexto_padrao": 8192
+    },
+    "agendador": {
+        # Número máximo de etapas rodando ao mesmo tempo
+        "max_workers": 6
+    },
+    "streaming": {
+        # Mostra a descrição geral no terminal enquanto ela é gerada (apenas no modo interativo)
+        "ativo": True
+    },
+    "nome": {
+        # Limite de caracteres do nome do personagem
+        "limite_caracteres": 20,
+        # Nomes que o normalizador local não resolve (acento desconhecido, caracteres estranhos, longo demais) vão para
+        # o corretor da IA; sem ele, ficam como foram digitados ou gerados
+        "corretor_ia": True
+    },
+    "candidatos": {
+        # Slogan, descrição e saudação pedem várias opções numa única requisição e ficam com a maior que cabe no limite
+        "ativo": True,
+        "quantidade": 3
+    },
+    "resumo": {
+        # Etapas que recebem no prompt o resumo estruturado do personagem no lugar da descrição geral completa
+        # (gerar_slogan, criar_descricao, gerar_saudacao, gerar_etiquetas, gerar_definicao, criar_dialogos).
+        # Com a lista vazia, o resumo nem é gerado.
+        "etapas": []
+    },
+    "dialogos": {
+        # Gera diálogos até ter este número de pares diferentes entre si
+        "alvo_unicos": 60,
+        # Limite de respostas da IA por execução, mesmo sem atingir o alvo
+        "max_chamadas": 6,
+        # Similaridade (Jaccard estimada pelo MinHash) a partir da qual um par é considerado repetido
+        "limiar_similaridade": 0.6,
+        "permutacoes": 64,
+        "bandas": 16,
+        # Pares pedidos em cada chamada
+        "por_chamada": 20,
+        # Orçamento da definição final: os diálogos só ocupam o espaço que as seções de definição deixam livre no limite
+        # de caracteres, e só são pedidos os diálogos que ainda cabem. Com o orçamento, a etapa espera a definição.
+        "orcamento": {
+            "ativo": True,
+            "limite_caracteres": 32000,
+            # Fração do limite deixada livre
+            "margem": 0.05,
+            # Tamanho estimado de um diálogo renderizado, usado até chegarem os primeiros diálogos
+            "caracteres_por_dialogo": 160,
+            # Com menos diálogos que isso cabendo, não vale fazer outra chamada
+            "minimo_por_chamada": 3
+        }
+    },
+    "definicao": {
+        # Número máximo de requisições de definição consultando a IA ao mesmo tempo
+        "max_workers": 4,
+        # Junta as perguntas de vários templates numa mesma requisição, enviando a descrição uma vez por pacote
+        "agrupar": True,
+        # Tokens de cada pacote (prompt e resposta estimados), limitados também pela janela de contexto do modelo
+        "max_tokens_pacote": 6000,
+        # Tokens de resposta estimados por pergunta
+        "tokens_resposta_por_pergunta": 60,
+        # Tentativas de um pacote antes de dividi-lo em pacotes menores
+        "tentativas_pacote": 2
+    },
+    "catalogo": {
+        # Templates de definição compilados, guardados em disco e recompilados só quando o arquivo muda
+        "ativo": True,
+        "cache": "temp/catalogo_templates.json"
+    },
+    "cache": {
+        # Cache em disco das respostas da IA, endereçado pelo hash da requisição completa
+        "ativo": True,
+        "caminho": "temp/cache_ia.sqlite3",
+        "max_entradas": 10000,
+        "max_megabytes": 200,
+        "max_idade_dias": 30,
+        # Etapas criativas que sempre pedem uma resposta nova à IA
+        "etapas_sem_cache": ["gerar_nome", "criar_dialogos"]
+    },
+    "limitador": {
+        # Limites da conta na Groq, compartilhados por todas as chamadas do processo
+        "requisicoes_por_minuto": 30,
+        "tokens_por_minuto": 6000,
+        # Tokens de resposta reservados por chamada, somados à estimativa do prompt
+        "tokens_resposta_estimados": 1000,
+        # Espera máxima do backoff exponencial, em segundos
+        "espera_maxima": 60
+    },
+    "hedge": {
+        # Duplica a chamada à IA que demora mais que o percentil da latência observada na etapa e fica com a primeira
+        # resposta válida (não vale para a descrição geral transmitida em streaming)
+        "ativo": False,
+        "percentil": 0.95,
+        # Cópias permitidas, como fração das requisições (0.05 = no máximo 5% de requisições a mais)
+        "orcamento": 0.05,
+        # Amostras da etapa antes de começar a duplicar, e espera mínima em segundos
+        "min_amostras": 20,
+        "espera_minima": 0.5,
+        # Amostras do histograma de cada etapa antes de as contagens antigas perderem metade do peso
+        "janela": 500,
+        # Histogramas de latência guardados entre execuções
+        "arquivo": "temp/latencias_etapas.json"
+    },
+    "telemetria": {
+        # Relatório JSON e métricas do Prometheus (coletor textfile) gravados ao fim do personagem, do lote ou do serviço
+        "ativo": True,
+        "relatorio_json": "temp/relatorio_execucao.json",
+        "prometheus": "temp/metricas.prom",
+        # Chamadas e execuções de etapas mais recentes guardadas no relatório (os totais por etapa contam todas)
+        "max_registros": 1000
+    },
+    "armazenamento": {
+        # Onde ficam os artefatos dos personagens, separados pelo id de cada um: "sqlite" (um banco só) ou "arquivos"
+        "backend": "sqlite",
+        "caminho": "temp/personagens.sqlite3",
+        # Pasta usada pelo backend "arquivos": <diretorio>/<id>/<artefato>.json
+        "diretorio": "temp/personagens/",
+        # Id usado no modo interativo quando nenhum é informado
+        "personagem_padrao": "padrao"
+    },
+    "lote": {
+        "personagens_simultaneos": 4,
+        # Limite global de requisições à IA em andamento, somando todos os personagens
+        "requisicoes_simultaneas": 8,
+        # Rodadas extras de tentativas que substituem a pergunta "Deseja tentar mais...?" no modo em lote
+        "rodadas_extras": 1
+    },
+    "reparo_json": {
+        # Respostas que não validam por causa do JSON (cortado, vírgulas sobrando, strings sem fechar) são consertadas
+        # localmente antes de uma nova tentativa; sem isso, o pedido inteiro é gerado de novo
+        "ativo": True,
+        # Resposta cortada: pede só o que faltou (o resto do texto, os itens seguintes da lista, os campos ausentes)
+        "complementar": True
+    },
+    "servico": {
+        # Modo serviço (main.py --servico): recebe conjuntos de respostas por HTTP e gera os personagens numa fila
+        "host": "127.0.0.1",
+        "porta": 8000,
+        # Personagens gerados ao mesmo tempo (workers da fila)
+        "workers": 4,
+        # Limite global de requisições à IA em andamento, somando todos os workers
+        "requisicoes_simultaneas": 8,
+        # Trabalhos esperando na fila além dos quais novos pedidos são recusados (HTTP 503)
+        "max_fila": 1000,
+        # Trabalhos terminados guardados em memória para consulta; os mais antigos saem primeiro
+        "max_terminados": 500,
+        # Tamanho máximo do corpo de um pedido, em bytes
+        "max_corpo": 1_000_000,
+        # Segundos sem eventos antes de mandar um comentário de keep-alive no fluxo SSE
+        "intervalo_keepalive": 15,
+        "log_requisicoes": True
+    },
+    # Etapas do personagem, com as entradas que consomem e as saídas que produzem.
+    # Etapas sem dependência entre si rodam em paralelo.
+    # Nas etapas que geram texto com a IA, "prompts", "configuracoes" (seções de CONFIG) e "arquivos" (chaves de
+    # charJsons) entram, junto com as entradas e os parâmetros de CONFIG["ia"], no hash que decide se a saída
+    # guardada ainda vale ou precisa ser gerada de novo.
+    "etapas": [
+        {"nome": "coletar_informacoes", "entradas": [], "saidas": ["personagem_info"]},
+        {"nome": "gerar_nome", "entradas": ["personagem_info"], "saidas": ["personagem_nome"]},
+        {"nome": "criar_descricao_geral", "entradas": ["personagem_info", "personagem_nome"], "saidas": ["personagem_geral"],
+            "prompts": ["PROMPT_DESCRICAO_GERAL_SYSTEM", "PROMPT_DESCRICAO_GERAL_USER"]},
+        {"nome": "criar_resumo", "entradas": ["personagem_geral"], "saidas": ["personagem_resumo"],
+            "prompts": ["PROMPT_RESUMO_SYSTEM", "PROMPT_RESUMO_USER"]},
+        {"nome": "gerar_slogan", "entradas": ["personagem_geral"], "saidas": ["personagem_slogan"],
+            "prompts": ["PROMPT_SLOGAN_SYSTEM", "PROMPT_SLOGAN_USER", "PROMPT_CANDIDATOS"], "configuracoes": ["candidatos"]},
+        {"nome": "criar_descricao", "entradas": ["personagem_geral"], "saidas": ["personagem_descricao"],
+            "prompts": ["PROMPT_DESCRICAO_SYSTEM", "PROMPT_DESCRICAO_USER", "PROMPT_CANDIDATOS"], "configuracoes": ["candidatos"]},
+        {"nome": "gerar_saudacao", "entradas": ["personagem_geral"], "saidas": ["personagem_saudacao"],
+            "prompts": ["PROMPT_SAUDACAO_SYSTEM", "PROMPT_SAUDACAO_USER", "PROMPT_CANDIDATOS"], "configuracoes": ["candidatos"]},
+        {"nome": "gerar_etiquetas", "entradas": ["personagem_geral"], "saidas": ["personagem_etiquetas"],
+            "prompts": ["PROMPT_ETIQUETAS_SYSTEM", "PROMPT_ETIQUETAS_USER"]},
+        {"nome": "gerar_definicao", "entradas": ["personagem_geral"], "saidas": ["personagem_definicao"],
+            "prompts": ["PROMPT_INSTRUCAO_SYSTEM", "PROMPT_INSTRUCAO_USER", "PROMPT_INSTRUCAO_AGRUPADA_USER", "PROMPT_INSTRUCAO_SECAO"],
+            "arquivos": ["personagem_templates"]},
+        {"nome": "criar_dialogos", "entradas": ["personagem_geral"], "saidas": ["personagem_dialogos"],
+            "prompts": ["PROMPT_DIALOGOS_SYSTEM", "PROMPT_DIALOGOS_USER"], "configuracoes": ["dialogos"]},
+        {"nome": "imprimir_personagem", "entradas": ["personagem_definicao", "personagem_dialogos"], "saidas": ["personagem_definicoes"]},
+        {
+            "nome": "done",
+            "entradas": ["personagem_nome", "personagem_slogan", "personagem_descricao", "personagem_saudacao", "personagem_etiquetas", "personagem_definicoes"],
+            "saidas": []
+        }
+    ]
 }
 
 PROMPT = {}
@@ -26,7 +249,7 @@ Use nomes e sobrenomes comuns no Brasil, fáceis de pronunciar em português.
 Retorne apenas em formato JSON, sem explicações ou comentários.
 """
 
-PROMPT["PROMPT_CORRETOR_NOME_SYSTEM"] = "Você é um gerador corretor de formatação de nomes próprios.",
+PROMPT["PROMPT_CORRETOR_NOME_SYSTEM"] = "Você é um gerador corretor de formatação de nomes próprios."
 PROMPT["PROMPT_CORRETOR_NOME_USER"] = """
 Corrija e formate este nome para seguir as regras de nomes próprios em português:
 
@@ -57,6 +280,19 @@ Informações:
 Retorne apenas em formato JSON, sem explicações ou comentários.
 """
 
+PROMPT["PROMPT_RESUMO_SYSTEM"] = "Você é um editor que condensa descrições de personagens sem perder informação."
+PROMPT["PROMPT_RESUMO_USER"] = """
+Com base na descrição do personagem abaixo:
+
+{descricao}
+
+Resuma a descrição em itens curtos e objetivos, preenchendo cada campo pedido.
+Mantenha todos os fatos, nomes, números e traços marcantes; corte apenas repetições, adjetivos e floreios.
+Escreva somente em português do Brasil, em frases telegráficas, sem inventar nada que não esteja na descrição.
+Se a descrição não disser nada sobre um campo, deixe-o como uma string vazia.
+Retorne apenas em formato JSON, sem explicações ou comentários.
+"""
+
 PROMPT["PROMPT_SLOGAN_SYSTEM"] = "Você é um gerador criativo de slogan de personagens."
 PROMPT["PROMPT_SLOGAN_USER"] = """
 Com base na descrição do personagem abaixo:
@@ -91,6 +327,10 @@ Pode ser curta ou longa, desde que não ultrapasse {max_caracteres} caracteres.
 Retorne apenas em formato JSON, sem explicações ou comentários.
 """
 
+PROMPT["PROMPT_CANDIDATOS"] = """
+Gere {quantidade} opções diferentes entre si, cada uma com no máximo {max_caracteres} caracteres, e retorne todas na lista "candidatos".
+"""
+
 PROMPT["PROMPT_ETIQUETAS_SYSTEM"] = """
 Você é um organizador de etiquetas para um personagem, com base na sua descrição.
 Sua tarefa é escolher até 5 etiquetas da lista abaixo para o personagem.
@@ -129,13 +369,40 @@ Lista de perguntas:
 Retorne apenas em formato JSON, sem explicações ou comentários.
 """
 
+PROMPT["PROMPT_INSTRUCAO_AGRUPADA_USER"] = """
+Com base na descrição do personagem abaixo:
+
+{descricao}
+
+Analise a descrição do personagem e responda as perguntas de todas as seções abaixo, seguindo as instruções fornecidas.
+
+### Instruções:
+- Leia atentamente a descrição do personagem.
+- Para cada item, responda com base apenas nas informações fornecidas no texto.
+- Se a resposta não estiver clara no texto, não invente informações, apenas deixe o campo "resposta" como uma string vazia: "" (duas aspas sem espaço).
+- Responda todas as perguntas de todas as seções numa única lista, copiando o pergunta_id exatamente como está.
+Não esqueça de completar os itens de pergunta_id, pergunta e resposta.
+
+{secoes}
+
+Retorne apenas em formato JSON, sem explicações ou comentários.
+"""
+
+PROMPT["PROMPT_INSTRUCAO_SECAO"] = """
+### Seção: {titulo}
+{instrucao}
+
+Lista de perguntas:
+{lista}
+"""
+
 PROMPT["PROMPT_DIALOGOS_SYSTEM"] = "Você é um gerador criativo de diálogos entre personagens."
 PROMPT["PROMPT_DIALOGOS_USER"] = """
 Com base na descrição abaixo do personagem principal:
 
 {descricao}
 
-Gere 20 pares de mensagens entre o personagem principal ('char') e outras pessoas, no formato JSON.
+Gere {quantidade} pares de mensagens entre o personagem principal ('char') e outras pessoas, no formato JSON.
 
 ### Regras de formatação:
 
@@ -162,4 +429,17 @@ Gere 20 pares de mensagens entre o personagem principal ('char') e outras pessoa
 - Não inclua explicações, instruções ou comentários fora do JSON.
 
 Retorne apenas em formato JSON, sem explicações ou comentários.
-"""
\ No newline at end of file
+"""
+# Complemento de uma resposta que chegou cortada (reparo_json.py): a resposta cortada vai no histórico e só o que
+# faltou é pedido
+PROMPT["PROMPT_COMPLEMENTO_USER"] = """
+A sua resposta anterior foi cortada antes do fim. O que chegou completo já foi aproveitado; não repita nada.
+Responda apenas com os campos abaixo:
+
+{pedidos}
+
+Retorne apenas em formato JSON, sem explicações ou comentários.
+"""
+PROMPT["PROMPT_COMPLEMENTO_TEXTO"] = '- "{campo}": a continuação do texto, começando exatamente onde ele parou, depois de: "{final}"'
+PROMPT["PROMPT_COMPLEMENTO_LISTA"] = '- "{campo}": os itens que faltaram depois dos {recebidos} já recebidos, sem repetir nenhum'
+PROMPT["PROMPT_COMPLEMENTO_FALTANDO"] = '- "{campo}": o campo inteiro, que não chegou'
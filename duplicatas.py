@@ -0,0 +1,97 @@
+import re
+import zlib
+import random
+import unicodedata
+
+# Primo de Mersenne usado nas permutações do MinHash (maior que qualquer crc32)
+PRIMO = (1 << 61) - 1
+
+
+class DetectorDuplicatas:
+    # Detecta textos quase repetidos com shingles de caracteres, MinHash e LSH por bandas.
+    # A assinatura usa MinHash de uma permutação só: cada shingle é espalhado uma vez e cai numa das `permutacoes`
+    # posições, que guarda o menor valor recebido (posições vazias copiam a próxima preenchida). Assim o custo é
+    # proporcional ao tamanho do texto, e não ao tamanho do texto vezes o número de permutações.
+    # A assinatura é dividida em `bandas` e cada banda indexa o texto num dicionário. Só os textos que caem no mesmo
+    # balde em alguma banda são comparados, então adicionar um texto custa o mesmo com dez ou com milhares de textos.
+    def __init__(self, *, limiar:float=0.6, permutacoes:int=64, bandas:int=16, tamanho_shingle:int=5, semente:int=1):
+        if permutacoes % bandas:
+            raise ValueError("O número de permutações precisa ser múltiplo do número de bandas.")
+
+        self.limiar = limiar
+        self.permutacoes = permutacoes
+        self.bandas = bandas
+        self.linhas = permutacoes // bandas
+        self.tamanho_shingle = tamanho_shingle
+
+        aleatorio = random.Random(semente)
+        self.coeficiente = (aleatorio.randrange(1, PRIMO), aleatorio.randrange(0, PRIMO))
+
+        self.assinaturas = []
+        self.baldes = [{} for _ in range(bandas)]
+
+    # Minúsculas, sem acentos, sem pontuação e com espaços simples.
+    @staticmethod
+    def normalizar(texto):
+        texto = unicodedata.normalize("NFKD", texto.lower())
+        texto = "".join(caractere for caractere in texto if not unicodedata.combining(caractere))
+        return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", texto)).strip()
+
+    def shingles(self, texto):
+        texto = self.normalizar(texto)
+        if len(texto) <= self.tamanho_shingle:
+            return {texto}
+        return {texto[i:i + self.tamanho_shingle] for i in range(len(texto) - self.tamanho_shingle + 1)}
+
+    def assinatura(self, texto):
+        a, b = self.coeficiente
+        minimos = [None] * self.permutacoes
+
+        for shingle in self.shingles(texto):
+            valor = (a * zlib.crc32(shingle.encode("utf-8")) + b) % PRIMO
+            posicao, resto = valor % self.permutacoes, valor // self.permutacoes
+            if minimos[posicao] is None or resto < minimos[posicao]:
+                minimos[posicao] = resto
+
+        # Densificação: cada posição vazia copia a próxima preenchida, junto com a distância até ela
+        for posicao in range(self.permutacoes):
+            if minimos[posicao] is None:
+                for deslocamento in range(1, self.permutacoes):
+                    vizinho = minimos[(posicao + deslocamento) % self.permutacoes]
+                    if vizinho is not None and not isinstance(vizinho, tuple):
+                        minimos[posicao] = (vizinho, deslocamento)
+                        break
+
+        return tuple(minimos)
+
+    # Similaridade de Jaccard estimada: fração das posições iguais nas duas assinaturas.
+    @staticmethod
+    def similaridade(assinatura, outra):
+        return sum(1 for x, y in zip(assinatura, outra) if x == y) / len(assinatura)
+
+    # Retorna True se o texto é quase igual a algum já indexado; caso contrário, indexa o texto e retorna False.
+    def eh_duplicata(self, texto):
+        assinatura = self.assinatura(texto)
+        chaves = [assinatura[banda * self.linhas:(banda + 1) * self.linhas] for banda in range(self.bandas)]
+
+        candidatos = set()
+        for banda, chave in enumerate(chaves):
+            candidatos.update(self.baldes[banda].get(chave, ()))
+
+        if any(self.similaridade(assinatura, self.assinaturas[indice]) >= self.limiar for indice in candidatos):
+            return True
+
+        indice = len(self.assinaturas)
+        self.assinaturas.append(assinatura)
+        for banda, chave in enumerate(chaves):
+            self.baldes[banda].setdefault(chave, []).append(indice)
+
+        return False
+
+    def __len__(self):
+        return len(self.assinaturas)
+
+
+# Texto usado para comparar um par de diálogo: as duas mensagens juntas.
+def texto_dialogo(dialogo):
+    return f"{dialogo.get('msg1', '')} | {dialogo.get('msg2', '')}"
@@ -0,0 +1,33 @@
+from config import CONFIG
+
+
+# Distribui os itens em pacotes cuja soma de custos não passa da capacidade, pelo first-fit decreasing: os itens mais
+# caros são colocados primeiro, cada um no primeiro pacote onde ainda cabe. Um item maior que a capacidade fica
+# sozinho num pacote. Dentro de cada pacote os itens mantêm a ordem original, e os pacotes seguem a ordem do primeiro
+# item, para que a mesma entrada gere sempre os mesmos pacotes (e as mesmas chaves no cache).
+def empacotar(itens, custo, capacidade):
+    pacotes = []
+    ocupados = []
+
+    for indice in sorted(range(len(itens)), key=lambda indice: (-custo(itens[indice]), indice)):
+        valor = custo(itens[indice])
+        for posicao, ocupado in enumerate(ocupados):
+            if ocupado + valor <= capacidade:
+                pacotes[posicao].append(indice)
+                ocupados[posicao] += valor
+                break
+        else:
+            pacotes.append([indice])
+            ocupados.append(valor)
+
+    return [[itens[indice] for indice in sorted(pacote)] for pacote in sorted(pacotes, key=min)]
+
+
+# Janela de contexto do modelo, em tokens (prompt e resposta juntos), conforme CONFIG["ia"]["janelas_contexto"].
+def janela_contexto(modelo):
+    return CONFIG["ia"]["janelas_contexto"].get(modelo, CONFIG["ia"]["janela_contexto_padrao"])
+
+
+# Tokens disponíveis para um pacote: o orçamento de CONFIG["definicao"], limitado pela janela de contexto do modelo.
+def orcamento_pacote(modelo):
+    return min(CONFIG["definicao"]["max_tokens_pacote"], janela_contexto(modelo))
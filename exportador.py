@@ -0,0 +1,193 @@
+import json
+
+CORES = {
+    "vermelho": "91",
+    "verde": "92",
+    "amarelo": "93",
+    "azul": "94",
+    "rosa": "95",
+    "ciano": "96",
+    "branco": "97",
+    "cinza": "90",
+    "preto": "30",
+}
+
+# Formatos de exportação: texto puro, texto colorido para o terminal e o JSON de criação de personagem do Character.AI
+FORMATOS = ("texto", "terminal", "caijson")
+
+
+# Formata o texto com cores e estilos ANSI, permitindo personalização de cor, negrito, itálico e sublinhado.
+def formatar_ansi(texto, cor=None, negrito=False, italico=False, sublinhado=False):
+    estilos = []
+
+    if cor and cor.lower() in CORES:
+        estilos.append(CORES[cor.lower()])
+    else:
+        estilos.append("30")  # fallback para cinza escuro, que funciona melhor
+
+    if negrito:
+        estilos.append("1")
+    if italico:
+        estilos.append("3")
+    if sublinhado:
+        estilos.append("4")
+
+    return f"\033[{';'.join(estilos)}m{texto}\033[0m"
+
+
+# Mesma assinatura de formatar_ansi, sem nenhum código de escape: é o estilo usado em tudo que vai para arquivo.
+def formatar_puro(texto, cor=None, negrito=False, italico=False, sublinhado=False):
+    return texto
+
+
+# Dados do personagem usados na exportação, a partir dos artefatos guardados (armazenamento.carregar).
+def dados_de_artefatos(artefatos):
+    prefixo = "personagem_definicao_"
+    return {
+        "nome": (artefatos.get("personagem_info") or {}).get("informacoes", {}).get("Nome", ""),
+        "slogan": (artefatos.get("personagem_slogan") or {}).get("slogan", ""),
+        "descricao": (artefatos.get("personagem_descricao") or {}).get("descricao", ""),
+        "saudacao": (artefatos.get("personagem_saudacao") or {}).get("saudacao", ""),
+        "etiquetas": (artefatos.get("personagem_etiquetas") or {}).get("etiquetas", []),
+        "definicoes": {chave[len(prefixo):]: (dados or {}).get("perguntas", []) for chave, dados in artefatos.items() if chave.startswith(prefixo)},
+        "dialogos": (artefatos.get("personagem_dialogos") or {}).get("dialogos", []),
+    }
+
+
+# Gera a definição final do personagem em pedaços, na ordem dos templates do catálogo: as respostas de cada template
+# preenchem as frases do template, seguidas dos diálogos. Só um pedaço fica em memória por vez.
+def pedacos_definicao(dados, templates, estilo=formatar_puro):
+    yield "----\n"
+    yield estilo("### DEFINIÇÕES DO PERSONAGEM ###", cor="rosa", negrito=True)
+    yield "\n----\n"
+
+    for template in templates:
+        # Respostas indexadas pelo id da pergunta, para não percorrer a lista a cada pergunta
+        respostas = {resposta.get("pergunta_id"): resposta.get("resposta") for resposta in dados["definicoes"].get(template["identificador"], [])}
+        linhas = [
+            "- " + pergunta["resposta"].replace("{" + pergunta["indice"] + "}", respostas[pergunta["indice"]]) + "\n"
+            for pergunta in template["perguntas"]
+            if pergunta["resposta"] and respostas.get(pergunta["indice"])
+        ]
+
+        if linhas:
+            yield "\n\n----\n"
+            yield "** " + estilo(template["titulo"], cor="ciano", negrito=True) + " **\n"
+            yield "----\n"
+            yield from linhas
+            yield "----\n"
+
+    # O título dos diálogos só sai se houver pelo menos um diálogo completo
+    titulo = False
+    for dialogo in dados["dialogos"]:
+        if not dialogo_completo(dialogo):
+            continue
+
+        if not titulo:
+            yield from pedacos_titulo_dialogos(estilo)
+            titulo = True
+
+        yield from pedacos_dialogo(dialogo)
+
+
+# Título da seção de diálogos.
+def pedacos_titulo_dialogos(estilo=formatar_puro):
+    yield "\n\n\n\n----\n"
+    yield estilo("### DIÁLOGOS DO PERSONAGEM ###", cor="rosa", negrito=True)
+    yield "\n----\n\n\n----\n"
+
+
+# Um diálogo como aparece na definição final.
+def pedacos_dialogo(dialogo):
+    yield f"{{{{{dialogo['user1'].strip()}}}}}: {dialogo['msg1'].strip()}\n"
+    yield f"{{{{{dialogo['user2'].strip()}}}}}: {dialogo['msg2'].strip()}\n"
+    yield "----\n"
+
+
+# Diálogo com os quatro campos preenchidos; os outros não entram na definição.
+def dialogo_completo(dialogo):
+    return isinstance(dialogo, dict) and all(str(dialogo.get(campo, "")).strip() for campo in ("user1", "msg1", "user2", "msg2"))
+
+
+# Caracteres de um texto gerado em pedaços, sem montar o texto.
+def tamanho_pedacos(pedacos):
+    return sum(len(pedaco) for pedaco in pedacos)
+
+
+# Tira o espaço do fim do último pedaço, segurando sempre um pedaço para saber qual é o último.
+def sem_espaco_final(pedacos):
+    anterior = None
+    for pedaco in pedacos:
+        if anterior is not None:
+            yield anterior
+        anterior = pedaco
+
+    if anterior is not None:
+        yield anterior.rstrip()
+
+
+# Escreve a definição final como texto. Com `ansi`, usa as cores do terminal; arquivos devem receber ansi=False.
+def escrever_texto(saida, dados, templates, *, ansi:bool=False):
+    for pedaco in sem_espaco_final(pedacos_definicao(dados, templates, formatar_ansi if ansi else formatar_puro)):
+        saida.write(pedaco)
+
+
+# Escreve o personagem como o JSON de criação do Character.AI, numa linha. A definição vai sendo escapada e escrita
+# em blocos de até `tamanho_bloco` caracteres dentro da string JSON, sem montar o texto inteiro em memória.
+def escrever_caijson(saida, dados, templates, tamanho_bloco:int=8192):
+    campos = {
+        "name": dados["nome"],
+        "tagline": dados["slogan"],
+        "description": dados["descricao"],
+        "greeting": dados["saudacao"],
+        "tags": dados["etiquetas"],
+    }
+
+    saida.write("{")
+    for chave, valor in campos.items():
+        saida.write(f"{json.dumps(chave)}: {json.dumps(valor, ensure_ascii=False)}, ")
+
+    saida.write('"definition": "')
+    bloco = []
+    tamanho = 0
+    for pedaco in sem_espaco_final(pedacos_definicao(dados, templates)):
+        bloco.append(pedaco)
+        tamanho += len(pedaco)
+        if tamanho >= tamanho_bloco:
+            saida.write(json.dumps("".join(bloco), ensure_ascii=False)[1:-1])
+            bloco = []
+            tamanho = 0
+    saida.write(json.dumps("".join(bloco), ensure_ascii=False)[1:-1])
+    saida.write('"}')
+
+
+# Escreve um personagem no formato pedido. O formato "terminal" só usa cores quando a saída é um terminal.
+def exportar(saida, dados, templates, formato:str="texto"):
+    if formato == "caijson":
+        escrever_caijson(saida, dados, templates)
+    elif formato in ("texto", "terminal"):
+        escrever_texto(saida, dados, templates, ansi=formato == "terminal" and saida.isatty())
+    else:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+
+
+# Exporta vários personagens do armazenamento, um de cada vez: só os artefatos do personagem atual ficam em memória.
+# No formato "caijson" cada personagem é uma linha (JSONL); nos formatos de texto, um bloco com o id no topo.
+# Retorna quantos personagens foram exportados.
+def exportar_personagens(saida, armazenamento, personagem_ids, templates, formato:str="texto"):
+    total = 0
+
+    for personagem_id in personagem_ids:
+        dados = dados_de_artefatos(armazenamento.carregar(personagem_id))
+
+        if formato == "caijson":
+            exportar(saida, dados, templates, formato)
+            saida.write("\n")
+        else:
+            saida.write(f"==== {personagem_id} ====\n")
+            exportar(saida, dados, templates, formato)
+            saida.write("\n\n")
+
+        total += 1
+
+    return total
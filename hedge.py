@@ -0,0 +1,260 @@
+import os
+import json
+import math
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from config import CONFIG
+from telemetria import gravar_atomico
+
+
+class HistogramaLatencia:
+    # Histograma de latências com baldes em escala logarítmica (cada balde `fator` vezes maior que o anterior), de
+    # `minimo` segundos em diante. Quando passa de `janela` amostras, as contagens caem pela metade, para os
+    # percentis seguirem a latência recente da etapa.
+    def __init__(self, *, minimo:float=0.01, fator:float=1.2, baldes:int=64, janela:int=500):
+        self.minimo = minimo
+        self.fator = fator
+        self.janela = janela
+        self.contagens = [0.0] * baldes
+        self.total = 0.0
+
+    def balde(self, segundos):
+        if segundos <= self.minimo:
+            return 0
+        return min(len(self.contagens) - 1, int(math.log(segundos / self.minimo, self.fator)) + 1)
+
+    def registrar(self, segundos):
+        self.contagens[self.balde(segundos)] += 1
+        self.total += 1
+
+        if self.total > self.janela:
+            self.contagens = [contagem / 2 for contagem in self.contagens]
+            self.total /= 2
+
+    # Limite superior do balde onde está o percentil `p` (entre 0 e 1), ou None sem amostras.
+    def percentil(self, p):
+        if not self.total:
+            return None
+
+        acumulado = 0.0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= p * self.total:
+                return self.minimo * self.fator ** indice
+        return self.minimo * self.fator ** (len(self.contagens) - 1)
+
+    def exportar(self):
+        return {"contagens": self.contagens, "total": self.total}
+
+    def carregar(self, dados):
+        if len(dados.get("contagens", [])) == len(self.contagens):
+            self.contagens = [float(contagem) for contagem in dados["contagens"]]
+            self.total = float(dados.get("total", sum(self.contagens)))
+
+
+class ControleHedge:
+    # Requisições duplicadas (hedging) para cortar a cauda da latência: se a chamada não volta até o percentil
+    # CONFIG["hedge"]["percentil"] da latência observada na etapa, uma cópia é disparada e vale a primeira resposta
+    # válida. As cópias, somadas às chamadas perdedoras que ainda estão rodando, nunca passam de
+    # CONFIG["hedge"]["orcamento"] das requisições. Guarda um histograma de latência por etapa, compartilhado pelo
+    # processo e gravado em disco para a próxima execução.
+    def __init__(self, caminho:str=None):
+        self.trava = threading.Lock()
+        self.caminho = caminho
+        self.histogramas = {}
+        self.requisicoes = 0
+        self.duplicadas = 0
+        self.vencidas = 0
+        self.perdedoras = 0
+
+        if caminho and os.path.exists(caminho):
+            try:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    for etapa, dados in json.load(f).items():
+                        self.histograma(etapa).carregar(dados)
+            except (OSError, ValueError, AttributeError):
+                self.histogramas = {}
+
+    def histograma(self, etapa):
+        if etapa not in self.histogramas:
+            self.histogramas[etapa] = HistogramaLatencia(janela=CONFIG["hedge"]["janela"])
+        return self.histogramas[etapa]
+
+    def registrar(self, etapa, segundos):
+        with self.trava:
+            self.histograma(etapa).registrar(segundos)
+
+    # Segundos de espera antes de duplicar a chamada da etapa, ou None quando não há amostras suficientes.
+    def limiar(self, etapa):
+        with self.trava:
+            histograma = self.histogramas.get(etapa)
+            if histograma is None or histograma.total < CONFIG["hedge"]["min_amostras"]:
+                return None
+            return max(CONFIG["hedge"]["espera_minima"], histograma.percentil(CONFIG["hedge"]["percentil"]))
+
+    # Reserva uma cópia se o orçamento permitir. As chamadas perdedoras que ainda não terminaram contam como cópias a
+    # mais, porque continuam gastando a cota da API.
+    def reservar(self):
+        with self.trava:
+            if self.duplicadas + self.perdedoras + 1 > CONFIG["hedge"]["orcamento"] * self.requisicoes:
+                return False
+            self.duplicadas += 1
+            return True
+
+    # Executa `chamar` com hedging. `preparar` roda na thread da cópia antes da chamada (por exemplo, para esperar o
+    # limitador de taxa). Retorna (resultado, origem): "direto" quando não houve cópia, "original" ou "copia" para a
+    # que venceu a corrida. A chamada que perde não pode ser interrompida no meio: é cancelada se ainda não começou
+    # e, senão, o seu resultado é descartado e ela ocupa o orçamento de cópias até terminar (os tokens que ela
+    # reservou no limitador de taxa também não são devolvidos).
+    def executar(self, etapa, chamar, preparar=None):
+        with self.trava:
+            self.requisicoes += 1
+
+        # Sem limiar (hedging desligado ou poucas amostras), a chamada roda direto, só medindo a latência
+        espera = self.limiar(etapa) if CONFIG["hedge"]["ativo"] else None
+        if espera is None:
+            inicio = time.monotonic()
+            resultado = chamar()
+            self.registrar(etapa, time.monotonic() - inicio)
+            return resultado, "direto"
+
+        original = self.em_thread(etapa, chamar)
+        if wait([original], timeout=espera).done or not self.reservar():
+            return original.result(), "direto"
+
+        def copia():
+            if preparar:
+                preparar()
+            return chamar()
+
+        futuros = {self.em_thread(etapa, copia): "copia", original: "original"}
+        pendentes = set(futuros)
+        erro = None
+
+        while pendentes:
+            concluidos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                if futuro.exception() is None:
+                    for outro in pendentes:
+                        if not outro.cancel():
+                            self.cobrar_perdedora(outro)
+                    if futuros[futuro] == "copia":
+                        with self.trava:
+                            self.vencidas += 1
+                    return futuro.result(), futuros[futuro]
+                erro = futuro.exception()
+
+        raise erro
+
+    # Versão assíncrona de executar, com `chamar` e `preparar` retornando corrotinas. As duas chamadas são tarefas do
+    # loop de eventos, e a que perde a corrida é cancelada de fato.
+    async def executar_async(self, etapa, chamar, preparar=None):
+        with self.trava:
+            self.requisicoes += 1
+
+        espera = self.limiar(etapa) if CONFIG["hedge"]["ativo"] else None
+        if espera is None:
+            inicio = time.monotonic()
+            resultado = await chamar()
+            self.registrar(etapa, time.monotonic() - inicio)
+            return resultado, "direto"
+
+        original = asyncio.ensure_future(self.medir_async(etapa, chamar))
+        concluidas, _ = await asyncio.wait([original], timeout=espera)
+        if concluidas or not self.reservar():
+            return await original, "direto"
+
+        async def copia():
+            if preparar:
+                await preparar()
+            return await chamar()
+
+        tarefas = {asyncio.ensure_future(self.medir_async(etapa, copia)): "copia", original: "original"}
+        pendentes = set(tarefas)
+        erro = None
+
+        while pendentes:
+            concluidas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in concluidas:
+                if tarefa.exception() is None:
+                    for outra in pendentes:
+                        outra.cancel()
+                    if tarefas[tarefa] == "copia":
+                        with self.trava:
+                            self.vencidas += 1
+                    return tarefa.result(), tarefas[tarefa]
+                erro = tarefa.exception()
+
+        raise erro
+
+    # Conta a chamada perdedora que já começou no orçamento de cópias até ela terminar.
+    def cobrar_perdedora(self, futuro):
+        with self.trava:
+            self.perdedoras += 1
+
+        def liberar(_):
+            with self.trava:
+                self.perdedoras -= 1
+
+        futuro.add_done_callback(liberar)
+
+    # Aguarda a corrotina e registra a latência quando ela termina sem erro.
+    async def medir_async(self, etapa, chamar):
+        inicio = time.monotonic()
+        resultado = await chamar()
+        self.registrar(etapa, time.monotonic() - inicio)
+        return resultado
+
+    # Roda a função numa thread daemon (uma chamada abandonada não segura o fim do processo) e registra a latência
+    # das chamadas que terminam sem erro.
+    def em_thread(self, etapa, funcao):
+        futuro = Future()
+
+        def executar():
+            if not futuro.set_running_or_notify_cancel():
+                return
+            inicio = time.monotonic()
+            try:
+                resultado = funcao()
+            except BaseException as e:
+                futuro.set_exception(e)
+                return
+            self.registrar(etapa, time.monotonic() - inicio)
+            futuro.set_result(resultado)
+
+        threading.Thread(target=executar, daemon=True).start()
+        return futuro
+
+    def estatisticas(self):
+        with self.trava:
+            return {
+                "requisicoes": self.requisicoes,
+                "duplicadas": self.duplicadas,
+                "vencidas_pela_copia": self.vencidas,
+                "perdedoras_rodando": self.perdedoras,
+                "limiares": {etapa: round(histograma.percentil(CONFIG["hedge"]["percentil"]), 4) for etapa, histograma in self.histogramas.items() if histograma.total},
+            }
+
+    def salvar(self):
+        if not self.caminho:
+            return
+        with self.trava:
+            dados = {etapa: histograma.exportar() for etapa, histograma in self.histogramas.items()}
+        gravar_atomico(self.caminho, json.dumps(dados))
+
+
+_controle = None
+_trava_controle = threading.Lock()
+
+
+# Retorna o controle de hedging compartilhado por todas as chamadas do processo.
+def obter_controle_hedge():
+    global _controle
+
+    with _trava_controle:
+        if _controle is None:
+            _controle = ControleHedge(CONFIG["hedge"]["arquivo"])
+
+    return _controle
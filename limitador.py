@@ -0,0 +1,222 @@
+import re
+import time
+import asyncio
+import random
+import threading
+from json import JSONDecodeError
+from config import CONFIG
+
+
+class BaldeTokens:
+    # Balde de tokens: guarda até `capacidade` unidades e se recarrega continuamente a `capacidade` por minuto.
+    def __init__(self, capacidade:float):
+        self.capacidade = capacidade
+        self.disponivel = capacidade
+        self.por_segundo = capacidade / 60
+        self.atualizado = time.monotonic()
+
+    def recarregar(self, agora):
+        self.disponivel = min(self.capacidade, self.disponivel + (agora - self.atualizado) * self.por_segundo)
+        self.atualizado = agora
+
+    # Segundos até o balde ter `quantidade` unidades disponíveis.
+    def espera(self, quantidade):
+        falta = min(quantidade, self.capacidade) - self.disponivel
+        return max(0.0, falta / self.por_segundo)
+
+
+class LimitadorTaxa:
+    # Limitador compartilhado por todas as chamadas à IA, com um balde de requisições por minuto e outro de tokens por minuto.
+    def __init__(self, requisicoes_por_minuto:int, tokens_por_minuto:int):
+        self.requisicoes = BaldeTokens(requisicoes_por_minuto)
+        self.tokens = BaldeTokens(tokens_por_minuto)
+        self.pausado_ate = 0.0
+        self.trava = threading.Lock()
+
+    # Consome a parte da requisição se ela couber nos dois baldes agora. Retorna 0 quando consumiu ou, senão, os
+    # segundos até caber.
+    def reservar(self, tokens_estimados:int):
+        with self.trava:
+            agora = time.monotonic()
+            self.requisicoes.recarregar(agora)
+            self.tokens.recarregar(agora)
+
+            espera = max(
+                self.pausado_ate - agora,
+                self.requisicoes.espera(1),
+                self.tokens.espera(tokens_estimados),
+            )
+
+            if espera <= 0:
+                self.requisicoes.disponivel -= 1
+                self.tokens.disponivel -= min(tokens_estimados, self.tokens.capacidade)
+                return 0
+
+            return espera
+
+    # Bloqueia até que a requisição caiba nos dois baldes e então consome a sua parte.
+    def aguardar(self, tokens_estimados:int):
+        while True:
+            espera = self.reservar(tokens_estimados)
+            if not espera:
+                return
+            time.sleep(espera)
+
+    # Versão assíncrona de aguardar: espera sem ocupar a thread do loop de eventos.
+    async def aguardar_async(self, tokens_estimados:int):
+        while True:
+            espera = self.reservar(tokens_estimados)
+            if not espera:
+                return
+            await asyncio.sleep(espera)
+
+    # Acerta o balde de tokens depois da resposta, com a diferença entre os tokens reservados e os realmente usados.
+    def devolver_tokens(self, quantidade:int):
+        with self.trava:
+            self.tokens.recarregar(time.monotonic())
+            self.tokens.disponivel = min(self.tokens.capacidade, self.tokens.disponivel + quantidade)
+
+    # Ajusta os baldes a partir dos cabeçalhos de limite da Groq e, num 429, pausa todas as chamadas pelo tempo pedido.
+    # Retorna o tempo de espera indicado pela API, ou None se não houver.
+    def registrar_cabecalhos(self, cabecalhos, limite_atingido:bool=False):
+        if not cabecalhos:
+            return None
+
+        restantes_requisicoes = converter_numero(cabecalhos.get("x-ratelimit-remaining-requests"))
+        restantes_tokens = converter_numero(cabecalhos.get("x-ratelimit-remaining-tokens"))
+
+        espera = converter_duracao(cabecalhos.get("retry-after"))
+        if espera is None and limite_atingido:
+            esperas = [converter_duracao(cabecalhos.get(chave)) for chave in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+            esperas = [valor for valor in esperas if valor is not None]
+            espera = max(esperas) if esperas else None
+
+        with self.trava:
+            agora = time.monotonic()
+            self.requisicoes.recarregar(agora)
+            self.tokens.recarregar(agora)
+
+            if restantes_requisicoes is not None:
+                self.requisicoes.disponivel = min(self.requisicoes.disponivel, restantes_requisicoes)
+            if restantes_tokens is not None:
+                self.tokens.disponivel = min(self.tokens.disponivel, restantes_tokens)
+
+            if limite_atingido:
+                self.requisicoes.disponivel = min(self.requisicoes.disponivel, 0)
+                if espera is not None:
+                    self.pausado_ate = max(self.pausado_ate, agora + espera)
+
+        return espera
+
+
+# Converte um número de cabeçalho, aceitando ausência ou valores inválidos.
+def converter_numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+# Converte durações como "7.66s", "1m2.5s", "120ms" ou "3" (segundos) para segundos.
+def converter_duracao(valor):
+    if valor is None:
+        return None
+
+    valor = str(valor).strip()
+    numero = converter_numero(valor)
+    if numero is not None:
+        return numero
+
+    partes = re.findall(r"([\d.]+)(ms|h|m|s)", valor)
+    if not partes:
+        return None
+
+    unidades = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(quantidade) * unidades[unidade] for quantidade, unidade in partes)
+
+
+# Classifica um erro da chamada à IA:
+# - "retentar": limite de taxa, timeout, conexão ou erro do servidor; tenta de novo com backoff.
+# - "repetir": resposta fora do schema; pede de novo logo em seguida.
+# - "fatal": chave inválida, requisição malformada, modelo inexistente; não adianta tentar de novo.
+def classificar_erro(erro):
+    # Importados só aqui: quando há um erro da IA, o groq e o pydantic já foram carregados pela chamada
+    import groq
+    from pydantic import ValidationError
+
+    # O instructor embrulha o erro original em InstructorRetryException; percorre a cadeia de causas
+    atual = erro
+    while atual is not None:
+        if isinstance(atual, (ValidationError, JSONDecodeError)):
+            return "repetir"
+
+        if isinstance(atual, (groq.RateLimitError, groq.APITimeoutError, groq.APIConnectionError, groq.InternalServerError)):
+            return "retentar"
+
+        if isinstance(atual, groq.APIStatusError):
+            # A Groq responde 400 quando o modelo gera um JSON que não valida
+            if atual.status_code == 400 and re.search(r"tool_use_failed|json_validate_failed", str(atual)):
+                return "repetir"
+            if atual.status_code in (408, 409) or atual.status_code >= 500:
+                return "retentar"
+            return "fatal"
+
+        atual = atual.__cause__
+
+    return "retentar"
+
+
+# Indica se o erro, ou alguma de suas causas, é um 429 da Groq.
+def eh_limite_taxa(erro):
+    import groq
+
+    atual = erro
+    while atual is not None:
+        if isinstance(atual, groq.RateLimitError):
+            return True
+        atual = atual.__cause__
+
+    return False
+
+
+# Procura os cabeçalhos HTTP da resposta de erro, percorrendo a cadeia de causas.
+def cabecalhos_erro(erro):
+    atual = erro
+    while atual is not None:
+        resposta = getattr(atual, "response", None)
+        if resposta is not None and getattr(resposta, "headers", None) is not None:
+            return resposta.headers
+        atual = atual.__cause__
+
+    return None
+
+
+# Backoff exponencial com jitter completo. Se a API indicou quanto esperar, espera pelo menos isso.
+def tempo_espera(tentativa:int, base:float, maximo:float, indicado=None):
+    espera = random.uniform(0, min(maximo, base * 2 ** (tentativa - 1)))
+    if indicado is not None:
+        espera = max(espera, indicado + random.uniform(0, base))
+    return espera
+
+
+# Estimativa grosseira de tokens das mensagens (cerca de 4 caracteres por token).
+def estimar_tokens(messages):
+    return sum(len(str(mensagem.get("content", ""))) for mensagem in messages) // 4 + 1
+
+
+_limitador = None
+_trava_limitador = threading.Lock()
+
+
+# Retorna o limitador compartilhado por todas as chamadas do processo, configurado por CONFIG["limitador"].
+def obter_limitador():
+    global _limitador
+
+    with _trava_limitador:
+        if _limitador is None:
+            _limitador = LimitadorTaxa(
+                CONFIG["limitador"]["requisicoes_por_minuto"],
+                CONFIG["limitador"]["tokens_por_minuto"],
+            )
+
+    return _limitador
@@ -0,0 +1,148 @@
+import os
+import csv
+import json
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import CONFIG
+from BuildMyChar import BuildMyCharUI
+from telemetria import obter_telemetria
+from regeneracao import hash_valor
+
+
+# Lê os conjuntos de respostas de um arquivo JSONL (um objeto por linha) ou CSV (uma coluna por chave de perguntas.json).
+def ler_respostas(caminho):
+    conjuntos = []
+
+    with open(caminho, 'r', encoding='utf-8', newline='') as f:
+        if caminho.lower().endswith(".csv"):
+            conjuntos = [dict(linha) for linha in csv.DictReader(f)]
+        else:
+            for numero, linha in enumerate(f, start=1):
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    conjuntos.append(json.loads(linha))
+                except json.JSONDecodeError as e:
+                    print(f"Linha {numero} ignorada, JSON inválido: {e}")
+
+    return conjuntos
+
+
+# Id do personagem de um conjunto de respostas: o "id" informado ou, sem ele, um hash das respostas. O mesmo conjunto
+# volta sempre ao mesmo personagem, e conjuntos diferentes (de arquivos diferentes, por exemplo) nunca se misturam.
+def id_personagem(respostas):
+    return str(respostas.pop("id", "") or "") or hash_valor(respostas)[:16]
+
+
+# Grava a telemetria do lote inteiro de uma vez, em vez de a cada personagem.
+def exportar_telemetria():
+    if CONFIG["telemetria"]["ativo"]:
+        obter_telemetria().exportar()
+
+
+# Gera todos os personagens de um arquivo de respostas sem interação, gravando cada personagem pronto como uma linha JSON no arquivo de saída.
+def executar_lote(entrada, saida, *, personagens_simultaneos=None, requisicoes_simultaneas=None, cliente=None):
+    if cliente is None and not os.environ.get("GROQ_API_KEY"):
+        print("Erro: variável de ambiente GROQ_API_KEY não encontrada.")
+        return
+
+    personagens_simultaneos = personagens_simultaneos or CONFIG["lote"]["personagens_simultaneos"]
+    requisicoes_simultaneas = requisicoes_simultaneas or CONFIG["lote"]["requisicoes_simultaneas"]
+
+    conjuntos = ler_respostas(entrada)
+    print(f"{len(conjuntos)} personagens encontrados em {entrada}.")
+
+    # Semáforo compartilhado por todos os personagens: limita as requisições à IA em andamento no lote inteiro
+    semaforo_ia = threading.BoundedSemaphore(requisicoes_simultaneas)
+    trava_saida = threading.Lock()
+    concluidos = []
+
+    diretorio = os.path.dirname(saida)
+    if diretorio and not os.path.exists(diretorio):
+        os.makedirs(diretorio, exist_ok=True)
+
+    with open(saida, 'a', encoding='utf-8') as arquivo_saida:
+
+        def gerar(respostas):
+            personagem_id = id_personagem(respostas)
+            char = BuildMyCharUI(respostas, interativo=False, semaforo_ia=semaforo_ia, cliente=cliente, iniciar=False, personagem_id=personagem_id, exportar_telemetria=False)
+            char.start()
+
+            linha = {
+                "id": personagem_id,
+                "informacoes": char.respostas,
+                "personagem": char.personagem,
+                "erros": {etapa: str(erro) for etapa, erro in char.erros_etapas.items()},
+            }
+
+            # Grava assim que o personagem termina, sem esperar o lote inteiro
+            with trava_saida:
+                arquivo_saida.write(json.dumps(linha, ensure_ascii=False) + "\n")
+                arquivo_saida.flush()
+                concluidos.append(personagem_id)
+                print(f"Personagem {personagem_id} concluído ({len(concluidos)} de {len(conjuntos)}).")
+
+        with ThreadPoolExecutor(max_workers=personagens_simultaneos) as executor:
+            futuros = [executor.submit(gerar, dict(respostas)) for respostas in conjuntos]
+
+            for futuro in futuros:
+                erro = futuro.exception()
+                if erro is not None:
+                    print(f"Erro ao gerar personagem: {erro}")
+
+    exportar_telemetria()
+    return concluidos
+
+
+# Versão assíncrona de executar_lote: todos os personagens rodam no mesmo loop de eventos, sem uma thread por
+# personagem. Um asyncio.Semaphore limita os personagens em andamento e outro as requisições à IA do lote inteiro;
+# `cliente` precisa ser assíncrono (o padrão é o AsyncGroq).
+async def executar_lote_async(entrada, saida, *, personagens_simultaneos=None, requisicoes_simultaneas=None, cliente=None):
+    if cliente is None and not os.environ.get("GROQ_API_KEY"):
+        print("Erro: variável de ambiente GROQ_API_KEY não encontrada.")
+        return
+
+    personagens_simultaneos = personagens_simultaneos or CONFIG["lote"]["personagens_simultaneos"]
+    requisicoes_simultaneas = requisicoes_simultaneas or CONFIG["lote"]["requisicoes_simultaneas"]
+
+    conjuntos = ler_respostas(entrada)
+    print(f"{len(conjuntos)} personagens encontrados em {entrada}.")
+
+    semaforo_ia = asyncio.Semaphore(requisicoes_simultaneas)
+    vagas = asyncio.Semaphore(personagens_simultaneos)
+    concluidos = []
+
+    diretorio = os.path.dirname(saida)
+    if diretorio and not os.path.exists(diretorio):
+        os.makedirs(diretorio, exist_ok=True)
+
+    with open(saida, 'a', encoding='utf-8') as arquivo_saida:
+
+        async def gerar(respostas):
+            async with vagas:
+                personagem_id = id_personagem(respostas)
+                char = BuildMyCharUI(respostas, interativo=False, semaforo_ia=semaforo_ia, cliente=cliente, personagem_id=personagem_id, assincrono=True, exportar_telemetria=False)
+                await char.start_async()
+
+            linha = {
+                "id": personagem_id,
+                "informacoes": char.respostas,
+                "personagem": char.personagem,
+                "erros": {etapa: str(erro) for etapa, erro in char.erros_etapas.items()},
+            }
+
+            # Todos os personagens gravam da mesma thread, sem trava
+            arquivo_saida.write(json.dumps(linha, ensure_ascii=False) + "\n")
+            arquivo_saida.flush()
+            concluidos.append(personagem_id)
+            print(f"Personagem {personagem_id} concluído ({len(concluidos)} de {len(conjuntos)}).")
+
+        resultados = await asyncio.gather(*(gerar(dict(respostas)) for respostas in conjuntos), return_exceptions=True)
+        for erro in resultados:
+            if isinstance(erro, Exception):
+                print(f"Erro ao gerar personagem: {erro}")
+
+    exportar_telemetria()
+    return concluidos
@@ -1,11 +1,70 @@
+import sys
+import asyncio
+import argparse
 from BuildMyChar import BuildMyCharUI
+from lote import executar_lote, executar_lote_async
+from armazenamento import obter_armazenamento
+from regeneracao import planejar_regeneracao
+from config import CONFIG
+from catalogo_templates import obter_catalogo
+from exportador import FORMATOS, exportar_personagens
 
 def main():
+    parser = argparse.ArgumentParser(description="Gerador de personagens para Character.AI.")
+    parser.add_argument("--lote", metavar="ARQUIVO", help="Gera personagens sem interação a partir de um arquivo JSONL ou CSV de respostas.")
+    parser.add_argument("--saida", metavar="ARQUIVO", help="Arquivo JSONL onde os personagens do lote são gravados (padrão: personagens.jsonl), ou arquivo da exportação (padrão: a tela).")
+    parser.add_argument("--personagens", type=int, help="Número de personagens gerados ao mesmo tempo no lote.")
+    parser.add_argument("--requisicoes", type=int, help="Número máximo de requisições à IA em andamento no lote (ou no serviço).")
+    parser.add_argument("--assincrono", action="store_true", help="Gera o lote num único loop asyncio (AsyncGroq), sem uma thread por personagem.")
+    parser.add_argument("--servico", action="store_true", help="Sobe o serviço HTTP local que recebe respostas como trabalhos numa fila (ver servico.py).")
+    parser.add_argument("--host", help="Endereço do serviço (padrão: CONFIG[\"servico\"][\"host\"]).")
+    parser.add_argument("--porta", type=int, help="Porta do serviço (padrão: CONFIG[\"servico\"][\"porta\"]).")
+    parser.add_argument("--workers", type=int, help="Personagens gerados ao mesmo tempo pelo serviço.")
+    parser.add_argument("--cliente-falso", action="store_true", help="Usa o ClienteFalso no lugar da Groq, para testar o serviço sem rede.")
+    parser.add_argument("--personagem", metavar="ID", help="Id do personagem no modo interativo; cada id guarda seus próprios arquivos.")
+    parser.add_argument("--listar", action="store_true", help="Lista os personagens guardados e sai.")
+    parser.add_argument("--simular", action="store_true", help="Mostra quais etapas do personagem seriam geradas de novo, sem executar nada.")
+    parser.add_argument("--exportar", choices=FORMATOS, help="Exporta a definição final do personagem (--personagem) ou de todos os personagens guardados.")
+    args = parser.parse_args()
+
     try:
-        BuildMyCharUI()
+        if args.listar:
+            for personagem in obter_armazenamento().listar():
+                print(personagem["id"])
+        elif args.simular:
+            personagem_id = args.personagem or CONFIG["armazenamento"]["personagem_padrao"]
+            plano = planejar_regeneracao(personagem_id, CONFIG["charJsons"], obter_armazenamento())
+            for nome, motivo in plano.items():
+                print(f"{nome}: gerar de novo ({motivo})" if motivo else f"{nome}: atual")
+        elif args.exportar:
+            armazenamento = obter_armazenamento()
+            personagem_ids = [args.personagem] if args.personagem else (personagem["id"] for personagem in armazenamento.listar())
+            templates = obter_catalogo(CONFIG["charJsons"]["personagem_templates"]).templates
+
+            if args.saida:
+                with open(args.saida, 'w', encoding='utf-8') as saida:
+                    total = exportar_personagens(saida, armazenamento, personagem_ids, templates, args.exportar)
+                print(f"{total} personagens exportados para {args.saida}.")
+            else:
+                exportar_personagens(sys.stdout, armazenamento, personagem_ids, templates, args.exportar)
+        elif args.servico:
+            # O http.server só é importado no modo serviço, para não pesar na inicialização dos outros modos
+            from servico import executar_servico
+
+            cliente = None
+            if args.cliente_falso:
+                from cliente_falso import ClienteFalso
+                cliente = ClienteFalso()
+            executar_servico(args.host, args.porta, workers=args.workers, requisicoes_simultaneas=args.requisicoes, cliente=cliente)
+        elif args.lote and args.assincrono:
+            asyncio.run(executar_lote_async(args.lote, args.saida or "personagens.jsonl", personagens_simultaneos=args.personagens, requisicoes_simultaneas=args.requisicoes))
+        elif args.lote:
+            executar_lote(args.lote, args.saida or "personagens.jsonl", personagens_simultaneos=args.personagens, requisicoes_simultaneas=args.requisicoes)
+        else:
+            BuildMyCharUI(personagem_id=args.personagem)
         
     except KeyboardInterrupt:
         print("\nInterrupção do usuário detectada. Saindo sem problemas...")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,102 @@
+import threading
+
+
+class RegistroModelos:
+    # Guarda os modelos de resposta já criados, indexados pela especificação dos campos, para que a mesma especificação
+    # devolva sempre a mesma classe. Assim o pydantic, o cache de respostas e os caches internos do instructor (que
+    # usam a classe como chave) só fazem o trabalho de montar o modelo e o schema uma vez por processo.
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.modelos = {}
+        self.schemas = {}
+        self.parciais = {}
+        self.criados = 0
+        self.reutilizados = 0
+
+    # Chave da especificação: nome, campos, tipos (modelos aninhados do registro já são classes estáveis) e o Field.
+    @staticmethod
+    def gerar_chave(nome, campos):
+        chave = [nome]
+        for campo, valor in campos.items():
+            tipo, info = valor if isinstance(valor, tuple) else (valor, None)
+            chave.append((campo, tipo, repr(info)))
+        return tuple(chave)
+
+    # Retorna o modelo para a especificação, criando e guardando junto o seu JSON schema na primeira vez.
+    def obter(self, campos, nome:str="Modelo"):
+        chave = self.gerar_chave(nome, campos)
+
+        with self.trava:
+            modelo = self.modelos.get(chave)
+            if modelo is not None:
+                self.reutilizados += 1
+                return modelo
+
+        from pydantic import create_model
+
+        modelo = create_model(nome, **campos)
+        schema = modelo.model_json_schema()
+
+        with self.trava:
+            # Outra thread pode ter criado o mesmo modelo enquanto isso: vale o que foi guardado primeiro
+            if chave in self.modelos:
+                self.reutilizados += 1
+                return self.modelos[chave]
+            self.modelos[chave] = modelo
+            self.schemas[modelo] = schema
+            self.criados += 1
+
+        return modelo
+
+    # JSON schema pré-calculado do modelo. Não deve ser alterado por quem recebe.
+    def schema(self, modelo):
+        with self.trava:
+            schema = self.schemas.get(modelo)
+
+        if schema is None:
+            schema = modelo.model_json_schema()
+            with self.trava:
+                self.schemas.setdefault(modelo, schema)
+
+        return schema
+
+    # Versão Partial do modelo para respostas em streaming; o instructor cria uma classe nova a cada `Partial[...]`.
+    def parcial(self, modelo):
+        with self.trava:
+            parcial = self.parciais.get(modelo)
+
+        if parcial is None:
+            import instructor
+
+            parcial = instructor.Partial[modelo]
+            with self.trava:
+                parcial = self.parciais.setdefault(modelo, parcial)
+
+        return parcial
+
+    def estatisticas(self):
+        with self.trava:
+            return {"modelos": len(self.modelos), "criados": self.criados, "reutilizados": self.reutilizados}
+
+
+# Field do pydantic, importado na primeira especificação montada. O pydantic (e o instructor, em `parcial`) só é
+# carregado quando alguma etapa vai mesmo chamar a IA; uma execução que só reabre artefatos salvos não o importa.
+def Field(*args, **kwargs):
+    from pydantic import Field as campo
+
+    return campo(*args, **kwargs)
+
+
+_registro = None
+_trava_registro = threading.Lock()
+
+
+# Retorna o registro de modelos compartilhado por todos os personagens do processo.
+def obter_registro():
+    global _registro
+
+    with _trava_registro:
+        if _registro is None:
+            _registro = RegistroModelos()
+
+    return _registro
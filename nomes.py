@@ -0,0 +1,106 @@
+import re
+import unicodedata
+
+# Partículas que ficam em minúsculo no meio do nome
+PARTICULAS = {"de", "da", "do", "das", "dos", "e", "di", "du", "del", "van", "von"}
+
+
+# Forma sem acentos e em minúsculo, usada como chave do dicionário.
+def sem_acentos(texto):
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(caractere for caractere in texto if not unicodedata.combining(caractere))
+
+
+# Nomes e sobrenomes brasileiros comuns que costumam ser digitados sem acento, pela forma sem acento em minúsculo
+ACENTOS = {sem_acentos(nome): nome for nome in """
+    Adão Ágata Alcântara Alícia Aloísio Álvaro Amália Amélia Américo André Ângela Angélica Ângelo Anísio Antônia Antônio
+    Aragão Araújo Assunção Áurea Aurélia Aurélio Ávila Bárbara Benício Bragança Brandão Cândida Cândido Cássia Cássio
+    Cauã Cauê Cecília Célia Célio César Cícero Cláudia Cláudio Conceição Cristóvão Damião Dário Débora Décio Diógenes
+    Dionísio Elisângela Emília Emílio Enéas Ênio Érica Érico Estêvão Eugênia Eugênio Eusébio Fábia Fábio Fabrício Falcão
+    Fátima Figueiró Flávia Flávio França Frazão Galvão Gláucia Glória Góes Góis Gonçalo Gonçalves Guimarães Gusmão
+    Hélio Heloísa Hércules Hermínia Hilário Ícaro Inácio Inês Isaías Ísis Ítalo Jânio Jéssica João Jônatas Jordão José
+    Josué Jucá Júlia Júlio Júnior Laís Lavínia Lázaro Leão Leitão Letícia Lídia Lígia Lívia Lourenço Lúcia Lúcio Luís
+    Luísa Magalhães Maitê Márcia Márcio Mário Maurício Mendonça Mércia Moisés Monção Mônica Natália Nazaré Nélio Nóbrega
+    Noé Olívia Otávia Otávio Otília Paixão Patrícia Patrício Pérola Plínio Quintão Quitéria Rebouças Régis Renê Rogério
+    Romão Rômulo Rosângela Rosário Rúbia Rúben Sá Salomão Sávio Sebastião Sérgio Sílvia Sílvio Silvério Simão Simões
+    Sônia Tainá Tânia Tarcísio Tenório Teodósio Thaís Tomás Tomé Túlio Ubiratã Úrsula Valença Valéria Vânia Verônica
+    Vinícius Virgínia Vitória Wanderléia Zé
+""".split()}
+
+# Terminações que quase sempre levam acento ou cedilha em português (-ão, -ções, -ães, -ça, -ício, -ônia, -ável...).
+# Uma palavra assim que não está no dicionário não pode ser resolvida localmente e vai para o corretor da IA.
+SEM_ACENTO_SUSPEITO = re.compile(r"(?:cao|coes|oes|aes|ao|nc[ao]|ic[ao]|[bcdglnrsv]i[ao]|eia|dre)$")
+# Nomes comuns sem acento com essas terminações, resolvidos localmente como estão
+ACENTOS.update({sem_acentos(nome): nome for nome in """
+    Alexandre Bianca Branco Franco Frederico Garcia Henrico Lia Maria Rico
+""".split()})
+CARACTERES_VALIDOS = re.compile(r"^[^\W\d_]+(?:['’-][^\W\d_]+)*$")
+
+
+# Separadores dentro de uma palavra do nome (João-Pedro, O'Neil, d'Ávila)
+SEPARADORES = re.compile(r"(['’-])")
+# Elisões antes do apóstrofo que ficam em minúsculo fora da primeira posição (Maria d'Ávila)
+ELISOES = {"d"}
+
+
+# Formata uma parte de uma palavra do nome: acento pelo dicionário ou a primeira letra maiúscula. Retorna None quando a
+# parte parece precisar de um acento que o dicionário não conhece.
+def formatar_parte(parte):
+    chave = sem_acentos(parte)
+    if chave in ACENTOS:
+        return ACENTOS[chave]
+
+    # Quem digitou com acento já resolveu o acento; só falta a capitalização
+    minuscula = parte.lower()
+    if minuscula == chave and SEM_ACENTO_SUSPEITO.search(chave):
+        return None
+
+    return minuscula[:1].upper() + minuscula[1:]
+
+
+# Formata uma palavra do nome: partícula em minúsculo (fora da primeira posição) ou cada parte separada por hífen ou
+# apóstrofo formatada por formatar_parte, com as elisões (d') em minúsculo fora da primeira posição. Retorna None
+# quando alguma parte parece precisar de um acento que o dicionário não conhece.
+def formatar_palavra(palavra, primeira:bool=False):
+    if not primeira and palavra.lower() in PARTICULAS:
+        return palavra.lower()
+
+    partes = SEPARADORES.split(palavra)
+    for indice in range(0, len(partes), 2):
+        if indice + 1 < len(partes) and partes[indice + 1] in "'’" and partes[indice].lower() in ELISOES:
+            partes[indice] = partes[indice].upper() if primeira and indice == 0 else partes[indice].lower()
+            continue
+
+        partes[indice] = formatar_parte(partes[indice])
+        if partes[indice] is None:
+            return None
+
+    return "".join(partes)
+
+
+# Normaliza um nome próprio em português: espaços, capitalização, partículas e acentos dos nomes comuns. Nomes acima
+# de `limite` caracteres perdem os nomes do meio (com as suas partículas), ficando o primeiro e o último.
+# Retorna {"nome": ..., "resolvido": True} ou {"nome": None, "resolvido": False, "motivo": ...} quando o nome precisa
+# do corretor da IA.
+def normalizar_nome(texto, limite:int=20):
+    palavras = str(texto or "").split()
+    if not palavras:
+        return {"nome": None, "resolvido": False, "motivo": "nome vazio"}
+
+    formatadas = []
+    for posicao, palavra in enumerate(palavras):
+        if not CARACTERES_VALIDOS.match(palavra):
+            return {"nome": None, "resolvido": False, "motivo": f"caracteres inválidos em '{palavra}'"}
+
+        formatada = formatar_palavra(palavra, primeira=posicao == 0)
+        if formatada is None:
+            return {"nome": None, "resolvido": False, "motivo": f"acento desconhecido em '{palavra}'"}
+        formatadas.append(formatada)
+
+    nome = " ".join(formatadas)
+    if len(nome) > limite:
+        nome = " ".join([formatadas[0], formatadas[-1]]) if len(formatadas) > 1 else nome
+    if len(nome) > limite:
+        return {"nome": None, "resolvido": False, "motivo": f"mais de {limite} caracteres"}
+
+    return {"nome": nome, "resolvido": True}
@@ -0,0 +1,67 @@
+import math
+from duplicatas import DetectorDuplicatas
+from exportador import pedacos_dialogo, pedacos_titulo_dialogos, dialogo_completo, tamanho_pedacos
+
+
+class OrcamentoDialogos:
+    # Espaço que sobra para os diálogos na definição final, depois das seções de definição já renderizadas. Decide
+    # quantos diálogos ainda vale pedir à IA (pelo tamanho médio dos que já chegaram) e, no fim, escolhe os de maior
+    # valor que cabem, para nenhuma chamada gerar texto que seria cortado do personagem.
+    def __init__(self, tamanho_definicoes:int, *, limite:int=32000, margem:float=0.05, caracteres_por_dialogo:int=160):
+        self.limite = limite
+        self.tamanho_definicoes = tamanho_definicoes
+        self.espaco = int(limite * (1 - margem)) - tamanho_definicoes - tamanho_pedacos(pedacos_titulo_dialogos())
+        self.caracteres_por_dialogo = caracteres_por_dialogo
+
+    # Caracteres ocupados pelos diálogos na definição final.
+    @staticmethod
+    def ocupado(dialogos):
+        return sum(tamanho_dialogo(dialogo) for dialogo in dialogos)
+
+    # Quantos diálogos ainda cabem, pelo tamanho médio dos que já temos (ou a estimativa inicial, sem nenhum).
+    def cabem(self, dialogos):
+        ocupado = self.ocupado(dialogos)
+        medio = ocupado / len(dialogos) if dialogos else self.caracteres_por_dialogo
+        return max(0, math.floor((self.espaco - ocupado) / max(1, medio)))
+
+    # Quantos diálogos pedir na próxima chamada: até `quantidade`, sem passar do que ainda cabe. Retorna 0 quando
+    # cabem menos de `minimo` diálogos, porque a chamada custaria quase o mesmo e traria pouco.
+    def pedir(self, dialogos, quantidade:int=20, minimo:int=1):
+        cabem = self.cabem(dialogos)
+        return min(quantidade, cabem) if cabem >= max(1, minimo) else 0
+
+    # Separa os diálogos que entram na definição dos que sobram. Os de maior valor são escolhidos primeiro, cada um
+    # só se ainda couber; os escolhidos mantêm a ordem original.
+    def ajustar(self, dialogos):
+        ordem = sorted(range(len(dialogos)), key=lambda indice: (-valor_dialogo(dialogos[indice]), tamanho_dialogo(dialogos[indice]), indice))
+        livre = self.espaco
+        escolhidos = set()
+
+        for indice in ordem:
+            tamanho = tamanho_dialogo(dialogos[indice])
+            if dialogo_completo(dialogos[indice]) and tamanho <= livre:
+                escolhidos.add(indice)
+                livre -= tamanho
+
+        return (
+            [dialogo for indice, dialogo in enumerate(dialogos) if indice in escolhidos],
+            [dialogo for indice, dialogo in enumerate(dialogos) if indice not in escolhidos],
+        )
+
+
+# Caracteres que o diálogo ocupa na definição final.
+def tamanho_dialogo(dialogo):
+    return tamanho_pedacos(pedacos_dialogo(dialogo)) if dialogo_completo(dialogo) else 0
+
+
+# Valor de um diálogo para a definição: os pares em que o 'char' fala mostram o jeito dele e valem bem mais, e a
+# variedade de palavras favorece falas com conteúdo próprio sobre frases genéricas e repetitivas.
+def valor_dialogo(dialogo):
+    if not dialogo_completo(dialogo):
+        return 0
+
+    falantes = {dialogo["user1"].strip().lower(), dialogo["user2"].strip().lower()}
+    palavras = DetectorDuplicatas.normalizar(f"{dialogo['msg1']} {dialogo['msg2']}").split()
+    variedade = len(set(palavras)) / len(palavras) if palavras else 0
+
+    return (1.0 if "char" in falantes else 0.25) * (0.5 + variedade)
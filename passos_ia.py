@@ -0,0 +1,74 @@
+import functools
+
+
+class PedidoIA:
+    # Chamada à IA pedida por um passo de etapa: os mesmos argumentos de exec_ia. Quem conduz os passos faz a chamada
+    # (com exec_ia ou exec_ia_async) e devolve a resposta ao gerador.
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+
+class Paralelo:
+    # Grupo de geradores de passos que rodam ao mesmo tempo, até `max_workers` de cada vez (threads no modo bloqueante,
+    # tarefas do asyncio no modo assíncrono). O gerador que pediu recebe a lista dos resultados, na ordem dos passos.
+    def __init__(self, passos, max_workers:int=4):
+        self.passos = list(passos)
+        self.max_workers = max_workers
+
+
+# Conduz um gerador de passos até o fim: cada valor produzido vai para `executar` e o resultado volta ao gerador com
+# `send`; um erro de `executar` é lançado dentro do gerador, no ponto do `yield`. Retorna o valor final do gerador.
+def conduzir(passos, executar):
+    resposta, erro = None, None
+    while True:
+        try:
+            pedido = passos.throw(erro) if erro is not None else passos.send(resposta)
+        except StopIteration as fim:
+            return fim.value
+
+        try:
+            resposta, erro = executar(pedido), None
+        except Exception as e:
+            resposta, erro = None, e
+
+
+# Versão assíncrona de conduzir, com `executar` sendo uma corrotina.
+async def conduzir_async(passos, executar):
+    resposta, erro = None, None
+    while True:
+        try:
+            pedido = passos.throw(erro) if erro is not None else passos.send(resposta)
+        except StopIteration as fim:
+            return fim.value
+
+        try:
+            resposta, erro = await executar(pedido), None
+        except Exception as e:
+            resposta, erro = None, e
+
+
+class EtapaIA:
+    # Decorador dos métodos escritos como gerador de passos (PedidoIA e Paralelo). Para um método `nome`, a classe fica
+    # com três versões dos mesmos passos:
+    # - `nome`: roda bloqueando, com exec_ia e threads (instancia.executar_pedido);
+    # - `nome_async`: corrotina que roda com exec_ia_async e tarefas do asyncio (instancia.executar_pedido_async);
+    # - `passos_nome`: o próprio gerador, para usar com `yield from` dentro de outros passos.
+    def __init__(self, passos):
+        self.passos = passos
+
+    def __set_name__(self, dono, nome):
+        passos = self.passos
+
+        @functools.wraps(passos)
+        def bloqueante(instancia, *args, **kwargs):
+            return conduzir(passos(instancia, *args, **kwargs), instancia.executar_pedido)
+
+        @functools.wraps(passos)
+        async def assincrona(instancia, *args, **kwargs):
+            return await conduzir_async(passos(instancia, *args, **kwargs), instancia.executar_pedido_async)
+
+        assincrona.__name__ = nome + "_async"
+        setattr(dono, nome, bloqueante)
+        setattr(dono, nome + "_async", assincrona)
+        setattr(dono, "passos_" + nome, passos)
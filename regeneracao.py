@@ -0,0 +1,133 @@
+import os
+import json
+import hashlib
+from config import CONFIG, PROMPT
+from armazenamento import chave_artefato
+from roteamento import rota_etapa
+
+
+def hash_valor(valor):
+    texto = json.dumps(valor, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+# Hash do conteúdo de um arquivo ou de todos os arquivos de uma pasta (nome e conteúdo, em ordem).
+def hash_arquivos(caminho):
+    resumo = hashlib.sha256()
+
+    if os.path.isdir(caminho):
+        arquivos = sorted(os.path.join(caminho, nome) for nome in os.listdir(caminho) if os.path.isfile(os.path.join(caminho, nome)))
+    else:
+        arquivos = [caminho] if os.path.exists(caminho) else []
+
+    for arquivo in arquivos:
+        resumo.update(os.path.basename(arquivo).encode("utf-8"))
+        with open(arquivo, 'rb') as f:
+            resumo.update(f.read())
+
+    return resumo.hexdigest()
+
+
+# Etapas de CONFIG["etapas"] como rodam com a configuração atual: as etapas de CONFIG["resumo"]["etapas"] passam a
+# depender do resumo, e a etapa criar_resumo só entra quando alguma etapa usa o resumo. Com o orçamento dos diálogos,
+# criar_dialogos depende da definição e dos templates, que decidem o espaço que sobra.
+def etapas_ativas():
+    usam_resumo = set(CONFIG["resumo"]["etapas"])
+    etapas = []
+
+    for etapa in CONFIG["etapas"]:
+        if etapa["nome"] == "criar_resumo" and not usam_resumo:
+            continue
+        if etapa["nome"] in usam_resumo:
+            etapa = dict(etapa, entradas=etapa["entradas"] + ["personagem_resumo"])
+        if etapa["nome"] == "criar_dialogos" and CONFIG["dialogos"]["orcamento"]["ativo"]:
+            etapa = dict(etapa, entradas=etapa["entradas"] + ["personagem_definicao"], arquivos=etapa.get("arquivos", []) + ["personagem_templates"])
+        etapas.append(etapa)
+
+    return etapas
+
+
+# Etapas que geram texto com a IA e guardam o resultado; só elas são regeneradas pelo hash das entradas.
+def eh_gerada(etapa):
+    return bool(etapa.get("prompts"))
+
+
+# Artefatos guardados de uma saída: a própria chave ou as partes dela (personagem_definicao_<template>).
+def artefatos_da_saida(saida, chaves):
+    return [chave for chave in chaves if chave == saida or chave.startswith(saida + "_")]
+
+
+# Etapa gerada que produz o artefato, ou None.
+def etapa_do_artefato(chave):
+    for etapa in etapas_ativas():
+        if eh_gerada(etapa) and any(artefatos_da_saida(saida, [chave]) for saida in etapa["saidas"]):
+            return etapa
+    return None
+
+
+# Hash de tudo que decide o que a etapa gera: o conteúdo atual dos artefatos de entrada, os prompts, a rota (modelo,
+# limite de tokens e parâmetros de amostragem) e as configurações e arquivos declarados em CONFIG["etapas"].
+def hash_etapa(etapa, personagem_id, charJsons, armazenamento):
+    entradas = {}
+    for entrada in etapa.get("entradas", []):
+        chave = chave_artefato(charJsons[entrada], charJsons) if entrada in charJsons else None
+        if not chave:
+            continue
+
+        dados = armazenamento.abrir(personagem_id, chave)
+        if dados is None:
+            # Saídas guardadas em partes (personagem_definicao_<template>) entram com todas as partes
+            partes = [parte for parte in sorted(artefatos_da_saida(chave, armazenamento.hashes(personagem_id))) if parte != chave]
+            dados = {parte: armazenamento.abrir(personagem_id, parte) for parte in partes} or None
+        entradas[entrada] = dados
+
+    return hash_valor({
+        "entradas": entradas,
+        "prompts": {nome: PROMPT[nome] for nome in etapa.get("prompts", [])},
+        "rota": rota_etapa(etapa["nome"]),
+        "configuracoes": {secao: CONFIG[secao] for secao in etapa.get("configuracoes", [])},
+        "arquivos": {nome: hash_arquivos(charJsons[nome]) for nome in etapa.get("arquivos", [])},
+    })
+
+
+# Decide, como um sistema de build, quais etapas geradas precisam rodar de novo: a saída não existe, o hash das
+# entradas mudou (ou não foi registrado), ou alguma etapa da qual ela depende vai ser regenerada.
+# Retorna {etapa: motivo}, com motivo None para as etapas cujas saídas guardadas continuam valendo.
+def planejar_regeneracao(personagem_id, charJsons, armazenamento):
+    etapas = {etapa["nome"]: etapa for etapa in etapas_ativas()}
+    produtores = {saida: etapa["nome"] for etapa in etapas.values() for saida in etapa.get("saidas", [])}
+    guardados = armazenamento.hashes(personagem_id)
+    motivos = {}
+
+    def visitar(nome):
+        if nome in motivos:
+            return motivos[nome]
+
+        etapa = etapas[nome]
+        motivo = None
+
+        for entrada in etapa.get("entradas", []):
+            if visitar(produtores[entrada]):
+                motivo = f"depende de {produtores[entrada]}"
+                break
+
+        if eh_gerada(etapa):
+            artefatos = [chave for saida in etapa["saidas"] for chave in artefatos_da_saida(saida, guardados)]
+            if not artefatos:
+                motivo = "sem saída guardada"
+            elif motivo is not None:
+                pass
+            elif any(guardados[chave] is None for chave in artefatos):
+                motivo = "sem registro das entradas"
+            else:
+                atual = hash_etapa(etapa, personagem_id, charJsons, armazenamento)
+                if any(guardados[chave] != atual for chave in artefatos):
+                    motivo = "entradas alteradas"
+
+        motivos[nome] = motivo
+        return motivo
+
+    for nome in etapas:
+        visitar(nome)
+
+    return {nome: motivo for nome, motivo in motivos.items() if eh_gerada(etapas[nome])}
@@ -0,0 +1,262 @@
+import re
+import json
+
+# Cerca de bloco de código (```json ... ```) em volta da resposta
+CERCA = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+LITERAL = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+LITERAIS = {"true": True, "false": False, "null": None}
+
+
+class LeitorJSON:
+    # Lê JSON tolerando os estragos comuns das respostas dos modelos: vírgulas sobrando ou faltando entre os itens,
+    # quebras de linha dentro das strings, cerca de código em volta e, principalmente, o texto cortado no meio. Em vez
+    # de falhar no fim do texto, cada valor volta como (valor, completo): listas ficam só com os itens completos e a
+    # string cortada fica com o que chegou. `caminho` são as chaves, de fora para dentro, até o valor cortado que ficou
+    # nos dados (vazio quando nenhum valor cortado ficou).
+    def __init__(self, texto):
+        self.texto = texto
+        self.pos = 0
+        self.caminho = []
+        self.itens_descartados = 0
+
+    def espacos(self):
+        while self.pos < len(self.texto) and self.texto[self.pos] in " \t\r\n":
+            self.pos += 1
+
+    def fim(self):
+        return self.pos >= len(self.texto)
+
+    def valor(self):
+        self.espacos()
+        if self.fim():
+            return None, False
+
+        caractere = self.texto[self.pos]
+        if caractere == "{":
+            return self.objeto()
+        if caractere == "[":
+            return self.lista()
+        if caractere == '"':
+            return self.string()
+        return self.literal()
+
+    def objeto(self):
+        self.pos += 1
+        objeto = {}
+
+        while True:
+            self.espacos()
+            if self.fim():
+                return objeto, False
+
+            caractere = self.texto[self.pos]
+            if caractere == "}":
+                self.pos += 1
+                return objeto, True
+            if caractere == ",":
+                self.pos += 1
+                continue
+            if caractere != '"':
+                raise ValueError(f"chave esperada na posição {self.pos}")
+
+            chave, completa = self.string()
+            self.espacos()
+            if not completa or self.fim():
+                return objeto, False
+            if self.texto[self.pos] != ":":
+                raise ValueError(f"':' esperado na posição {self.pos}")
+            self.pos += 1
+
+            valor, completo = self.valor()
+            if not completo:
+                # Um texto, lista ou objeto que começou a chegar fica, para quem for completar a resposta
+                if valor is not None:
+                    objeto[chave] = valor
+                    self.caminho.insert(0, chave)
+                return objeto, False
+            objeto[chave] = valor
+
+    def lista(self):
+        self.pos += 1
+        itens = []
+
+        while True:
+            self.espacos()
+            if self.fim():
+                return itens, False
+
+            caractere = self.texto[self.pos]
+            if caractere == "]":
+                self.pos += 1
+                return itens, True
+            if caractere == ",":
+                self.pos += 1
+                continue
+
+            valor, completo = self.valor()
+            if not completo:
+                # O item cortado no meio sai inteiro; só os itens completos são aproveitados
+                if valor is not None:
+                    self.itens_descartados += 1
+                self.caminho = []
+                return itens, False
+            itens.append(valor)
+
+    def string(self):
+        inicio = self.pos
+        indice = inicio + 1
+        ultimo_escape = None
+
+        while indice < len(self.texto):
+            if self.texto[indice] == "\\":
+                ultimo_escape = indice
+                indice += 2
+                continue
+            if self.texto[indice] == '"':
+                self.pos = indice + 1
+                return json.loads(self.texto[inicio:self.pos], strict=False), True
+            indice += 1
+
+        # Cortada: descarta um escape pela metade (a barra sozinha ou um \u sem os quatro dígitos) e fecha as aspas
+        self.pos = len(self.texto)
+        final = len(self.texto)
+        if ultimo_escape is not None and (indice > len(self.texto) or self.texto[ultimo_escape + 1] == "u" and ultimo_escape + 6 > len(self.texto)):
+            final = ultimo_escape
+        return json.loads(self.texto[inicio:final] + '"', strict=False), False
+
+    def literal(self):
+        encontrado = LITERAL.match(self.texto, self.pos)
+        restante = self.texto[self.pos:]
+
+        # Um número ou literal que vai até o fim do texto pode ter sido cortado ("12" de "125", "tru")
+        if encontrado is None or encontrado.end() == len(self.texto):
+            if encontrado is not None or any(literal.startswith(restante.strip()) for literal in LITERAIS):
+                self.pos = len(self.texto)
+                return None, False
+            raise ValueError(f"valor inválido na posição {self.pos}")
+
+        self.pos = encontrado.end()
+        texto = encontrado.group()
+        if texto in LITERAIS:
+            return LITERAIS[texto], True
+        return (float(texto) if any(caractere in texto for caractere in ".eE") else int(texto)), True
+
+
+# Repara o JSON de uma resposta que não validou. Retorna {"dados", "completo", "cortado", "caminho",
+# "itens_descartados"}: `completo` é False quando o texto terminou antes do JSON (resposta cortada), `caminho` são as
+# chaves até o valor cortado e `cortado` é a primeira delas, o campo de fora (None se nenhum valor cortado ficou). Lança
+# ValueError se o texto não tem conserto.
+def reparar_json(texto):
+    texto = CERCA.sub("", texto.strip())
+
+    # Ignora o que vier antes do JSON ("Aqui está o JSON: {...")
+    inicios = [posicao for posicao in (texto.find("{"), texto.find("[")) if posicao >= 0]
+    if not inicios:
+        raise ValueError("nenhum JSON na resposta")
+
+    leitor = LeitorJSON(texto[min(inicios):])
+    dados, completo = leitor.valor()
+    caminho = leitor.caminho
+    return {"dados": dados, "completo": completo, "cortado": caminho[0] if caminho else None, "caminho": caminho, "itens_descartados": leitor.itens_descartados}
+
+
+# Texto de uma resposta da API (ChatCompletion): os argumentos da chamada de ferramenta (modo TOOLS do instructor) ou
+# o conteúdo da mensagem.
+def texto_da_resposta(resposta):
+    try:
+        mensagem = resposta.choices[0].message
+    except (AttributeError, IndexError, TypeError):
+        return None
+
+    for chamada in getattr(mensagem, "tool_calls", None) or []:
+        argumentos = getattr(getattr(chamada, "function", None), "arguments", None)
+        if isinstance(argumentos, str) and argumentos:
+            return argumentos
+
+    conteudo = getattr(mensagem, "content", None)
+    return conteudo if isinstance(conteudo, str) and conteudo else None
+
+
+# Procura, no erro de uma chamada e nas suas causas, o texto que o modelo devolveu: a entrada do erro `json_invalid`
+# do pydantic, a `failed_generation` de um 400 da Groq ou a última resposta guardada pelo instructor
+# (InstructorRetryException). Retorna None se o erro não traz o texto.
+def texto_bruto(erro):
+    pendentes = [erro]
+    vistos = set()
+
+    while pendentes:
+        atual = pendentes.pop(0)
+        if atual is None or id(atual) in vistos:
+            continue
+        vistos.add(id(atual))
+
+        if callable(getattr(atual, "errors", None)):
+            try:
+                for detalhe in atual.errors():
+                    if detalhe.get("type") == "json_invalid" and isinstance(detalhe.get("input"), str):
+                        return detalhe["input"]
+            except Exception:
+                pass
+
+        corpo = getattr(atual, "body", None)
+        if isinstance(corpo, dict):
+            gerado = corpo.get("failed_generation") or (corpo.get("error") or {}).get("failed_generation")
+            if isinstance(gerado, str) and gerado:
+                return gerado
+
+        for tentativa in reversed(getattr(atual, "failed_attempts", None) or []):
+            pendentes.append(getattr(tentativa, "exception", None))
+        texto = texto_da_resposta(getattr(atual, "last_completion", None))
+        if texto:
+            return texto
+
+        pendentes += [atual.__cause__, atual.__context__]
+
+    return None
+
+
+# O que falta para os dados valerem como o modelo: {campo: "continuar"} para o campo cortado no meio (texto ou lista,
+# que são completados) e {campo: "faltando"} para os campos obrigatórios que não chegaram.
+def pendencias(json_schema, reparo):
+    dados = reparo["dados"] if isinstance(reparo["dados"], dict) else {}
+    pendentes = {}
+
+    for campo, info in json_schema.model_fields.items():
+        if campo == reparo["cortado"] and isinstance(dados.get(campo), (str, list)):
+            pendentes[campo] = "continuar"
+        elif campo == reparo["cortado"] or (campo not in dados and info.is_required()):
+            pendentes[campo] = "faltando"
+
+    return pendentes
+
+
+# A chamada de ferramenta que falhou às vezes vem embrulhada ({"name": ..., "arguments": {...}}); troca os dados do
+# reparo pelos argumentos quando os campos do modelo estão lá dentro, e o campo cortado passa a ser o de dentro dos
+# argumentos.
+def desembrulhar(reparo, json_schema):
+    dados = reparo["dados"]
+    if not isinstance(dados, dict) or set(dados) & set(json_schema.model_fields):
+        return reparo
+
+    for chave in ("arguments", "parameters"):
+        if isinstance(dados.get(chave), dict):
+            caminho = reparo["caminho"][1:] if reparo["caminho"][:1] == [chave] else []
+            return dict(reparo, dados=dados[chave], caminho=caminho, cortado=caminho[0] if caminho else None)
+    return reparo
+
+
+# Junta ao que foi aproveitado a resposta do complemento: texto e listas cortados continuam, os campos que faltavam
+# entram inteiros.
+def juntar(dados, complemento, pendentes):
+    juntos = dict(dados)
+    for campo, situacao in pendentes.items():
+        if campo not in complemento:
+            continue
+        if situacao == "continuar" and isinstance(juntos.get(campo), str):
+            juntos[campo] = juntos[campo] + str(complemento[campo])
+        elif situacao == "continuar" and isinstance(juntos.get(campo), list):
+            juntos[campo] = juntos[campo] + list(complemento[campo])
+        else:
+            juntos[campo] = complemento[campo]
+
+    return juntos
@@ -0,0 +1,25 @@
+from config import CONFIG
+
+
+# Rota da etapa em CONFIG["ia"]["rotas"], completa: o modelo padrão, sem limite de tokens e a amostragem neutra para o
+# que a etapa não define, e o modelo de escalonamento.
+def rota_etapa(etapa):
+    rota = CONFIG["ia"]["rotas"].get(etapa, {})
+    return {
+        "modelo": rota.get("modelo", CONFIG["ia"]["modelo"]),
+        "max_tokens": rota.get("max_tokens"),
+        "temperature": rota.get("temperature", 1.0),
+        "top_p": rota.get("top_p", 1.0),
+        "escalar_para": rota.get("escalar_para", CONFIG["ia"]["escalonamento"]["modelo"]),
+    }
+
+
+# Modelo da etapa, conforme a rota.
+def modelo_etapa(etapa):
+    return rota_etapa(etapa)["modelo"]
+
+
+# Custo da chamada em dólares, pelos preços de CONFIG["ia"]["precos"]; modelos sem preço custam 0.
+def custo_chamada(modelo, tokens_prompt, tokens_resposta):
+    preco_prompt, preco_resposta = CONFIG["ia"]["precos"].get(modelo, (0, 0))
+    return (tokens_prompt * preco_prompt + tokens_resposta * preco_resposta) / 1_000_000
@@ -0,0 +1,425 @@
+import os
+import re
+import json
+import time
+import uuid
+import heapq
+import itertools
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from config import CONFIG
+from BuildMyChar import BuildMyCharUI
+from telemetria import escapar_rotulo, obter_telemetria
+
+# Estados de um trabalho
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+
+# Ids aceitos pelo serviço: o id vira o id do personagem no armazenamento (e o nome da pasta no backend "arquivos")
+ID_VALIDO = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class Trabalho:
+    # Um personagem pedido ao serviço: as respostas (mesmas chaves de perguntas.json), a prioridade e os eventos do
+    # progresso, guardados em ordem para que quem acompanha pelo SSE possa chegar a qualquer momento (ou reconectar
+    # com Last-Event-ID) e receber tudo desde o começo.
+    def __init__(self, trabalho_id, respostas, prioridade:int=0):
+        self.id = trabalho_id
+        self.respostas = respostas
+        self.prioridade = prioridade
+        self.estado = NA_FILA
+        self.resultado = None
+        self.criado = time.time()
+        self.iniciado = None
+        self.terminado = None
+        self.eventos = []
+        self.condicao = threading.Condition()
+
+    def terminou(self):
+        return self.estado in (CONCLUIDO, FALHOU)
+
+    # Acrescenta um evento ao progresso e acorda quem está esperando por ele.
+    def registrar(self, evento):
+        with self.condicao:
+            self.eventos.append(dict(evento, momento=round(time.time(), 3)))
+            self.condicao.notify_all()
+
+    def iniciar(self):
+        with self.condicao:
+            self.estado = EXECUTANDO
+            self.iniciado = time.time()
+        self.registrar({"tipo": "inicio", "espera_fila": round(self.iniciado - self.criado, 3)})
+
+    # Muda o estado final e registra o evento "fim" juntos, para que o fluxo SSE nunca veja o trabalho terminado sem
+    # o último evento.
+    def terminar(self, estado, resultado):
+        with self.condicao:
+            self.estado = estado
+            self.resultado = resultado
+            self.terminado = time.time()
+            self.eventos.append({"tipo": "fim", "estado": estado, "resultado": resultado, "momento": round(self.terminado, 3)})
+            self.condicao.notify_all()
+
+    # Eventos a partir da posição `inicio`, esperando até `espera` segundos quando ainda não há nenhum novo. Retorna
+    # (eventos, terminou).
+    def aguardar_eventos(self, inicio, espera):
+        with self.condicao:
+            self.condicao.wait_for(lambda: len(self.eventos) > inicio or self.terminou(), espera)
+            return self.eventos[inicio:], self.terminou()
+
+    def descrever(self):
+        with self.condicao:
+            return {
+                "id": self.id,
+                "estado": self.estado,
+                "prioridade": self.prioridade,
+                "criado": self.criado,
+                "iniciado": self.iniciado,
+                "terminado": self.terminado,
+                "eventos": len(self.eventos),
+                "resultado": self.resultado,
+            }
+
+
+class ServicoPersonagens:
+    # Fila de prioridade de trabalhos atendida por um número fixo de workers (threads), cada um gerando um personagem
+    # por vez com o pipeline de sempre. Maior prioridade sai primeiro; entre iguais, vale a ordem de chegada. As
+    # requisições à IA de todos os workers passam pelo mesmo semáforo, como no modo em lote.
+    # `cliente` substitui o cliente da Groq (por exemplo, pelo ClienteFalso, para testar o serviço sem rede).
+    def __init__(self, *, workers=None, requisicoes_simultaneas=None, max_fila=None, max_terminados=None, cliente=None):
+        self.workers = workers or CONFIG["servico"]["workers"]
+        self.max_fila = max_fila or CONFIG["servico"]["max_fila"]
+        self.max_terminados = max_terminados or CONFIG["servico"]["max_terminados"]
+        self.cliente = cliente
+        self.semaforo_ia = threading.BoundedSemaphore(requisicoes_simultaneas or CONFIG["servico"]["requisicoes_simultaneas"])
+
+        self.condicao = threading.Condition()
+        self.fila = []
+        self.sequencia = itertools.count()
+        self.trabalhos = {}
+        self.terminados = OrderedDict()
+        self.parando = False
+        self.fila_maxima = 0
+        self.contagens = {"recebidos": 0, "recusados": 0, CONCLUIDO: 0, FALHOU: 0}
+
+        # Tempo ocupado de cada worker, para a utilização
+        self.inicio = time.monotonic()
+        self.tempo_ocupado = [0.0] * self.workers
+        self.ocupado_desde = [None] * self.workers
+        self.threads = [threading.Thread(target=self.trabalhar, args=(indice,), name=f"worker-{indice}", daemon=True) for indice in range(self.workers)]
+
+    def iniciar(self):
+        for thread in self.threads:
+            thread.start()
+
+    # Para de aceitar trabalhos; os workers terminam o que já começaram e saem sem pegar os que ainda estão na fila.
+    def parar(self, espera=None):
+        with self.condicao:
+            self.parando = True
+            self.condicao.notify_all()
+        for thread in self.threads:
+            thread.join(espera)
+
+    # Coloca as respostas na fila. Retorna (trabalho, None) ou (None, motivo) quando o pedido é recusado:
+    # "id_em_uso" se já existe um trabalho com o mesmo id que ainda não terminou, "fila_cheia" ou "parando".
+    def enviar(self, respostas, prioridade:int=0, trabalho_id=None):
+        trabalho_id = str(trabalho_id or uuid.uuid4().hex[:12])
+
+        with self.condicao:
+            anterior = self.trabalhos.get(trabalho_id)
+            motivo = None
+            if self.parando:
+                motivo = "parando"
+            elif anterior is not None and not anterior.terminou():
+                motivo = "id_em_uso"
+            elif len(self.fila) >= self.max_fila:
+                motivo = "fila_cheia"
+
+            if motivo:
+                self.contagens["recusados"] += 1
+                return None, motivo
+
+            trabalho = Trabalho(trabalho_id, respostas, prioridade)
+            self.terminados.pop(trabalho_id, None)
+            self.trabalhos[trabalho_id] = trabalho
+            heapq.heappush(self.fila, (-prioridade, next(self.sequencia), trabalho))
+            self.fila_maxima = max(self.fila_maxima, len(self.fila))
+            self.contagens["recebidos"] += 1
+            # Registrado antes de acordar um worker, para o evento "fila" vir sempre antes do "inicio"
+            trabalho.registrar({"tipo": "fila", "posicao": self.posicao(trabalho), "prioridade": prioridade})
+            self.condicao.notify()
+
+        return trabalho, None
+
+    # Quantos trabalhos saem da fila antes deste (chamar com a trava).
+    def posicao(self, trabalho):
+        chave = next(item[:2] for item in self.fila if item[2] is trabalho)
+        return sum(1 for item in self.fila if item[:2] < chave)
+
+    def obter(self, trabalho_id):
+        with self.condicao:
+            return self.trabalhos.get(trabalho_id)
+
+    def listar(self):
+        with self.condicao:
+            trabalhos = list(self.trabalhos.values())
+        return [{"id": trabalho.id, "estado": trabalho.estado, "prioridade": trabalho.prioridade} for trabalho in trabalhos]
+
+    # Laço de cada worker: pega o trabalho de maior prioridade e gera o personagem.
+    def trabalhar(self, indice):
+        while True:
+            with self.condicao:
+                while not self.fila and not self.parando:
+                    self.condicao.wait()
+                if self.parando:
+                    return
+                _, _, trabalho = heapq.heappop(self.fila)
+                self.ocupado_desde[indice] = time.monotonic()
+
+            try:
+                self.executar(trabalho)
+            finally:
+                with self.condicao:
+                    self.tempo_ocupado[indice] += time.monotonic() - self.ocupado_desde[indice]
+                    self.ocupado_desde[indice] = None
+                    self.contagens[trabalho.estado] += 1
+                    self.guardar_terminado(trabalho)
+
+    # Gera o personagem do trabalho, transmitindo o progresso das etapas e dos artefatos. O trabalho termina como
+    # "concluido" quando a definição final foi montada e como "falhou" caso contrário.
+    def executar(self, trabalho):
+        trabalho.iniciar()
+
+        try:
+            char = BuildMyCharUI(
+                dict(trabalho.respostas), interativo=False, semaforo_ia=self.semaforo_ia, cliente=self.cliente,
+                iniciar=False, personagem_id=trabalho.id, ao_progresso=trabalho.registrar, exportar_telemetria=False
+            )
+            char.start()
+        except Exception as e:
+            trabalho.terminar(FALHOU, {"id": trabalho.id, "erros": {"servico": str(e)}})
+            return
+
+        resultado = {
+            "id": trabalho.id,
+            "nome": char.respostas.get("Nome"),
+            "definicao_final": char.personagem.get("Definição Final"),
+            "personagem": {chave: valor for chave, valor in char.personagem.items() if chave != "Definição Final"},
+            "erros": {etapa: str(erro) for etapa, erro in char.erros_etapas.items()},
+            "etapas_ignoradas": list(char.etapas_ignoradas),
+            "duracoes": {etapa: round(segundos, 4) for etapa, segundos in char.duracoes_etapas.items()},
+            "espera_fila": round(trabalho.iniciado - trabalho.criado, 3),
+            "tempo_execucao": round(time.time() - trabalho.iniciado, 3),
+        }
+        trabalho.terminar(CONCLUIDO if resultado["definicao_final"] else FALHOU, resultado)
+
+    # Guarda o trabalho entre os terminados, esquecendo os mais antigos além de max_terminados (chamar com a trava).
+    def guardar_terminado(self, trabalho):
+        self.terminados[trabalho.id] = trabalho
+        while len(self.terminados) > self.max_terminados:
+            antigo, _ = self.terminados.popitem(last=False)
+            if self.trabalhos.get(antigo) is not None and self.trabalhos[antigo].terminou():
+                del self.trabalhos[antigo]
+
+    # Profundidade da fila, workers ocupados e utilização (fração do tempo em que os workers estiveram gerando
+    # personagens desde o início do serviço).
+    def metricas(self):
+        agora = time.monotonic()
+        with self.condicao:
+            ocupados = [desde for desde in self.ocupado_desde if desde is not None]
+            tempo_ocupado = sum(self.tempo_ocupado) + sum(agora - desde for desde in ocupados)
+            estados = {NA_FILA: 0, EXECUTANDO: 0, CONCLUIDO: 0, FALHOU: 0}
+            for trabalho in self.trabalhos.values():
+                estados[trabalho.estado] += 1
+
+            return {
+                "fila": len(self.fila),
+                "fila_maxima": self.fila_maxima,
+                "workers": self.workers,
+                "workers_ocupados": len(ocupados),
+                "utilizacao": round(tempo_ocupado / (self.workers * max(agora - self.inicio, 1e-9)), 4),
+                "tempo_ativo": round(agora - self.inicio, 3),
+                "trabalhos": estados,
+                "totais": dict(self.contagens),
+            }
+
+    # As mesmas métricas no formato texto do Prometheus, seguidas das métricas das chamadas à IA e das etapas
+    # (telemetria.py), que o serviço só grava em arquivo ao parar.
+    def metricas_prometheus(self):
+        metricas = self.metricas()
+        linhas = []
+
+        def metrica(nome, tipo, ajuda, amostras):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for rotulos, valor in amostras:
+                texto_rotulos = ",".join(f'{chave}="{escapar_rotulo(valor_rotulo)}"' for chave, valor_rotulo in rotulos.items())
+                linhas.append(f"{nome}{{{texto_rotulos}}} {valor}" if texto_rotulos else f"{nome} {valor}")
+
+        metrica("buildmychar_servico_fila", "gauge", "Trabalhos esperando na fila.", [({}, metricas["fila"])])
+        metrica("buildmychar_servico_fila_maxima", "gauge", "Maior profundidade da fila desde o início.", [({}, metricas["fila_maxima"])])
+        metrica("buildmychar_servico_workers", "gauge", "Workers do serviço.", [({}, metricas["workers"])])
+        metrica("buildmychar_servico_workers_ocupados", "gauge", "Workers gerando um personagem agora.", [({}, metricas["workers_ocupados"])])
+        metrica("buildmychar_servico_utilizacao", "gauge", "Fração do tempo em que os workers estiveram ocupados.", [({}, metricas["utilizacao"])])
+        metrica("buildmychar_servico_trabalhos_total", "counter", "Trabalhos por resultado.",
+            [({"resultado": resultado}, quantidade) for resultado, quantidade in metricas["totais"].items()])
+
+        return "\n".join(linhas) + "\n" + obter_telemetria().texto_prometheus()
+
+
+class ManipuladorHTTP(BaseHTTPRequestHandler):
+    # Rotas do serviço (self.server.servico é o ServicoPersonagens):
+    #   POST /trabalhos                 respostas do personagem; "id" (ver ID_VALIDO) e "prioridade" opcionais no mesmo objeto
+    #   GET  /trabalhos                 lista os trabalhos guardados
+    #   GET  /trabalhos/<id>            estado e, ao terminar, a definição final e os metadados
+    #   GET  /trabalhos/<id>/eventos    progresso em Server-Sent Events até o fim do trabalho
+    #   GET  /metricas                  fila e workers em JSON (?formato=prometheus para o texto do Prometheus)
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        if CONFIG["servico"]["log_requisicoes"]:
+            super().log_message(formato, *args)
+
+    def responder(self, status, dados, tipo="application/json; charset=utf-8", cabecalhos=None):
+        corpo = dados.encode("utf-8") if isinstance(dados, str) else json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        for chave, valor in (cabecalhos or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def erro(self, status, mensagem):
+        self.responder(status, {"erro": mensagem})
+
+    def partes(self):
+        return [parte for parte in urlparse(self.path).path.split("/") if parte]
+
+    def do_POST(self):
+        if self.partes() != ["trabalhos"]:
+            return self.erro(404, "rota não encontrada")
+
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if tamanho > CONFIG["servico"]["max_corpo"]:
+            self.close_connection = True
+            return self.erro(413, f"corpo acima de {CONFIG['servico']['max_corpo']} bytes")
+
+        try:
+            respostas = json.loads(self.rfile.read(tamanho) or b"null")
+        except ValueError as e:
+            return self.erro(400, f"JSON inválido: {e}")
+        if not isinstance(respostas, dict):
+            return self.erro(400, "o corpo deve ser um objeto JSON com as respostas de perguntas.json")
+
+        try:
+            prioridade = int(respostas.pop("prioridade", 0) or 0)
+        except (TypeError, ValueError):
+            return self.erro(400, "prioridade deve ser um número inteiro")
+
+        trabalho_id = respostas.pop("id", None)
+        if trabalho_id is not None and not (isinstance(trabalho_id, str) and ID_VALIDO.fullmatch(trabalho_id)):
+            return self.erro(400, "id deve ter de 1 a 64 letras, números, '_' ou '-'")
+
+        trabalho, motivo = self.server.servico.enviar(respostas, prioridade, trabalho_id)
+        if motivo == "id_em_uso":
+            return self.erro(409, "já existe um trabalho em andamento com esse id")
+        if motivo:
+            return self.erro(503, "fila cheia" if motivo == "fila_cheia" else "serviço parando")
+
+        self.responder(202, trabalho.descrever(), cabecalhos={"Location": f"/trabalhos/{trabalho.id}"})
+
+    def do_GET(self):
+        partes = self.partes()
+
+        if partes == ["metricas"]:
+            if parse_qs(urlparse(self.path).query).get("formato") == ["prometheus"]:
+                return self.responder(200, self.server.servico.metricas_prometheus(), tipo="text/plain; version=0.0.4; charset=utf-8")
+            return self.responder(200, self.server.servico.metricas())
+
+        if partes == ["trabalhos"]:
+            return self.responder(200, self.server.servico.listar())
+
+        if len(partes) in (2, 3) and partes[0] == "trabalhos":
+            trabalho = self.server.servico.obter(partes[1])
+            if trabalho is None:
+                return self.erro(404, "trabalho não encontrado")
+            if len(partes) == 2:
+                return self.responder(200, trabalho.descrever())
+            if partes[2] == "eventos":
+                return self.transmitir(trabalho)
+
+        self.erro(404, "rota não encontrada")
+
+    # Envia os eventos do trabalho como Server-Sent Events, cada um com o número dele como id, até o evento "fim".
+    # Com o cabeçalho Last-Event-ID, continua a partir do evento seguinte.
+    def transmitir(self, trabalho):
+        try:
+            enviados = int(self.headers.get("Last-Event-ID")) + 1
+        except (TypeError, ValueError):
+            enviados = 0
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            while True:
+                eventos, terminou = trabalho.aguardar_eventos(enviados, CONFIG["servico"]["intervalo_keepalive"])
+                for evento in eventos:
+                    self.wfile.write(f"id: {enviados}\nevent: {evento['tipo']}\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    enviados += 1
+                if not eventos and not terminou:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+
+                if terminou:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            # Quem acompanhava desconectou; o trabalho continua
+            return
+
+
+# Cria o servidor HTTP com os workers já rodando. `servidor.serve_forever()` atende os pedidos e
+# `parar_servico(servidor)` encerra os dois.
+def criar_servico(host=None, porta=None, **opcoes):
+    servico = ServicoPersonagens(**opcoes)
+    servidor = ThreadingHTTPServer((host or CONFIG["servico"]["host"], CONFIG["servico"]["porta"] if porta is None else porta), ManipuladorHTTP)
+    servidor.daemon_threads = True
+    servidor.servico = servico
+    servico.iniciar()
+    return servidor
+
+
+# Encerra o servidor e os workers e grava a telemetria de todos os trabalhos atendidos.
+def parar_servico(servidor, espera=None):
+    servidor.shutdown()
+    servidor.server_close()
+    servidor.servico.parar(espera)
+
+    if CONFIG["telemetria"]["ativo"]:
+        obter_telemetria().exportar()
+
+
+# Roda o serviço até Ctrl+C.
+def executar_servico(host=None, porta=None, **opcoes):
+    if opcoes.get("cliente") is None and not os.environ.get("GROQ_API_KEY"):
+        print("Erro: variável de ambiente GROQ_API_KEY não encontrada.")
+        return
+
+    servidor = criar_servico(host, porta, **opcoes)
+    endereco, porta = servidor.server_address[:2]
+    print(f"Serviço de personagens em http://{endereco}:{porta} com {servidor.servico.workers} workers.")
+
+    try:
+        servidor.serve_forever()
+    finally:
+        print("Encerrando o serviço; os trabalhos em andamento terminam antes de sair.")
+        parar_servico(servidor)
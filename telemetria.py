@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import inspect
+import threading
+from collections import defaultdict, deque
+from config import CONFIG
+from roteamento import custo_chamada
+
+
+class Telemetria:
+    # Registra cada chamada à IA e cada etapa do pipeline: tempos, tokens, novas tentativas com seus motivos e uso do cache.
+    # Os dados são exportados como relatório JSON e como arquivo texto do Prometheus (coletor textfile do node_exporter).
+    # Os totais por etapa são somados a cada registro; das chamadas e execuções de etapas, só as últimas
+    # CONFIG["telemetria"]["max_registros"] ficam guardadas, para um lote grande ou o modo serviço não crescerem sem limite.
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.reiniciar()
+
+    # Esquece tudo o que foi registrado, para medir uma execução separada das anteriores (usado pelos benchmarks).
+    def reiniciar(self):
+        with self.trava:
+            self.inicio = time.time()
+            self.chamadas = deque(maxlen=CONFIG["telemetria"]["max_registros"])
+            self.etapas = deque(maxlen=CONFIG["telemetria"]["max_registros"])
+            self.por_etapa = defaultdict(novo_resumo_etapa)
+            self.repeticoes = defaultdict(lambda: defaultdict(int))
+            self.eventos = defaultdict(lambda: defaultdict(int))
+
+    # Registra uma chamada de exec_ia, já com todas as tentativas feitas dentro dela.
+    def registrar_chamada(self, *, etapa, modelo, inicio, fim, tokens_prompt=0, tokens_resposta=0, motivos=(), cache="ignorado", sucesso=True):
+        chamada = {
+            "etapa": etapa or "sem_etapa",
+            "modelo": modelo,
+            "inicio": inicio,
+            "fim": fim,
+            "duracao": fim - inicio,
+            "tokens_prompt": tokens_prompt,
+            "tokens_resposta": tokens_resposta,
+            "custo": custo_chamada(modelo, tokens_prompt, tokens_resposta),
+            "novas_tentativas": len(motivos),
+            "motivos": list(motivos),
+            "cache": cache,
+            "sucesso": sucesso,
+        }
+
+        with self.trava:
+            self.chamadas.append(chamada)
+
+            dados = self.por_etapa[chamada["etapa"]]
+            dados["chamadas"] += 1
+            dados["falhas"] += 0 if sucesso else 1
+            dados["latencia_total"] += chamada["duracao"]
+            dados["latencia_maxima"] = max(dados["latencia_maxima"], chamada["duracao"])
+            dados["tokens_prompt"] += tokens_prompt
+            dados["tokens_resposta"] += tokens_resposta
+            dados["custo"] += chamada["custo"]
+            dados["cache"][cache] += 1
+            dados["modelos"][modelo] += 1
+            for motivo in motivos:
+                dados["novas_tentativas"][motivo] += 1
+
+    # Registra uma nova tentativa feita pelo laço da etapa (por exemplo, texto acima do limite de caracteres).
+    def registrar_repeticao(self, etapa, motivo):
+        with self.trava:
+            self.repeticoes[etapa][motivo] += 1
+
+    # Soma ocorrências de um evento da etapa que não é uma chamada nem uma nova tentativa (por exemplo, diálogos repetidos descartados).
+    def registrar_evento(self, etapa, evento, quantidade:int=1):
+        with self.trava:
+            self.eventos[etapa][evento] += quantidade
+
+    # Envolve a função de uma etapa para registrar o início, o fim e se terminou sem erro. Uma corrotina continua
+    # corrotina, medida até terminar.
+    def medir(self, nome, funcao):
+        if inspect.iscoroutinefunction(funcao):
+            async def executar_async(*args, **kwargs):
+                inicio = time.time()
+                sucesso = False
+                try:
+                    resultado = await funcao(*args, **kwargs)
+                    sucesso = True
+                    return resultado
+                finally:
+                    self.registrar_etapa(nome, inicio, sucesso)
+
+            return executar_async
+
+        def executar(*args, **kwargs):
+            inicio = time.time()
+            sucesso = False
+            try:
+                resultado = funcao(*args, **kwargs)
+                sucesso = True
+                return resultado
+            finally:
+                self.registrar_etapa(nome, inicio, sucesso)
+
+        return executar
+
+    def registrar_etapa(self, nome, inicio, sucesso):
+        fim = time.time()
+        with self.trava:
+            self.etapas.append({"etapa": nome, "inicio": inicio, "fim": fim, "duracao": fim - inicio, "sucesso": sucesso})
+            self.por_etapa[nome]["execucoes"] += 1
+            self.por_etapa[nome]["duracao_total"] += fim - inicio
+
+    # Totais por etapa, desde o início ou o último reiniciar.
+    def resumo(self):
+        with self.trava:
+            nomes = set(self.por_etapa) | set(self.repeticoes) | set(self.eventos)
+            resumo = {}
+
+            for nome in sorted(nomes):
+                dados = self.por_etapa.get(nome) or novo_resumo_etapa()
+                resumo[nome] = {chave: dict(valor) if isinstance(valor, defaultdict) else valor for chave, valor in dados.items()}
+                resumo[nome]["repeticoes"] = dict(self.repeticoes.get(nome, {}))
+                resumo[nome]["eventos"] = dict(self.eventos.get(nome, {}))
+
+        return resumo
+
+    # Grava o relatório JSON da execução: resumo por etapa e a lista de chamadas e etapas.
+    def exportar_json(self, caminho):
+        resumo = self.resumo()
+        with self.trava:
+            relatorio = {
+                "inicio": self.inicio,
+                "fim": time.time(),
+                "totais": {
+                    "chamadas": sum(dados["chamadas"] for dados in resumo.values()),
+                    "tokens_prompt": sum(dados["tokens_prompt"] for dados in resumo.values()),
+                    "tokens_resposta": sum(dados["tokens_resposta"] for dados in resumo.values()),
+                    "custo": sum(dados["custo"] for dados in resumo.values()),
+                    "novas_tentativas": sum(sum(dados["novas_tentativas"].values()) for dados in resumo.values()),
+                    "acertos_cache": sum(dados["cache"].get("acerto", 0) for dados in resumo.values()),
+                    # Soma de cada evento em todas as etapas (por exemplo, escalonamentos)
+                    "eventos": {evento: sum(contagens.get(evento, 0) for contagens in self.eventos.values()) for evento in sorted({evento for contagens in self.eventos.values() for evento in contagens})},
+                },
+                "etapas": resumo,
+                # Só as últimas chamadas e execuções de etapas (CONFIG["telemetria"]["max_registros"])
+                "chamadas": list(self.chamadas),
+                "execucoes_etapas": list(self.etapas),
+            }
+
+        gravar_atomico(caminho, json.dumps(relatorio, ensure_ascii=False, indent=4))
+
+    # Métricas no formato texto do Prometheus.
+    def texto_prometheus(self):
+        resumo = self.resumo()
+        linhas = []
+
+        def metrica(nome, tipo, ajuda, amostras):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for rotulos, valor in amostras:
+                texto_rotulos = ",".join(f'{chave}="{escapar_rotulo(valor_rotulo)}"' for chave, valor_rotulo in rotulos.items())
+                linhas.append(f"{nome}{{{texto_rotulos}}} {valor}")
+
+        metrica("buildmychar_llm_chamadas_total", "counter", "Chamadas de exec_ia por etapa e modelo.",
+            [({"etapa": etapa, "modelo": modelo}, quantidade) for etapa, dados in resumo.items() for modelo, quantidade in dados["modelos"].items()])
+        metrica("buildmychar_llm_falhas_total", "counter", "Chamadas de exec_ia sem resposta válida.",
+            [({"etapa": etapa}, dados["falhas"]) for etapa, dados in resumo.items() if dados["chamadas"]])
+        metrica("buildmychar_llm_latencia_segundos_total", "counter", "Tempo total gasto nas chamadas à IA.",
+            [({"etapa": etapa}, round(dados["latencia_total"], 6)) for etapa, dados in resumo.items() if dados["chamadas"]])
+        metrica("buildmychar_llm_latencia_maxima_segundos", "gauge", "Maior latência de uma chamada à IA.",
+            [({"etapa": etapa}, round(dados["latencia_maxima"], 6)) for etapa, dados in resumo.items() if dados["chamadas"]])
+        metrica("buildmychar_llm_tokens_total", "counter", "Tokens de prompt e de resposta consumidos.",
+            [({"etapa": etapa, "tipo": tipo}, dados[f"tokens_{tipo}"]) for etapa, dados in resumo.items() if dados["chamadas"] for tipo in ("prompt", "resposta")])
+        metrica("buildmychar_llm_custo_dolares_total", "counter", "Custo estimado das chamadas à IA, pelos preços de CONFIG[\"ia\"][\"precos\"].",
+            [({"etapa": etapa}, round(dados["custo"], 8)) for etapa, dados in resumo.items() if dados["chamadas"]])
+        metrica("buildmychar_llm_novas_tentativas_total", "counter", "Novas tentativas dentro de exec_ia, por motivo.",
+            [({"etapa": etapa, "motivo": motivo}, quantidade) for etapa, dados in resumo.items() for motivo, quantidade in dados["novas_tentativas"].items()])
+        metrica("buildmychar_etapa_repeticoes_total", "counter", "Novas tentativas feitas pelos laços das etapas, por motivo.",
+            [({"etapa": etapa, "motivo": motivo}, quantidade) for etapa, dados in resumo.items() for motivo, quantidade in dados["repeticoes"].items()])
+        metrica("buildmychar_etapa_eventos_total", "counter", "Eventos registrados pelas etapas, por tipo.",
+            [({"etapa": etapa, "evento": evento}, quantidade) for etapa, dados in resumo.items() for evento, quantidade in dados["eventos"].items()])
+        metrica("buildmychar_cache_total", "counter", "Uso do cache de respostas por resultado.",
+            [({"etapa": etapa, "resultado": resultado}, quantidade) for etapa, dados in resumo.items() for resultado, quantidade in dados["cache"].items()])
+        metrica("buildmychar_etapa_duracao_segundos_total", "counter", "Tempo total de execução das etapas.",
+            [({"etapa": etapa}, round(dados["duracao_total"], 6)) for etapa, dados in resumo.items() if dados["execucoes"]])
+        metrica("buildmychar_etapa_execucoes_total", "counter", "Execuções das etapas.",
+            [({"etapa": etapa}, dados["execucoes"]) for etapa, dados in resumo.items() if dados["execucoes"]])
+
+        return "\n".join(linhas) + "\n"
+
+    # Grava as métricas no formato texto do Prometheus.
+    def exportar_prometheus(self, caminho):
+        gravar_atomico(caminho, self.texto_prometheus())
+
+    # Exporta para os caminhos de CONFIG["telemetria"].
+    def exportar(self):
+        if CONFIG["telemetria"]["relatorio_json"]:
+            self.exportar_json(CONFIG["telemetria"]["relatorio_json"])
+        if CONFIG["telemetria"]["prometheus"]:
+            self.exportar_prometheus(CONFIG["telemetria"]["prometheus"])
+
+
+# Totais de uma etapa, somados a cada chamada e execução registradas.
+def novo_resumo_etapa():
+    return {
+        "chamadas": 0, "falhas": 0, "latencia_total": 0.0, "latencia_maxima": 0.0,
+        "tokens_prompt": 0, "tokens_resposta": 0, "custo": 0.0, "novas_tentativas": defaultdict(int),
+        "cache": defaultdict(int), "modelos": defaultdict(int),
+        "execucoes": 0, "duracao_total": 0.0,
+    }
+
+
+def escapar_rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Grava o arquivo por inteiro de uma vez, para que quem lê nunca encontre um arquivo pela metade.
+def gravar_atomico(caminho, conteudo):
+    diretorio = os.path.dirname(caminho)
+    if diretorio and not os.path.exists(diretorio):
+        os.makedirs(diretorio, exist_ok=True)
+
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+_telemetria = None
+_trava_telemetria = threading.Lock()
+
+
+# Retorna a telemetria compartilhada por todos os personagens do processo.
+def obter_telemetria():
+    global _telemetria
+
+    with _trava_telemetria:
+        if _telemetria is None:
+            _telemetria = Telemetria()
+
+    return _telemetria
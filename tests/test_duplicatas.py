@@ -0,0 +1,64 @@
+# Testes do detector de diálogos quase repetidos (duplicatas.py).
+#
+#   python -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from config import CONFIG
+from duplicatas import DetectorDuplicatas, texto_dialogo
+
+
+# Detector com os mesmos parâmetros de criar_dialogos
+def novo_detector():
+    return DetectorDuplicatas(
+        limiar=CONFIG["dialogos"]["limiar_similaridade"],
+        permutacoes=CONFIG["dialogos"]["permutacoes"],
+        bandas=CONFIG["dialogos"]["bandas"],
+    )
+
+
+def sem_duplicatas(textos):
+    detector = novo_detector()
+    return [texto for texto in textos if not detector.eh_duplicata(texto)]
+
+
+def test_linhas_quase_iguais_sao_descartadas():
+    textos = [
+        "Você viu o dragão que passou pela vila ontem à noite?",
+        "voce viu o dragao que passou pela vila ontem a noite",
+        "Você viu o dragão que passou pela vila ontem à noite!!",
+        "Você viu o dragão que passou pela vila ontem de noite?",
+    ]
+    assert sem_duplicatas(textos) == textos[:1]
+
+
+def test_linhas_diferentes_sao_mantidas():
+    textos = [
+        "Você viu o dragão que passou pela vila ontem à noite?",
+        "Minha espada precisa ser afiada antes da viagem ao norte.",
+        "O ferreiro disse que o preço do aço subiu muito este mês.",
+        "Vamos descansar na taverna e partir ao amanhecer.",
+        "Ninguém sabe onde o mago escondeu o livro de feitiços.",
+    ]
+    assert sem_duplicatas(textos) == textos
+
+
+def test_dialogo_compara_as_duas_mensagens():
+    detector = novo_detector()
+    dialogo = {"user1": "Ana", "msg1": "Para onde vamos agora?", "user2": "Rei", "msg2": "Para o castelo, antes que escureça."}
+    outro = dict(dialogo, msg2="Para a floresta, procurar o lobo que atacou as ovelhas.")
+
+    assert not detector.eh_duplicata(texto_dialogo(dialogo))
+    assert detector.eh_duplicata(texto_dialogo(dict(dialogo)))
+    assert not detector.eh_duplicata(texto_dialogo(outro))
+    assert len(detector) == 2
+
+
+def test_permutacoes_precisam_ser_multiplo_das_bandas():
+    with pytest.raises(ValueError):
+        DetectorDuplicatas(permutacoes=64, bandas=10)
@@ -0,0 +1,63 @@
+# Testes do empacotamento dos templates de definição em requisições (empacotamento.py).
+#
+#   python -m pytest tests
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG
+from empacotamento import empacotar, orcamento_pacote
+
+
+def templates(quantidade, semente:int=1):
+    aleatorio = random.Random(semente)
+    return [{"identificador": f"t{indice}", "tokens": aleatorio.randint(50, 900)} for indice in range(quantidade)]
+
+
+def custo(template):
+    return template["tokens"]
+
+
+def test_pacotes_respeitam_o_limite_de_tokens():
+    for semente in range(20):
+        pacotes = empacotar(templates(40, semente), custo, 2000)
+        assert all(sum(custo(template) for template in pacote) <= 2000 for pacote in pacotes)
+
+
+def test_todos_os_templates_ficam_em_algum_pacote_uma_vez():
+    itens = templates(40)
+    pacotes = empacotar(itens, custo, 2000)
+    empacotados = [template["identificador"] for pacote in pacotes for template in pacote]
+    assert sorted(empacotados) == sorted(template["identificador"] for template in itens)
+
+
+def test_ordem_original_e_pacotes_repetiveis():
+    itens = templates(40)
+    pacotes = empacotar(itens, custo, 2000)
+    posicoes = {template["identificador"]: indice for indice, template in enumerate(itens)}
+
+    for pacote in pacotes:
+        assert [posicoes[template["identificador"]] for template in pacote] == sorted(posicoes[template["identificador"]] for template in pacote)
+    assert [posicoes[pacote[0]["identificador"]] for pacote in pacotes] == sorted(posicoes[pacote[0]["identificador"]] for pacote in pacotes)
+    assert empacotar(itens, custo, 2000) == pacotes
+
+
+def test_first_fit_decreasing_enche_os_pacotes():
+    # 6 + 4 e 5 + 5 cabem em dois pacotes de 10
+    itens = [{"identificador": nome, "tokens": tokens} for nome, tokens in [("a", 5), ("b", 6), ("c", 4), ("d", 5)]]
+    assert [[template["identificador"] for template in pacote] for pacote in empacotar(itens, custo, 10)] == [["a", "d"], ["b", "c"]]
+
+
+def test_template_maior_que_o_limite_fica_sozinho():
+    itens = [{"identificador": "grande", "tokens": 5000}, {"identificador": "pequeno", "tokens": 100}]
+    pacotes = empacotar(itens, custo, 2000)
+    assert [[template["identificador"] for template in pacote] for pacote in pacotes] == [["grande"], ["pequeno"]]
+
+
+def test_orcamento_limitado_pela_janela_do_modelo(monkeypatch):
+    monkeypatch.setitem(CONFIG["ia"]["janelas_contexto"], "modelo-pequeno", 4096)
+    assert orcamento_pacote("modelo-pequeno") == min(CONFIG["definicao"]["max_tokens_pacote"], 4096)
+    assert orcamento_pacote("modelo-desconhecido") == min(CONFIG["definicao"]["max_tokens_pacote"], CONFIG["ia"]["janela_contexto_padrao"])
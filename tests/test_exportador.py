@@ -0,0 +1,91 @@
+# Testes do exportador da definição final (exportador.py).
+#
+#   python -m pytest tests
+
+import os
+import io
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from exportador import escrever_texto, escrever_caijson, exportar, exportar_personagens
+
+TEMPLATES = [
+    {"identificador": "aparencia", "titulo": "Aparência", "perguntas": [
+        {"indice": "1", "resposta": "Os olhos dela são {1}."},
+        {"indice": "2", "resposta": "Ela veste {2}."},
+    ]},
+    {"identificador": "vazio", "titulo": "Sem respostas", "perguntas": [{"indice": "1", "resposta": "Nada {1}."}]},
+]
+
+DADOS = {
+    "nome": "Ana d'Ávila",
+    "slogan": 'A "rainha" do sertão',
+    "descricao": "Linha 1\nLinha 2\tcom tab e barra \\ e emoji 🐉",
+    "saudacao": "Olá, viajante!",
+    "etiquetas": ["fantasia", "aventura"],
+    "definicoes": {"aparencia": [
+        {"pergunta_id": "1", "resposta": 'verdes, "brilhantes"'},
+        {"pergunta_id": "2", "resposta": "um manto \\ azul\ncom bordados " + "x" * 300},
+    ]},
+    "dialogos": [
+        {"user1": "Ana", "msg1": "Quem é você?", "user2": "user", "msg2": "Um viajante."},
+        {"user1": "Ana", "msg1": "Incompleto", "user2": "", "msg2": ""},
+    ],
+}
+
+
+def texto(dados=DADOS):
+    saida = io.StringIO()
+    escrever_texto(saida, dados, TEMPLATES)
+    return saida.getvalue()
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 16, 8192])
+def test_caijson_volta_inteiro_pelo_json_loads(tamanho_bloco):
+    saida = io.StringIO()
+    escrever_caijson(saida, DADOS, TEMPLATES, tamanho_bloco=tamanho_bloco)
+    dados = json.loads(saida.getvalue())
+
+    assert dados == {
+        "name": DADOS["nome"], "tagline": DADOS["slogan"], "description": DADOS["descricao"],
+        "greeting": DADOS["saudacao"], "tags": DADOS["etiquetas"], "definition": texto(),
+    }
+
+
+def test_definicao_preenche_os_templates_e_pula_o_incompleto():
+    definicao = texto()
+    assert '- Os olhos dela são verdes, "brilhantes".' in definicao
+    assert "Sem respostas" not in definicao
+    assert "{{Ana}}: Quem é você?" in definicao
+    assert "Incompleto" not in definicao
+    assert definicao == definicao.rstrip()
+
+
+def test_sem_dialogos_completos_nao_tem_titulo_de_dialogos():
+    assert "DIÁLOGOS" not in texto(dict(DADOS, dialogos=[]))
+
+
+def test_exportar_personagens_em_jsonl():
+    class Armazenamento:
+        def carregar(self, personagem_id):
+            return {
+                "personagem_info": {"informacoes": {"Nome": personagem_id}},
+                "personagem_slogan": {"slogan": "slogan\n" + personagem_id},
+                "personagem_definicao_aparencia": {"perguntas": [{"pergunta_id": "1", "resposta": "azuis"}]},
+            }
+
+    saida = io.StringIO()
+    assert exportar_personagens(saida, Armazenamento(), ["a", "b"], TEMPLATES, "caijson") == 2
+
+    linhas = saida.getvalue().splitlines()
+    assert [json.loads(linha)["name"] for linha in linhas] == ["a", "b"]
+    assert "Os olhos dela são azuis." in json.loads(linhas[0])["definition"]
+
+
+def test_formato_desconhecido():
+    with pytest.raises(ValueError):
+        exportar(io.StringIO(), DADOS, TEMPLATES, "xml")
@@ -0,0 +1,68 @@
+# Testes do hedging das chamadas (hedge.py).
+#
+#   python -m pytest tests
+
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from config import CONFIG
+from hedge import ControleHedge
+
+
+# Controle com o hedging ligado, sem espera mínima e com um histograma de chamadas rápidas, então toda chamada que
+# passa de ~10 ms ganha uma cópia se o orçamento deixar.
+@pytest.fixture
+def controle(monkeypatch):
+    monkeypatch.setitem(CONFIG["hedge"], "ativo", True)
+    monkeypatch.setitem(CONFIG["hedge"], "espera_minima", 0.0)
+    monkeypatch.setitem(CONFIG["hedge"], "min_amostras", 5)
+    controle = ControleHedge()
+    for _ in range(5):
+        controle.registrar("etapa", 0.001)
+    return controle
+
+
+def test_copias_respeitam_o_orcamento(controle, monkeypatch):
+    monkeypatch.setitem(CONFIG["hedge"], "orcamento", 0.1)
+
+    # Só para o teste não registrar as chamadas lentas e subir o limiar
+    monkeypatch.setattr(controle, "registrar", lambda etapa, segundos: None)
+    for _ in range(40):
+        assert controle.executar("etapa", lambda: time.sleep(0.03) or "ok")[0] == "ok"
+
+    estatisticas = controle.estatisticas()
+    assert estatisticas["requisicoes"] == 40
+    assert 1 <= estatisticas["duplicadas"] <= 0.1 * 40
+
+
+def test_perdedora_rodando_ocupa_o_orcamento(controle, monkeypatch):
+    monkeypatch.setitem(CONFIG["hedge"], "orcamento", 2.0)
+    liberar = threading.Event()
+    chamadas = []
+
+    # A original trava até o teste liberar; a cópia volta na hora
+    def chamar():
+        chamadas.append(1)
+        if len(chamadas) == 1:
+            liberar.wait(5)
+            return "original"
+        return "copia"
+
+    assert controle.executar("etapa", chamar) == ("copia", "copia")
+    assert controle.estatisticas()["perdedoras_rodando"] == 1
+    # 1 cópia + 1 perdedora rodando: a próxima cópia passaria de 2 por requisição
+    assert not controle.reservar()
+
+    liberar.set()
+    for _ in range(50):
+        if not controle.estatisticas()["perdedoras_rodando"]:
+            break
+        time.sleep(0.01)
+    assert controle.estatisticas()["perdedoras_rodando"] == 0
+    assert controle.reservar()
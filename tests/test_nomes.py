@@ -0,0 +1,63 @@
+# Testes do normalizador local de nomes (nomes.py).
+#
+#   python -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nomes import normalizar_nome
+
+
+def nome(texto):
+    return normalizar_nome(texto)["nome"]
+
+
+def test_capitaliza_e_acentua_nomes_comuns():
+    assert nome("  joao   da SILVA ") == "João da Silva"
+    assert nome("MARIA DE SOUZA") == "Maria de Souza"
+
+
+def test_nome_com_hifen_formata_cada_parte():
+    assert nome("joao-pedro") == "João-Pedro"
+    assert nome("JOAO-PEDRO silva") == "João-Pedro Silva"
+    assert nome("jean-luc") == "Jean-Luc"
+
+
+def test_nome_com_apostrofo_formata_cada_parte():
+    assert nome("d'avila") == "D'Ávila"
+    assert nome("maria d'avila") == "Maria d'Ávila"
+    assert nome("ana o'neil") == "Ana O'Neil"
+    assert nome("ana sant’ana") == "Ana Sant’Ana"
+
+
+def test_acentua_nomes_e_sobrenomes_comuns():
+    assert nome("andre mendonca") == "André Mendonça"
+    assert nome("alicia lourenco") == "Alícia Lourenço"
+    assert nome("benicio") == "Benício"
+    assert nome("maite") == "Maitê"
+    assert nome("patricia vinicius") == "Patrícia Vinícius"
+
+
+def test_nomes_comuns_sem_acento_continuam_resolvidos():
+    assert nome("maria garcia") == "Maria Garcia"
+    assert nome("alexandre franco") == "Alexandre Franco"
+    assert nome("vicente duarte") == "Vicente Duarte"
+
+
+def test_terminacao_de_acento_fora_do_dicionario_vai_para_a_ia():
+    for texto in ["braulio", "sabrina tiburcio", "ana pianco", "joana peneia", "leandre"]:
+        resultado = normalizar_nome(texto)
+        assert not resultado["resolvido"], texto
+        assert "acento desconhecido" in resultado["motivo"]
+
+
+def test_parte_sem_acento_desconhecido_vai_para_a_ia():
+    resultado = normalizar_nome("ana cordao-silva")
+    assert not resultado["resolvido"]
+    assert "acento desconhecido" in resultado["motivo"]
+
+
+def test_nome_longo_perde_os_nomes_do_meio():
+    assert nome("maria eduarda dos santos") == "Maria Santos"
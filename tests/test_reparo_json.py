@@ -0,0 +1,67 @@
+# Testes do reparo das respostas que não validaram (reparo_json.py).
+#
+#   python -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel
+
+from reparo_json import reparar_json, pendencias, desembrulhar, juntar
+
+
+class Modelo(BaseModel):
+    tags: list[str]
+    descricao: str
+
+
+def test_json_estragado_e_consertado():
+    reparo = reparar_json('```json\n{"tags": ["a", "b",], "descricao": "linha\nquebrada"}\n```')
+    assert reparo["completo"]
+    assert reparo["dados"] == {"tags": ["a", "b"], "descricao": "linha\nquebrada"}
+    assert pendencias(Modelo, reparo) == {}
+
+
+def test_texto_cortado_fica_para_continuar():
+    reparo = desembrulhar(reparar_json('{"tags": ["a", "b"], "descricao": "Ela nasceu em Salv'), Modelo)
+    assert not reparo["completo"]
+    assert reparo["cortado"] == "descricao"
+    assert reparo["dados"]["descricao"] == "Ela nasceu em Salv"
+    assert pendencias(Modelo, reparo) == {"descricao": "continuar"}
+
+
+def test_chamada_embrulhada_e_cortada_marca_o_campo_de_dentro():
+    reparo = desembrulhar(reparar_json('{"name": "M", "arguments": {"tags": ["a", "b"], "descricao": "Ela nasceu em Salv'), Modelo)
+    assert reparo["dados"] == {"tags": ["a", "b"], "descricao": "Ela nasceu em Salv"}
+    assert reparo["cortado"] == "descricao"
+    assert pendencias(Modelo, reparo) == {"descricao": "continuar"}
+
+
+def test_chamada_embrulhada_cortada_fora_dos_campos_do_modelo():
+    reparo = desembrulhar(reparar_json('{"name": "M", "arguments": {"tags": ["a"], "descricao": "Ela", "extra": "meio'), Modelo)
+    assert reparo["cortado"] == "extra"
+    assert reparo["cortado"] not in Modelo.model_fields
+
+
+def test_lista_cortada_fica_so_com_os_itens_completos():
+    reparo = desembrulhar(reparar_json('{"descricao": "Ela", "tags": ["a", "b", "c'), Modelo)
+    assert reparo["dados"]["tags"] == ["a", "b"]
+    assert reparo["itens_descartados"] == 1
+    assert pendencias(Modelo, reparo) == {"tags": "continuar"}
+
+    juntos = juntar(reparo["dados"], {"tags": ["c", "d"]}, {"tags": "continuar"})
+    assert Modelo.model_validate(juntos).tags == ["a", "b", "c", "d"]
+
+
+def test_objeto_cortado_dentro_de_lista_nao_vira_campo_cortado():
+    reparo = reparar_json('{"itens": [{"nome": "a"}, {"nome": "b')
+    assert reparo["dados"] == {"itens": [{"nome": "a"}]}
+    assert reparo["caminho"] == ["itens"]
+
+
+def test_campo_obrigatorio_que_nao_chegou_fica_faltando():
+    reparo = desembrulhar(reparar_json('{"tags": ["a"],'), Modelo)
+    assert reparo["cortado"] is None
+    assert pendencias(Modelo, reparo) == {"descricao": "faltando"}